@@ -0,0 +1,141 @@
+# ──────────────── bench/datasets.py ────────────────
+"""Synthetic, reproducible data for the benchmarks: a catalogue, missions, users and report posts.
+
+The same seed always gives the same rows, so numbers from two runs are comparable.  The catalogue
+is also written as a CSV in the sheet's column layout and served over local HTTP, which lets
+`sync_from_google_sheet` run unchanged (conditional GET included) without touching the network.
+"""
+import csv
+import datetime
+import functools
+import http.server
+import os
+import random
+import threading
+from contextlib import contextmanager
+
+GUILDS = 10
+BENCH_GUILD = 1          # the guild the per-guild benchmarks query
+REPORT_CHANNEL = 42
+TYPES = ('Resource', 'Component', 'Consumable', 'Weapon', 'Garment', 'Vehicle Part')
+WORDS = ('spice', 'melange', 'plastanium', 'duraluminum', 'stravidium', 'silicone', 'fiber', 'jasmium',
+         'crystal', 'water', 'fuel', 'cell', 'blade', 'stillsuit', 'thumper', 'ornithopter', 'sandbike',
+         'rotor', 'engine', 'hull', 'carbide', 'scraps', 'solari', 'armor', 'gauntlet', 'mask')
+ZONES = ('Australia/Brisbane', 'Europe/London', 'America/New_York', 'Asia/Tokyo', 'UTC')
+
+
+def resource_name(i: int) -> str:
+    rng = random.Random(i)
+    return f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} Mk{i}"
+
+
+def resources(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        name = resource_name(i)
+        out.append({'id': name.lower().replace(' ', '_'), 'name': name, 'type': rng.choice(TYPES),
+                    'tier': rng.randint(0, 6), 'details': ' '.join(rng.choices(WORDS, k=rng.randint(5, 60))),
+                    'image_url': f'https://example.invalid/{i}.png', 'dgt_slug': f'https://example.invalid/item/{i}'})
+    return out
+
+
+def demand(items: list[dict], seed: int = 0) -> list[dict]:
+    """About a fifth of the catalogue in demand per guild, split between high and medium."""
+    rng = random.Random(seed)
+    rows = []
+    for gid in range(1, GUILDS + 1):
+        for it in rng.sample(items, max(1, len(items) // 5)):
+            rows.append({'guild_id': gid, 'resource_id': it['id'], 'demand': rng.choice(('high', 'medium'))})
+    return rows
+
+
+def missions(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    start = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    return [{'id': i, 'message_id': 10 ** 12 + i, 'guild_id': rng.randint(1, GUILDS),
+             'channel_id': 100 + rng.randint(0, 20), 'creator_id': rng.randint(1, 100_000), 'details': 'Spice run',
+             'time': (start + datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 30))).isoformat(),
+             'participants': rng.sample(range(1, 100_000), rng.randint(1, 12))}
+            for i in range(n)]
+
+
+def user_settings(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{'user_id': uid, 'timezone': rng.choice(ZONES)} for uid in range(1, n + 1)]
+
+
+def report_messages(demand_rows: list[dict]) -> list[dict]:
+    """One registered post per in-demand item of every guild except BENCH_GUILD (left for fresh posts)."""
+    return [{'guild_id': r['guild_id'], 'channel_id': REPORT_CHANNEL + r['guild_id'], 'resource_id': r['resource_id'],
+             'message_id': 5 * 10 ** 12 + i, 'kind': 'single', 'fingerprint': None}
+            for i, r in enumerate(demand_rows) if r['guild_id'] != BENCH_GUILD]
+
+
+def settings() -> list[dict]:
+    rows = []
+    for gid in range(1, GUILDS + 1):
+        rows.append({'guild_id': gid, 'key': 'report_channel_id', 'value': REPORT_CHANNEL + gid})
+        rows += [{'guild_id': gid, 'key': f'dslot_{s}', 'value': s} for s in range(20)]
+    return rows
+
+
+def demand_history(items: list[dict], days: int = 30, per_day: int = 200, seed: int = 0) -> list[tuple]:
+    """Time-ordered (ts, guild_id, resource_id, level, user_id) changes over the last `days` days."""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    hot = rng.sample(items, max(1, len(items) // 10))   # churn concentrates on a few items
+    stamps = sorted(rng.uniform(now - days * 86400, now) for _ in range(days * per_day))
+    return [(ts, rng.randint(1, GUILDS), rng.choice(hot)['id'], rng.choice(('high', 'medium', 'low')),
+             rng.randint(1, 100_000)) for ts in stamps]
+
+
+def populate(storage, n_resources: int, n_missions: int, n_users: int) -> list[dict]:
+    """Fills an empty storage; returns the resources."""
+    items = resources(n_resources)
+    demand_rows = demand(items)
+    with storage.transaction():
+        storage.upsert_many('resources', items)
+        storage.upsert_many('demand', demand_rows)
+        storage.upsert_many('settings', settings())
+        storage.upsert_many('missions', missions(n_missions))
+        storage.upsert_many('user_settings', user_settings(n_users))
+        storage.upsert_many('report_messages', report_messages(demand_rows))
+    return items
+
+
+# ─── the sheet ──────────────────────────────────────────────
+def write_csv(path: str, items: list[dict], changed: float = 0.0, seed: int = 0):
+    """Writes `items` in the sheet's layout; `changed` is the fraction given new details."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(('Name', 'Type', 'Tier', 'Details', 'ImageURL', 'dgtSlug'))
+        for it in items:
+            details = it['details'] + (' (revised)' if rng.random() < changed else '')
+            w.writerow((it['name'], it['type'], it['tier'], details, it['image_url'], it['dgt_slug']))
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def serve_directory(path: str):
+    """Serves `path` on a free localhost port for the duration of the block; yields the base URL."""
+    handler = functools.partial(_QuietHandler, directory=path)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def touch(path: str, seconds_ahead: int):
+    """Moves a file's mtime forward so a conditional GET sees it as modified."""
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + seconds_ahead))
@@ -0,0 +1,187 @@
+# ──────────────── bench/fake_discord.py ────────────────
+"""A local stand-in for the parts of Discord the cogs touch.
+
+`FakeAPI` is the "server": every call a fake object makes goes through `FakeAPI.call`, which
+records it, waits the configured latency and may answer 429 instead.  Channels, messages and
+interactions keep the state Discord would keep (message content, embeds, deletions), so a
+scenario can check afterwards what users would actually see.
+"""
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+import discord
+
+
+def _http_error(cls, status: int, reason: str, message: str, **attrs):
+    e = cls(SimpleNamespace(status=status, reason=reason), {'message': message, 'code': 0})
+    for k, v in attrs.items():
+        setattr(e, k, v)
+    return e
+
+
+class FakeAPI:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, rate_limit: float = 0.0,
+                 retry_after: float = 0.05, seed: int = 0):
+        """`latency` ± `jitter` seconds per call; `rate_limit` is the chance a call answers 429."""
+        self.latency, self.jitter, self.rate_limit, self.retry_after = latency, jitter, rate_limit, retry_after
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()          # route -> calls, 429s included
+        self.rate_limited: Counter = Counter()   # route -> 429s served
+        self.ids = itertools.count(10 ** 15)
+
+    async def call(self, route: str):
+        self.calls[route] += 1
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+        if self.rate_limit and self.rng.random() < self.rate_limit:
+            self.rate_limited[route] += 1
+            raise _http_error(discord.HTTPException, 429, 'Too Many Requests', 'You are being rate limited.',
+                              retry_after=self.retry_after)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+
+# ─── guilds, channels, messages ─────────────────────────────
+class FakeMessage:
+    def __init__(self, channel, message_id: int, content=None, embeds=(), view=None):
+        self.channel, self.id = channel, message_id
+        self.content, self.view = content, view
+        self.shown = [e.to_dict() for e in embeds]   # what Discord has, as of the last send/edit
+        self.edits = 0
+        self.deleted = False
+
+    @property
+    def embeds(self) -> list[discord.Embed]:
+        # fresh copies, like the message object a real interaction carries
+        return [discord.Embed.from_dict(d) for d in self.shown]
+
+    def _apply(self, content=..., embed=..., embeds=..., view=...):
+        if content is not ...:
+            self.content = content
+        if embed is not ...:
+            self.shown = [embed.to_dict()] if embed else []
+        if embeds is not ...:
+            self.shown = [e.to_dict() for e in embeds]
+        if view is not ...:
+            self.view = view
+
+    async def edit(self, **fields):
+        await self.channel.api.call('PATCH /channels/{channel_id}/messages/{message_id}')
+        if self.deleted:
+            raise _http_error(discord.NotFound, 404, 'Not Found', 'Unknown Message')
+        self._apply(**fields)
+        self.edits += 1
+        return self
+
+    async def delete(self):
+        await self.channel.api.call('DELETE /channels/{channel_id}/messages/{message_id}')
+        if self.deleted:
+            raise _http_error(discord.NotFound, 404, 'Not Found', 'Unknown Message')
+        self.deleted = True
+
+    def to_reference(self, fail_if_not_exists: bool = True):
+        return discord.MessageReference(message_id=self.id, channel_id=self.channel.id,
+                                        fail_if_not_exists=fail_if_not_exists)
+
+
+class FakeChannel:
+    def __init__(self, api: FakeAPI, guild, channel_id: int):
+        self.api, self.guild, self.id = api, guild, channel_id
+        self.messages: dict[int, FakeMessage] = {}
+
+    def live(self) -> list[FakeMessage]:
+        return [m for m in self.messages.values() if not m.deleted]
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, **_):
+        await self.api.call('POST /channels/{channel_id}/messages')
+        msg = FakeMessage(self, next(self.api.ids), content, [embed] if embed else embeds or (), view)
+        self.messages[msg.id] = msg
+        return msg
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        # like discord's PartialMessage: no API call until it is used
+        if msg := self.messages.get(message_id):
+            return msg
+        gone = FakeMessage(self, message_id)
+        gone.deleted = True
+        return gone
+
+    async def delete_messages(self, objects):
+        await self.api.call('POST /channels/{channel_id}/messages/bulk-delete')
+        for obj in objects:
+            if msg := self.messages.get(obj.id):
+                msg.deleted = True
+
+
+class FakeBot:
+    """What the cogs use of the bot: the DB, the outbound queue, cogs, channels and views."""
+
+    def __init__(self, db, outbound=None):
+        self.db_handler, self.outbound = db, outbound
+        self.cogs, self.channels, self.views = {}, {}, []
+        self.user = SimpleNamespace(id=1, name='Mentat')
+        self.shard_count = None
+
+    def add_cog(self, cog):
+        self.cogs[type(cog).__name__] = cog
+
+    def get_cog(self, name):
+        return self.cogs.get(name)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        return self.channels[channel_id]
+
+    def add_view(self, view, message_id=None):
+        self.views.append(view)
+
+    def channel(self, api: FakeAPI, guild_id: int, channel_id: int) -> FakeChannel:
+        chan = self.channels[channel_id] = FakeChannel(api, SimpleNamespace(id=guild_id), channel_id)
+        return chan
+
+
+# ─── interactions ───────────────────────────────────────────
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _ack(self):
+        if self.done:
+            raise discord.InteractionResponded(self.interaction)
+        await self.interaction.channel.api.call('POST /interactions/{interaction_id}/{token}/callback')
+        self.done = True
+        self.interaction.acked_at = time.perf_counter()
+
+    async def send_message(self, content=None, **_):
+        await self._ack()
+
+    async def edit_message(self, **fields):
+        await self._ack()
+        if self.interaction.message:
+            self.interaction.message._apply(**fields)
+
+    async def defer(self, **_):
+        await self._ack()
+
+
+class FakeInteraction:
+    def __init__(self, bot: FakeBot, channel: FakeChannel, user_id: int, message: FakeMessage | None = None,
+                 data: dict | None = None):
+        self.client, self.channel, self.message = bot, channel, message
+        self.data = data or {}
+        self.user = SimpleNamespace(id=user_id, mention=f'<@{user_id}>')
+        self.guild_id, self.channel_id = channel.guild.id, channel.id
+        self.id = next(channel.api.ids)
+        self.response = FakeResponse(self)
+        self.created_at = time.perf_counter()
+        self.acked_at = None
@@ -0,0 +1,301 @@
+# ──────────────── bench/run.py ────────────────
+"""Offline benchmarks for MentatDB, the sheet sync, autocomplete and report rendering.
+
+    python -m bench.run                                   # default sizes, print a table
+    python -m bench.run --resources 1000 --save base.json # keep a baseline
+    python -m bench.run --compare base.json               # exit 1 on a regression
+
+Every public MentatDB method is timed against a populated temporary database; the run
+prints any method that has no case so new ones do not slip by unmeasured.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import inspect
+import io
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from bench import datasets
+from bench.datasets import BENCH_GUILD, REPORT_CHANNEL
+from src.core.async_db import AsyncMentatDB
+from src.core.database import MentatDB
+from src.core.demand_log import DemandLog
+from src.core.storage import SQLiteStorage, TinyDBStorage
+
+# MentatDB methods covered elsewhere (sheet.*) or that are lifecycle, not operations
+NOT_TIMED = {'close', 'flush', 'invalidate', 'transaction', 'write_stats', 'sync_from_google_sheet'}
+QUERIES = ('sp', 'spice mel', 'plastnium', 'mk12', 'engine rotor', 'x')
+SINCE = datetime.datetime(2026, 1, 15, tzinfo=datetime.timezone.utc)   # halfway through the missions' month
+TZ_QUERIES = ('aest', 'lon', 'new y', '', 'utc', 'tokyo')
+
+
+class Case:
+    """One timed operation: `fn(i)` (sync or async) runs `reps` times after an untimed `setup(i)`."""
+
+    def __init__(self, name: str, fn, reps: int, setup=None):
+        self.name, self.fn, self.reps, self.setup = name, fn, reps, setup
+
+    async def run(self) -> dict:
+        samples = []
+        # the sync's progress lines would swamp the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(self.reps):
+                if self.setup:
+                    self.setup(i)
+                started = time.perf_counter()
+                result = self.fn(i)
+                if inspect.isawaitable(result):
+                    await result
+                samples.append(time.perf_counter() - started)
+        samples.sort()
+        return {'n': len(samples),
+                'median_us': statistics.median(samples) * 1e6,
+                'p95_us': samples[math.ceil(len(samples) * 0.95) - 1] * 1e6,
+                'min_us': samples[0] * 1e6}
+
+
+def _open(backend: str, path: str):
+    return TinyDBStorage(path + '.json') if backend == 'tinydb' else SQLiteStorage(path + '.sqlite3')
+
+
+# ─── MentatDB ───────────────────────────────────────────────
+def db_cases(db: MentatDB, items: list[dict], reps: int) -> list[Case]:
+    heavy = max(5, reps // 10)
+    n = len(items)
+    ids = [it['id'] for it in items]
+    names = [it['name'] for it in items]
+    missions = db.get_all_missions(BENCH_GUILD)
+    mids = [m['message_id'] for m in db.get_all_missions()]
+    members = [m['participants'][0] for m in missions] or [1]
+    fresh = itertools.count(2 * 10 ** 12)
+    created = []
+
+    def create(i):
+        created.append(mid := next(fresh))
+        db.create_mission(mid, mid, 100, 1, 'Bench run', '2026-02-01T10:00:00+00:00', BENCH_GUILD)
+
+    def report_key(i):
+        return (BENCH_GUILD + 1, REPORT_CHANNEL + BENCH_GUILD + 1, ids[i % n])
+
+    return [
+        Case('db.cold_load', lambda i: (db.invalidate(), db.get_all_resources(BENCH_GUILD)), heavy),
+        Case('db.warm', lambda i: (db.invalidate(), db.warm()), heavy),
+        Case('db.get_resource', lambda i: db.get_resource(ids[i * 7 % n], BENCH_GUILD), reps),
+        Case('db.get_resource_by_name', lambda i: db.get_resource_by_name(names[i * 7 % n], BENCH_GUILD), reps),
+        Case('db.resolve_resource', lambda i: db.resolve_resource(names[i * 7 % n].lower(), BENCH_GUILD), reps),
+        Case('db.search_resource_names', lambda i: db.search_resource_names(QUERIES[i % len(QUERIES)], guild_id=BENCH_GUILD), reps),
+        Case('db.get_all_by_demand', lambda i: db.get_all_by_demand(['high', 'medium'], BENCH_GUILD), heavy),
+        Case('db.get_all_resources', lambda i: db.get_all_resources(BENCH_GUILD), heavy),
+        Case('db.set_demand', lambda i: db.set_demand(ids[i * 7 % n], ('high', 'medium', 'low')[i % 3], BENCH_GUILD), reps),
+        Case('db.set_demand_many', lambda i: db.set_demand_many({rid: ('high', 'medium', 'low')[i % 3] for rid in ids[i % n:i % n + 30]},
+                                                                 BENCH_GUILD), heavy),
+        Case('db.cast_vote', lambda i: db.cast_vote(ids[i * 7 % n], ('high', 'medium', 'low')[i % 3], BENCH_GUILD,
+                                                    i % 50 + 1), reps),
+        Case('db.decay_votes', lambda i: db.decay_votes(BENCH_GUILD), heavy),
+        Case('db.mark_resources_dirty', lambda i: db.mark_resources_dirty(ids[i % n:i % n + 10], BENCH_GUILD), reps),
+        Case('db.drain_dirty_resources', lambda i: db.drain_dirty_resources(BENCH_GUILD), reps),
+        Case('db.demand_trends', lambda i: db.demand_trends(BENCH_GUILD, 7), heavy),
+        Case('db.compact_demand_log', lambda i: db.compact_demand_log(), heavy),
+        Case('db.get_setting', lambda i: db.get_setting('report_channel_id', BENCH_GUILD), reps),
+        Case('db.set_setting', lambda i: db.set_setting(f'bench_{i % 50}', i, BENCH_GUILD), reps),
+        Case('db.delete_setting', lambda i: db.delete_setting(f'bench_{i % 50}', BENCH_GUILD), reps),
+        Case('db.get_settings_with_prefix', lambda i: db.get_settings_with_prefix('dslot_', BENCH_GUILD), reps),
+        Case('db.get_report_channels', lambda i: db.get_report_channels(), reps),
+        Case('db.create_mission', create, reps),
+        Case('db.get_mission', lambda i: db.get_mission(mids[i * 7 % len(mids)]), reps),
+        Case('db.get_all_missions', lambda i: db.get_all_missions(BENCH_GUILD), heavy),
+        Case('db.get_missions_page', lambda i: db.get_missions_page(BENCH_GUILD, SINCE, offset=i % 5 * 10), reps),
+        Case('db.get_missions_page[participant]',
+             lambda i: db.get_missions_page(BENCH_GUILD, SINCE, participant_id=members[i % len(members)]), reps),
+        Case('db.add_mission_participant', lambda i: db.add_mission_participant(mids[i % len(mids)], 7), reps),
+        Case('db.remove_mission_participant', lambda i: db.remove_mission_participant(mids[i % len(mids)], 7), reps),
+        Case('db.update_mission_participants', lambda i: db.update_mission_participants(mids[i % len(mids)], [1, 2, i]), reps),
+        Case('db.delete_mission', lambda i: db.delete_mission(created[i % len(created)]), min(reps, len(created) or reps)),
+        Case('db.get_report_message', lambda i: db.get_report_message(*report_key(i)), reps),
+        Case('db.get_report_messages', lambda i: db.get_report_messages(REPORT_CHANNEL + BENCH_GUILD + 1), reps),
+        Case('db.set_report_message', lambda i: db.set_report_message(*report_key(i), 9 * 10 ** 12 + i, f'fp{i}'), reps),
+        Case('db.delete_report_messages', lambda i: db.delete_report_messages([report_key(i)]), reps),
+        Case('db.adopt_legacy_report_settings', lambda i: db.adopt_legacy_report_settings(BENCH_GUILD, REPORT_CHANNEL), reps),
+        Case('db.adopt_legacy_guild', lambda i: db.adopt_legacy_guild(BENCH_GUILD), heavy),
+        Case('db.set_user_timezone', lambda i: db.set_user_timezone(i * 13 % 100_000 + 1, 'UTC'), reps),
+        Case('db.get_user_timezone', lambda i: db.get_user_timezone(i * 13 % 100_000 + 1), reps),
+    ]
+
+
+def uncovered(cases: list[Case]) -> list[str]:
+    timed = {c.name.split('.', 1)[1] for c in cases if c.name.startswith('db.')}
+    public = {m for m in dir(MentatDB) if not m.startswith('_') and callable(getattr(MentatDB, m))}
+    return sorted(public - timed - NOT_TIMED)
+
+
+# ─── sheet sync ─────────────────────────────────────────────
+def sheet_cases(db: MentatDB, items: list[dict], workdir: str, base_url: str, backend: str, reps: int) -> list[Case]:
+    csv_path = os.path.join(workdir, 'sheet.csv')
+    datasets.write_csv(csv_path, items)
+    db.google_sheet_url = f'{base_url}/sheet.csv'
+    with contextlib.redirect_stdout(io.StringIO()):
+        db.sync_from_google_sheet()   # store the validators
+
+    def forget_validators(i):
+        db.delete_setting('sheet_etag')
+        db.delete_setting('sheet_last_modified')
+
+    def change_some(i):
+        datasets.write_csv(csv_path, items, changed=0.01, seed=i + 1)
+        datasets.touch(csv_path, i + 1)
+
+    empty = []
+
+    def empty_db(i):
+        if empty:
+            empty.pop().close()
+        fresh = MentatDB(_open(backend, os.path.join(workdir, f'empty{i}')), write_behind_ms=0)
+        fresh.google_sheet_url = db.google_sheet_url
+        empty.append(fresh)
+
+    return [
+        Case('sheet.initial', lambda i: empty[-1].sync_from_google_sheet(), max(3, reps // 50), empty_db),
+        Case('sheet.not_modified', lambda i: db.sync_from_google_sheet(), max(5, reps // 20)),
+        Case('sheet.unchanged', lambda i: db.sync_from_google_sheet(), max(3, reps // 50), forget_validators),
+        Case('sheet.changed_1pct', lambda i: db.sync_from_google_sheet(), max(3, reps // 50), change_some),
+    ]
+
+
+# ─── cogs: autocomplete and report rendering ────────────────
+class _Channel:
+    """Just enough of a TextChannel for _post_single: sends succeed and are counted."""
+
+    def __init__(self, guild_id: int, channel_id: int):
+        self.guild, self.id, self.sent = SimpleNamespace(id=guild_id), channel_id, 0
+
+    async def send(self, **content):
+        self.sent += 1
+        return SimpleNamespace(id=8 * 10 ** 12 + self.sent)
+
+
+def cog_cases(adb: AsyncMentatDB, db: MentatDB, reps: int) -> list[Case]:
+    # imported here: the cogs pull in discord, which the DB cases do not need
+    from src.cogs.advisor_cog import AdvisorCog, DemandView, _fingerprint
+    from src.cogs.mission_cog import timezone_autocomplete
+
+    cog = AdvisorCog(SimpleNamespace(db_handler=adb))
+    live = db.get_all_by_demand(['high', 'medium'], BENCH_GUILD)
+    channel = _Channel(BENCH_GUILD, REPORT_CHANNEL + BENCH_GUILD)
+
+    def ac_ctx(query):
+        return SimpleNamespace(value=query, interaction=SimpleNamespace(guild_id=BENCH_GUILD))
+
+    async def build(i):
+        item = live[i % len(live)]
+        embed = await cog._build_embed(item, BENCH_GUILD)
+        _fingerprint(embed)
+        DemandView(item, adb)
+
+    async def post(i):
+        await cog._post_single(channel, live[i % len(live)]['id'])
+
+    return [
+        Case('cog.resource_autocomplete', lambda i: cog._ac(ac_ctx(QUERIES[i % len(QUERIES)])), reps),
+        Case('cog.timezone_autocomplete', lambda i: timezone_autocomplete(ac_ctx(TZ_QUERIES[i % len(TZ_QUERIES)])), reps),
+        Case('cog.build_embed', build, reps),
+        # distinct items with no registered post: each one is a fresh send
+        Case('cog.post_single', post, min(reps, len(live))),
+    ]
+
+
+# ─── runner ─────────────────────────────────────────────────
+async def run_size(n: int, args) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir, datasets.serve_directory(workdir) as base_url:
+        storage = _open(args.backend, os.path.join(workdir, 'db'))
+        items = datasets.populate(storage, n, args.missions, args.users)
+        log = DemandLog.beside(storage)
+        for ts, gid, rid, level, uid in datasets.demand_history(items):
+            log.append(gid, rid, level, uid, ts)
+        db = MentatDB(storage, write_behind_ms=args.write_behind_ms, demand_log=log)
+        adb = AsyncMentatDB(db)
+        cases = db_cases(db, items, args.reps)
+        if missing := uncovered(cases):
+            print(f"  no benchmark for MentatDB.{', MentatDB.'.join(missing)}")
+        cases += cog_cases(adb, db, args.reps)
+        cases += sheet_cases(db, items, workdir, base_url, args.backend, args.reps)
+        for case in cases:
+            if args.only and not any(s in case.name for s in args.only):
+                continue
+            results[f'{case.name}[{n}]'] = r = await case.run()
+            print(f"  {case.name:<34} median {r['median_us']:>11.1f} µs   p95 {r['p95_us']:>11.1f} µs   n={r['n']}")
+        await adb.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_us: float) -> list[str]:
+    """Cases slower than the baseline by more than `threshold` (and `min_delta_us`).
+
+    Both the median and the fastest run must be slower: a noisy neighbour moves the median,
+    a real regression moves both.
+    """
+    regressions = []
+    for name, base in sorted(baseline.items()):
+        now = results.get(name)
+        if now is None:
+            continue
+        delta = now['median_us'] - base['median_us']
+        if delta > min_delta_us and all(now[k] > base[k] * (1 + threshold) for k in ('median_us', 'min_us')):
+            regressions.append(f"{name}: {base['median_us']:.1f} → {now['median_us']:.1f} µs "
+                               f"(+{100 * delta / base['median_us']:.0f}%)")
+    return regressions
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog='python -m bench.run', description=__doc__.split('\n\n')[0])
+    p.add_argument('--resources', default='1000,10000,50000', help='comma-separated catalogue sizes')
+    p.add_argument('--missions', type=int, default=10_000)
+    p.add_argument('--users', type=int, default=100_000)
+    p.add_argument('--reps', type=int, default=200, help='repetitions of the cheap operations')
+    p.add_argument('--backend', choices=('sqlite', 'tinydb'), default='sqlite')
+    p.add_argument('--write-behind-ms', type=int, default=0)
+    p.add_argument('--only', action='append', help='run only cases whose name contains this (repeatable)')
+    p.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    p.add_argument('--compare', metavar='PATH', help='flag regressions against a saved baseline')
+    p.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, as a fraction')
+    p.add_argument('--min-delta-us', type=float, default=5.0, help='ignore slowdowns smaller than this')
+    return p.parse_args(argv)
+
+
+async def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = {}
+    for n in (int(s) for s in args.resources.split(',')):
+        print(f"{n} resources, {args.missions} missions, {args.users} users ({args.backend}):")
+        results.update(await run_size(n, args))
+
+    if args.save:
+        meta = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                'machine': platform.platform(), 'backend': args.backend, 'reps': args.reps}
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold, args.min_delta_us)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        print(f"{len(regressions)} regression(s) against {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,288 @@
+# ──────────────── bench/simulate.py ────────────────
+"""Replays bursts of user traffic against the real cogs, talking to a fake Discord.
+
+    python -m bench.simulate                           # every scenario, default sizes
+    python -m bench.simulate join_burst --joins 2000   # one scenario, bigger
+    python -m bench.simulate --rate-limit 0.05 --latency-ms 120 --json out.json
+
+Scenarios run the real AdvisorCog / MissionCog, MentatDB (SQLite in a temp dir) and
+OutboundQueue; only Discord is simulated (see fake_discord.py).  Each one reports
+interaction ack latency, API calls by route and lost updates, i.e. state a user would
+see that disagrees with the database once the burst has settled.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import discord
+from bench import datasets
+from bench.datasets import BENCH_GUILD, REPORT_CHANNEL
+from bench.fake_discord import FakeAPI, FakeBot, FakeInteraction
+from src.cogs import mission_cog
+from src.cogs.advisor_cog import AdvisorCog, DemandView
+from src.cogs.mission_cog import MissionCog, MissionView
+from src.core.async_db import AsyncMentatDB
+from src.core.database import MentatDB
+from src.core.outbound import OutboundQueue, Priority
+from src.core.storage import SQLiteStorage
+
+MISSION_CHANNEL = 900
+SETTLE_TIMEOUT = 120   # seconds a scenario may take to drain its queued edits
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(len(ordered) * q) - 1)]
+
+
+class Env:
+    """A populated temp database, a fake Discord and both cogs, wired like main.py wires them."""
+
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.api = FakeAPI(args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_limit,
+                           args.retry_after_ms / 1000, args.seed)
+        storage = SQLiteStorage(os.path.join(workdir, 'sim.sqlite3'))
+        datasets.populate(storage, args.resources, 100, 100)
+        self.db = AsyncMentatDB(MentatDB(storage, write_behind_ms=args.write_behind_ms))
+        self.bot = FakeBot(self.db, OutboundQueue())
+        self.advisor = AdvisorCog(self.bot)
+        self.missions = MissionCog(self.bot)
+        self.bot.add_cog(self.advisor)
+        self.bot.add_cog(self.missions)
+        self.rng = random.Random(args.seed)
+
+    async def settle(self):
+        """Waits until every task the burst started (renders, posts) has finished and the queue is empty."""
+        queue = self.bot.outbound
+        deadline = time.monotonic() + SETTLE_TIMEOUT
+        while time.monotonic() < deadline:
+            busy = asyncio.all_tasks() - {asyncio.current_task()} - set(queue._tasks)
+            if not busy and queue.completed + queue.deduplicated >= queue.submitted:
+                return
+            await asyncio.sleep(0.02)
+        raise TimeoutError("outbound queue did not drain")
+
+    async def close(self):
+        await self.bot.outbound.stop()
+        await self.db.close()
+
+    async def click(self, delay: float, handler, interaction) -> tuple[float, float]:
+        """Runs one component callback after `delay`; returns (ack latency, completion time)."""
+        await asyncio.sleep(delay)
+        interaction.created_at = time.perf_counter()
+        await handler(interaction)
+        done = time.perf_counter()
+        acked = interaction.acked_at or done
+        return acked - interaction.created_at, done - interaction.created_at
+
+    def arrivals(self, n: int) -> list[float]:
+        return sorted(self.rng.uniform(0, self.args.spread) for _ in range(n))
+
+    def result(self, name: str, started: float, latencies=(), extra=None) -> dict:
+        ack = [a for a, _ in latencies]
+        total = [t for _, t in latencies]
+        out = {'scenario': name, 'wall_s': time.perf_counter() - started, 'requests': len(latencies),
+               'ack_p50_ms': 1000 * percentile(ack, 0.5), 'ack_p99_ms': 1000 * percentile(ack, 0.99),
+               'done_p50_ms': 1000 * percentile(total, 0.5), 'done_p99_ms': 1000 * percentile(total, 0.99),
+               'api_calls': self.api.total, 'rate_limited': sum(self.api.rate_limited.values()),
+               'api_by_route': dict(self.api.calls.most_common()), 'lost_updates': 0}
+        out.update(extra or {})
+        return out
+
+
+def _demand_shown(message) -> str | None:
+    if not message.shown:
+        return None
+    match = re.search(r"\*\*Demand:\*\* (\w+)", message.shown[0].get('description', ''))
+    return match.group(1).lower() if match else None
+
+
+# ─── scenarios ──────────────────────────────────────────────
+async def join_burst(env: Env) -> dict:
+    """N users click Join on one mission post at once; the roster must end up complete."""
+    n, creator = env.args.joins, 7
+    channel = env.bot.channel(env.api, BENCH_GUILD, MISSION_CHANNEL)
+    embed = discord.Embed(title="🚀 New Mission", description="Spice run")
+    embed.add_field(name="​", value="​", inline=False)
+    embed.add_field(name="🕰️ Commencement", value="<t:1800000000:F>", inline=False)
+    embed.add_field(name=" operatives", value=f"<@{creator}>", inline=False)
+    message = await channel.send(embed=embed)
+    await env.db.create_mission(message.id, message.id, channel.id, creator, "Spice run",
+                                "2027-01-15T10:00:00+00:00", BENCH_GUILD)
+    view = MissionView(message.id, env.db, env.missions.scheduler)   # one persistent view serves every click
+    env.api.calls.clear()
+
+    started = time.perf_counter()
+    users = range(1000, 1000 + n)
+    latencies = await asyncio.gather(*(env.click(d, view.join_button.callback, FakeInteraction(env.bot, channel, u, message))
+                                       for d, u in zip(env.arrivals(n), users)))
+    await env.settle()
+
+    stored = set((await env.db.get_mission(message.id))['participants'])
+    shown = {int(u) for u in re.findall(r"<@(\d+)>", message.shown[0]['fields'][2]['value'])}
+    expected = {creator, *users}
+    return env.result('join_burst', started, latencies, {
+        'lost_updates': len(expected - stored) + len(stored ^ shown),
+        'roster_stored': len(stored), 'roster_shown': len(shown), 'message_edits': message.edits})
+
+
+async def demand_burst(env: Env) -> dict:
+    """N demand changes through the report posts' selects; every post must show the final demand."""
+    n = env.args.demand_changes
+    channel = env.bot.channel(env.api, BENCH_GUILD, REPORT_CHANNEL + BENCH_GUILD)
+    await env.advisor.post_demand_report(channel)
+    await env.settle()
+    items = (await env.db.get_all_by_demand(['high', 'medium'], BENCH_GUILD))[:max(1, n // 5)]
+    selects = {it['id']: DemandView(it, env.db).children[0] for it in items}
+    env.api.calls.clear()
+
+    async def pick(inter, select, level):
+        select._selected_values, select._interaction = [level], inter
+        await select.callback(inter)
+
+    started = time.perf_counter()
+    clicks = []
+    for d in env.arrivals(n):
+        rid, level = env.rng.choice(list(selects)), env.rng.choice(('high', 'medium', 'low'))
+        inter = FakeInteraction(env.bot, channel, env.rng.randint(1, 10 ** 6),
+                                data={'custom_id': selects[rid].custom_id, 'values': [level]})
+        clicks.append(env.click(d, lambda i, s=selects[rid], lv=level: pick(i, s, lv), inter))
+    latencies = await asyncio.gather(*clicks)
+    await env.settle()
+
+    # what the channel shows, per item: live posts by title
+    names = {rid: (await env.db.get_resource(rid, BENCH_GUILD)) for rid in selects}
+    shown: dict[str, list] = {}
+    for message in channel.live():
+        if message.shown:
+            shown.setdefault(message.shown[0].get('title'), []).append(message)
+    problems = {'missing': 0, 'stale': 0, 'orphaned': 0, 'duplicated': 0}
+    for rid, item in names.items():
+        posts = shown.get(item['name'], [])
+        problems['duplicated'] += len(posts) > 1
+        if item['demand'] == 'low':
+            problems['orphaned'] += bool(posts)
+        elif not posts:
+            problems['missing'] += 1
+        elif any(_demand_shown(m) != item['demand'] for m in posts):
+            problems['stale'] += 1
+    return env.result('demand_burst', started, latencies,
+                      {'lost_updates': sum(problems.values()), 'items': len(selects), **problems})
+
+
+async def rebuild_during_autocomplete(env: Env) -> dict:
+    """Autocomplete traffic while a full report rebuild floods the channel; autocomplete must stay fast."""
+    n = env.args.autocompletes
+    channel = env.bot.channel(env.api, BENCH_GUILD, REPORT_CHANNEL + BENCH_GUILD)
+    queries = ('sp', 'spice', 'plast', 'mk1', 'engine', 'rotor h', 'stil')
+
+    async def autocomplete(inter):
+        ctx = type('Ctx', (), {'value': env.rng.choice(queries), 'interaction': inter})
+        await env.advisor._ac(ctx)
+        # the library answers autocomplete itself, straight to Discord (retrying 429s), not via the queue
+        while True:
+            try:
+                await env.api.call('POST /interactions/{interaction_id}/{token}/callback')
+                break
+            except discord.HTTPException as e:
+                await asyncio.sleep(e.retry_after)
+        inter.acked_at = time.perf_counter()
+
+    def burst(k):
+        return [env.click(d, autocomplete, FakeInteraction(env.bot, channel, 1000 + i))
+                for i, d in enumerate(env.arrivals(k))]
+
+    quiet = await asyncio.gather(*burst(max(1, n // 4)))
+    env.api.calls.clear()
+    started = time.perf_counter()
+    rebuild = asyncio.create_task(env.advisor.post_demand_report(channel, Priority.BACKGROUND))
+    latencies = await asyncio.gather(*burst(n))
+    await rebuild
+    rebuild_s = time.perf_counter() - started
+    await env.settle()
+
+    live = await env.db.get_all_by_demand(['high', 'medium'], BENCH_GUILD)
+    posted = {r['resource_id'] for r in await env.db.get_report_messages(channel.id, 'single')}
+    return env.result('rebuild_during_autocomplete', started, latencies, {
+        'lost_updates': len({it['id'] for it in live} ^ posted),
+        'quiet_ack_p99_ms': 1000 * percentile([a for a, _ in quiet], 0.99),
+        'rebuild_s': rebuild_s, 'posts': len(posted)})
+
+
+SCENARIOS = {f.__name__: f for f in (join_burst, demand_burst, rebuild_during_autocomplete)}
+
+
+# ─── runner ─────────────────────────────────────────────────
+def print_result(r: dict):
+    print(f"{r['scenario']}: {r['requests']} requests in {r['wall_s']:.2f} s")
+    print(f"  ack latency   p50 {r['ack_p50_ms']:8.1f} ms   p99 {r['ack_p99_ms']:8.1f} ms")
+    print(f"  completion    p50 {r['done_p50_ms']:8.1f} ms   p99 {r['done_p99_ms']:8.1f} ms")
+    print(f"  API calls     {r['api_calls']} ({r['rate_limited']} answered 429)")
+    for route, n in r['api_by_route'].items():
+        print(f"    {n:>6}  {route}")
+    extras = {k: v for k, v in r.items() if k not in
+              {'scenario', 'wall_s', 'requests', 'ack_p50_ms', 'ack_p99_ms', 'done_p50_ms', 'done_p99_ms',
+               'api_calls', 'rate_limited', 'api_by_route', 'lost_updates'}}
+    if extras:
+        print("  " + ", ".join(f"{k} {v:.2f}" if isinstance(v, float) else f"{k} {v}" for k, v in extras.items()))
+    print(f"  lost updates  {r['lost_updates']}")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(prog='python -m bench.simulate', description=__doc__.split('\n\n')[0])
+    p.add_argument('scenarios', nargs='*', choices=[[]] + list(SCENARIOS), default=[],
+                   help='scenarios to run (default: all)')
+    p.add_argument('--joins', type=int, default=500)
+    p.add_argument('--demand-changes', type=int, default=200)
+    p.add_argument('--autocompletes', type=int, default=300)
+    p.add_argument('--resources', type=int, default=1000)
+    p.add_argument('--spread', type=float, default=1.0, help='seconds over which a burst arrives')
+    p.add_argument('--latency-ms', type=float, default=50)
+    p.add_argument('--jitter-ms', type=float, default=30)
+    p.add_argument('--rate-limit', type=float, default=0.01, help='chance any API call answers 429')
+    p.add_argument('--retry-after-ms', type=float, default=50)
+    p.add_argument('--write-behind-ms', type=int, default=0)
+    p.add_argument('--debounce', type=float, help='override the mission roster render debounce (seconds)')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--json', metavar='PATH', help='also write the results as JSON')
+    p.add_argument('--quiet', action='store_true', help='print nothing; for use from code')
+    return p.parse_args(argv)
+
+
+async def main(argv=None) -> list[dict]:
+    args = parse_args(argv)
+    if args.debounce is not None:
+        mission_cog.RENDER_DEBOUNCE_SECONDS = args.debounce
+    results = []
+    for name in args.scenarios or SCENARIOS:
+        with tempfile.TemporaryDirectory() as workdir:
+            env = Env(args, workdir)
+            try:
+                # the cogs' own progress prints would bury the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = await SCENARIOS[name](env)
+            finally:
+                await env.close()
+        results.append(result)
+        if not args.quiet:
+            print_result(result)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+    return results
+
+
+if __name__ == '__main__':
+    sys.exit(1 if any(r['lost_updates'] for r in asyncio.run(main())) else 0)
@@ -1,69 +1,94 @@
 # ──────────────── src/cogs/advisor_cog.py ────────────────
-import random, textwrap, discord
-from discord.ext import commands, tasks
+import asyncio, hashlib, json, random, textwrap, time, discord
+from collections import Counter
+from discord.ext import commands
 from discord.commands import SlashCommandGroup
+from src.core.bulk_demand import MAX_CSV_BYTES, parse_csv, plan, select
+from src.core.digest import GROUPINGS, assign_slots, slot_group, slot_members
+from src.core.metrics import metrics, timed
+from src.core.outbound import Priority, interaction_bucket, send
+from src.core.tracing import span
+from src.core.votes import HALF_LIFE_HOURS
+
+BULK_DELETE_LIMIT = 100   # Discord's cap per bulk-delete request
+COMPACT_INTERVAL = 24 * 3600   # seconds between demand-log compactions
+TRENDS_TOP = 10
+BULK_PREVIEW_LINES = 25   # diff lines shown before "…and N more"
 
 # ────────────────────── Mentat quips ──────────────────────
-def _quip() -> str:
-    lines = [
-        "“Plans within plans, Baron.”",
-        "“The spice must flow — and so must the supplies.”",
-        "“Echoes of the Dune hears the whispers of Arrakis.”",
-        "“Efficiency is the best form of terror.”",
-        "“Harkonnen profits favour the prepared.”",
-        "“Statistics predict victory when stockpiles endure.”",
-        "“Calculations confirm: fear sharpens loyalty.”",
-        "“Fear delivers results the ledger can respect.”",
-        "“A single mis-count is a silent betrayal.”",
-        "“Logistics is the whip; demand is the scream.”",
-        "“Deserts keep no secrets from a patient mind.”",
-        "“Our figures walk ahead of us, scouting profit.”",
-        "“Echo patterns confirm: rivals drown in their own audits.”",
-        "“Precision today prevents bloodshed tomorrow… theirs, preferably.”",
-        "“Spice intoxicates; mathematics sobers. Combine both.”",
-        "“Where hope falters, quotas prevail.”",
-        "“Mentat prognosis: opportunists perish, strategists inherit.”",
-        "“An empty silo is an invitation to rebellion.”",
-        "“Baron, the court obeys whomever commands the caravans.”",
-        "“Data without brutality is merely trivia.”",
-        "“Sand and numbers shift, but we steer both.”",
-        "“Excess melange is inelegant—sell it, weaponise scarcity.”",
-        "“My calculations thirst for their desperation.”",
-        "“Echoes whisper the market’s fear; we shout its price.”",
-        "“We tally corpses as readily as credits.”",
-        "“Probability kneels before meticulous cruelty.”",
-        "“A mentat remembers: profit is the Baron’s mercy.”",
-        "“Opponents misplace crates; we misplace opponents.”",
-        "“Scarcity is the slowest yet surest assassin.”",
-        "“Strength lies in stockpiles, not slogans.”",
-        "“An audit can slice deeper than a crysknife.”",
-        "“Spreadsheets reveal what spies conceal.”",
-        "“Our silence is worth more than their screams.”",
-        "“House Harkonnen: where data is sharpened into dread.”",
-        "“The desert punishes the sloppy; we merely expedite.”",
-        "“Balance sheets foretell sieges better than oracles.”",
-        "“In chaos we calculate; in order we collect.”",
-        "“Waste is treason against the Baron’s coffers.”",
-        "“Fortunes are fermented in well-guarded warehouses.”",
-        "“Failures are just numbers waiting to be rounded down.”",
-        "“Echoes report: hope depreciates faster than spice.”",
-        "“A full depot sings louder than any bard.”",
-        "“Mercy was omitted from the quarterly forecast.”",
-        "“Audit complete: fear index within profitable range.”",
-        "“Every ration withheld is leverage gained.”",
-        "“Consensus is inefficient; precision is absolute.”",
-        "“Mentats calculate — sandworms corroborate.”",
-        "“House Atreides counts dreams; we count dividends.”",
-        "“A shortage for them is an advantage for us.”",
-        "“Baron, excess pity devalues the share price.”",
-        "“The dune is indifferent; we are not.”",
-        "“Extrapolation confirms: victory by attrition and arithmetic.”",
-        "“Spice, statistics, supremacy — the triple sibilant of success.”",
-        "“Disloyalty is a rounding error we refuse to carry.”",
-    ]
-    return random.choice(lines)
+QUIPS = (
+    "“Plans within plans, Baron.”",
+    "“The spice must flow — and so must the supplies.”",
+    "“Echoes of the Dune hears the whispers of Arrakis.”",
+    "“Efficiency is the best form of terror.”",
+    "“Harkonnen profits favour the prepared.”",
+    "“Statistics predict victory when stockpiles endure.”",
+    "“Calculations confirm: fear sharpens loyalty.”",
+    "“Fear delivers results the ledger can respect.”",
+    "“A single mis-count is a silent betrayal.”",
+    "“Logistics is the whip; demand is the scream.”",
+    "“Deserts keep no secrets from a patient mind.”",
+    "“Our figures walk ahead of us, scouting profit.”",
+    "“Echo patterns confirm: rivals drown in their own audits.”",
+    "“Precision today prevents bloodshed tomorrow… theirs, preferably.”",
+    "“Spice intoxicates; mathematics sobers. Combine both.”",
+    "“Where hope falters, quotas prevail.”",
+    "“Mentat prognosis: opportunists perish, strategists inherit.”",
+    "“An empty silo is an invitation to rebellion.”",
+    "“Baron, the court obeys whomever commands the caravans.”",
+    "“Data without brutality is merely trivia.”",
+    "“Sand and numbers shift, but we steer both.”",
+    "“Excess melange is inelegant—sell it, weaponise scarcity.”",
+    "“My calculations thirst for their desperation.”",
+    "“Echoes whisper the market’s fear; we shout its price.”",
+    "“We tally corpses as readily as credits.”",
+    "“Probability kneels before meticulous cruelty.”",
+    "“A mentat remembers: profit is the Baron’s mercy.”",
+    "“Opponents misplace crates; we misplace opponents.”",
+    "“Scarcity is the slowest yet surest assassin.”",
+    "“Strength lies in stockpiles, not slogans.”",
+    "“An audit can slice deeper than a crysknife.”",
+    "“Spreadsheets reveal what spies conceal.”",
+    "“Our silence is worth more than their screams.”",
+    "“House Harkonnen: where data is sharpened into dread.”",
+    "“The desert punishes the sloppy; we merely expedite.”",
+    "“Balance sheets foretell sieges better than oracles.”",
+    "“In chaos we calculate; in order we collect.”",
+    "“Waste is treason against the Baron’s coffers.”",
+    "“Fortunes are fermented in well-guarded warehouses.”",
+    "“Failures are just numbers waiting to be rounded down.”",
+    "“Echoes report: hope depreciates faster than spice.”",
+    "“A full depot sings louder than any bard.”",
+    "“Mercy was omitted from the quarterly forecast.”",
+    "“Audit complete: fear index within profitable range.”",
+    "“Every ration withheld is leverage gained.”",
+    "“Consensus is inefficient; precision is absolute.”",
+    "“Mentats calculate — sandworms corroborate.”",
+    "“House Atreides counts dreams; we count dividends.”",
+    "“A shortage for them is an advantage for us.”",
+    "“Baron, excess pity devalues the share price.”",
+    "“The dune is indifferent; we are not.”",
+    "“Extrapolation confirms: victory by attrition and arithmetic.”",
+    "“Spice, statistics, supremacy — the triple sibilant of success.”",
+    "“Disloyalty is a rounding error we refuse to carry.”",
+)
+
+def _quip(seed=None) -> str:
+    """A Mentat line; the same `seed` always picks the same line."""
+    return random.Random(seed).choice(QUIPS) if seed is not None else random.choice(QUIPS)
+
+def _fingerprint(*embeds: discord.Embed) -> str:
+    """Content hash of rendered report embeds, used to skip no-op edits."""
+    return hashlib.sha1(json.dumps([e.to_dict() for e in embeds], sort_keys=True).encode()).hexdigest()
+
+def _where(channel) -> tuple[int, int]:
+    """(guild_id, channel_id) of a report channel; registry rows are keyed by both."""
+    guild = getattr(channel, "guild", None)
+    return (guild.id if guild else 0), channel.id
 
 # ────────────────────── View & Select ──────────────────────
+# custom_ids carry the state a callback needs ("demand_<resource id>", "digest_<slot>"), so
+# after a restart one registered view per id answers every message that shows it.
 class DemandView(discord.ui.View):
     def __init__(self, item: dict, db):
         super().__init__(timeout=None)
@@ -71,7 +96,7 @@ class DemandView(discord.ui.View):
 
 class DemandSelect(discord.ui.Select):
     def __init__(self, item: dict, db):
-        self.item, self.db = item, db
+        self.db = db
         options = [
             discord.SelectOption(label="🔥 High",   value="high"),
             discord.SelectOption(label="🟠 Medium", value="medium"),
@@ -83,70 +108,332 @@ class DemandSelect(discord.ui.Select):
             custom_id=f"demand_{item['id']}"
         )
 
+    @timed("mentat_component_seconds", component="demand_select")
     async def callback(self, inter: discord.Interaction):
-        lvl = self.values[0]
-        self.db.set_demand(self.item["id"], lvl)
-        await inter.response.send_message(
-            f"**{self.item['name']}** demand set to **{lvl}**.",
-            ephemeral=True,
-        )
+        lvl, item_id, gid = self.values[0], self.custom_id[len("demand_"):], inter.guild_id or 0
+        item = await self.db.get_resource(item_id, gid)
+        changed = bool(item)
+        if not item:
+            content = "This item no longer exists."
+        elif await self.db.get_setting("demand_mode", gid) == "vote":
+            vote = await self.db.cast_vote(item_id, lvl, gid, inter.user.id)
+            if vote is None:
+                content, changed = "This item no longer exists.", False
+            else:
+                # the post only changes when the tally crosses a threshold
+                changed = vote["changed"]
+                content = (f"Your vote for **{item['name']}**: **{lvl}**. "
+                           f"Demand is **{vote['level']}** (score {vote['score']:.1f}).")
+        elif not await self.db.set_demand(item_id, lvl, gid, inter.user.id):
+            content, changed = "This item no longer exists.", False
+        else:
+            content = f"**{item['name']}** demand set to **{lvl}**."
+        await send(inter.client, lambda: inter.response.send_message(content, ephemeral=True),
+                   Priority.INTERACTION, interaction_bucket(inter))
         cog = inter.client.get_cog("AdvisorCog")
-        if cog:
-            await cog._post_single(inter.channel, self.item["id"])
+        if cog and changed:
+            await cog._post_single(inter.channel, item_id)
+
+class DigestView(discord.ui.View):
+    """One select per digest message; picking an item opens its demand select privately."""
+    def __init__(self, slot: str, items: list[dict], db):
+        super().__init__(timeout=None)
+        self.add_item(DigestSelect(slot, items, db))
+
+class DigestSelect(discord.ui.Select):
+    def __init__(self, slot: str, items: list[dict], db):
+        self.db = db
+        options = [discord.SelectOption(label=f"{it['name']} (T{it['tier']})", value=it["id"],
+                                        description=f"Demand: {it['demand'].capitalize()}")
+                   for it in items]
+        super().__init__(placeholder="Change demand for…", options=options, custom_id=f"digest_{slot}")
+
+    @timed("mentat_component_seconds", component="digest_select")
+    async def callback(self, inter: discord.Interaction):
+        item = await self.db.get_resource(self.values[0], inter.guild_id or 0)
+        if not item:
+            content, view = "This item no longer exists.", None
+        else:
+            content, view = f"Set demand for **{item['name']}**:", DemandView(item, self.db)
+        await send(inter.client, lambda: inter.response.send_message(content, view=view, ephemeral=True),
+                   Priority.INTERACTION, interaction_bucket(inter))
+
+class BulkDemandView(discord.ui.View):
+    """Apply / Cancel under a /demand bulk preview; the targets live only in this ephemeral reply."""
+    def __init__(self, db, guild_id: int, targets: dict[str, str]):
+        super().__init__(timeout=900)
+        self.db, self.guild_id, self.targets = db, guild_id, targets
+        self.done = False
+
+    @discord.ui.button(label="Apply", style=discord.ButtonStyle.success)
+    @timed("mentat_component_seconds", component="bulk_apply")
+    async def apply_button(self, button: discord.ui.Button, inter: discord.Interaction):
+        if self.done:
+            return
+        self.done = True
+        self.stop()
+        changed = await self.db.set_demand_many(self.targets, self.guild_id, inter.user.id)
+        content = f"Applied **{len(changed)}** demand change{'s' if len(changed) != 1 else ''}."
+        await send(inter.client, lambda: inter.response.edit_message(content=content, embed=None, view=None),
+                   Priority.INTERACTION, interaction_bucket(inter))
+        cog = inter.client.get_cog("AdvisorCog")
+        if cog and changed:
+            await cog.refresh_report(self.guild_id)
+
+    @discord.ui.button(label="Cancel", style=discord.ButtonStyle.danger)
+    @timed("mentat_component_seconds", component="bulk_cancel")
+    async def cancel_button(self, button: discord.ui.Button, inter: discord.Interaction):
+        self.done = True
+        self.stop()
+        await send(inter.client, lambda: inter.response.edit_message(content="Bulk change cancelled.", embed=None, view=None),
+                   Priority.INTERACTION, interaction_bucket(inter))
 
 # ──────────────────────────── COG ────────────────────────────
 class AdvisorCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot, self.db = bot, bot.db_handler
+        self.interval = 30 * 60
+        self._loops: list[asyncio.Task] = []
+        self._primed: set[int] = set()           # guilds whose posts were fingerprinted since start-up
+        self._last_bucket: dict[int, int] = {}   # guild id -> quip bucket of its current footers
+        self._pending = Counter()                # post key -> jobs queued or running for it
+        self._post_locks: dict[tuple, asyncio.Lock] = {}
 
     # slash-command groups
     report = SlashCommandGroup("report", "Demand-report commands")
     demand = SlashCommandGroup("demand", "Manual demand override")
 
-    # ─── scheduler ────────────────────────────────────────────
-    @tasks.loop(minutes=30)
-    async def report_loop(self):
-        cid = self.db.get_setting("report_channel_id")
-        chan = self.bot.get_channel(cid) if cid else None
-        if isinstance(chan, discord.TextChannel):
-            await self.post_demand_report(chan)
+    # ─── warm restart ─────────────────────────────────────────
+    async def rehydrate_views(self) -> int:
+        """Re-registers the views of every registered report post; no Discord API calls."""
+        guilds = {}   # guild id -> (items, digest slots)
+        count = 0
+        for row in await self.db.get_report_messages():
+            gid = row["guild_id"]
+            if gid not in guilds:
+                guilds[gid] = ({it["id"]: it for it in await self.db.get_all_resources(gid)},
+                               {k[len("dslot_"):]: v for k, v in (await self.db.get_settings_with_prefix("dslot_", gid)).items()})
+            items, assigned = guilds[gid]
+            if row["kind"] == "digest":
+                slot = row["resource_id"][len("digest:"):]
+                members = [items[r] for r in slot_members(assigned, slot) if r in items]
+                view = DigestView(slot, members, self.db)
+            elif row["resource_id"] in items:
+                view = DemandView(items[row["resource_id"]], self.db)
+            else:
+                continue
+            self.bot.add_view(view)
+            count += 1
+        return count
 
-    # ─── rebuild all high/medium posts ───────────────────────
-    async def post_demand_report(self, channel: discord.TextChannel):
-        items = self.db.get_all_by_demand(["high", "medium"])
-        if not items:
-            # purge any orphan messages
-            for s in list(self.db.settings_table):
-                if s["key"].startswith("msg_"):
-                    try:
-                        m = await channel.fetch_message(int(s["value"]))
-                        await m.delete()
-                    except Exception:
-                        pass
-                    self.db.settings_table.remove(self.db.Setting.key == s["key"])
+    # ─── scheduler ────────────────────────────────────────────
+    def start_report_loops(self, minutes: float):
+        """One report loop per shard, each offset by its share of the interval."""
+        if self._loops:
             return
-        for it in items:
-            await self._post_single(channel, it["id"])
+        self.interval = minutes * 60
+        shards = self.bot.shard_count or 1
+        self._loops = [asyncio.create_task(self._shard_loop(shard, shards)) for shard in range(shards)]
+        self._loops.append(asyncio.create_task(self._compact_loop()))
 
-    # ─── one embed per resource ───────────────────────────────
-    async def _post_single(self, channel, item_id: str):
-        item = self.db.get_resource(item_id)
-        key = f"msg_{item_id}"
-
-        if not item or item["demand"] == "low":
-            # delete & forget
-            mid = self.db.get_setting(key)
-            if mid:
+    def cog_unload(self):
+        for task in self._loops:
+            task.cancel()
+
+    async def _compact_loop(self):
+        # bot-wide, not per shard: the demand log is one file
+        while True:
+            try:
+                if folded := await self.db.compact_demand_log():
+                    print(f"Compacted {folded} demand log records into daily totals.")
+            except Exception as e:
+                print(f"--- DEMAND LOG COMPACTION ERROR: {e}")
+            await asyncio.sleep(COMPACT_INTERVAL)
+
+    async def _report_channels(self, shard: int, shards: int) -> list[discord.TextChannel]:
+        channels = []
+        for gid, cid in (await self.db.get_report_channels()).items():
+            # Discord's shard formula: the guild's creation timestamp bits modulo the shard count
+            if (gid >> 22) % shards != shard:
+                continue
+            chan = self.bot.get_channel(cid)
+            if isinstance(chan, discord.TextChannel):
+                channels.append(chan)
+        return channels
+
+    async def _shard_loop(self, shard: int, shards: int):
+        # shards start staggered across the interval, and a shard spreads its guilds over its slice,
+        # so no two guilds' rebuilds land in the same second
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(self.interval * shard / shards)
+        while True:
+            started = loop.time()
+            try:
+                channels = await self._report_channels(shard, shards)
+            except Exception as e:
+                # a transient failure skips this round; the loop itself must keep running
+                print(f"--- REPORT LOOP ERROR (shard {shard}): {e}")
+                channels = []
+            step = self.interval / shards / max(len(channels), 1)
+            for i, chan in enumerate(channels):
+                await asyncio.sleep(max(0.0, started + i * step - loop.time()))
                 try:
-                    m = await channel.fetch_message(int(mid)); await m.delete()
-                except Exception:
-                    pass
-                self.db.settings_table.remove(self.db.Setting.key == key)
+                    with metrics.time("mentat_report_cycle_seconds", shard=shard):
+                        await self.report_cycle(chan)
+                except Exception as e:
+                    print(f"--- REPORT LOOP ERROR (guild {chan.guild.id}): {e}")
+            await asyncio.sleep(max(0.0, started + self.interval - loop.time()))
+
+    async def report_cycle(self, channel: discord.TextChannel):
+        gid = _where(channel)[0]
+        if gid not in self._primed:
+            # first cycle after start-up: fingerprint everything once
+            await self.db.drain_dirty_resources(gid)
+            self._last_bucket[gid] = await self._quip_bucket(gid)
+            await self.post_demand_report(channel, Priority.BACKGROUND)
+            self._primed.add(gid)
             return
+        if await self.db.get_setting("demand_mode", gid) == "vote":
+            # fading votes can drop an item a level; those land in the change feed
+            await self.db.decay_votes(gid)
+        await self.refresh_changed(channel, Priority.BACKGROUND)
+
+    async def _quip_bucket(self, guild_id: int) -> int:
+        """Footers only rotate when `quip_rotate_minutes` is set; otherwise they stay put."""
+        minutes = await self.db.get_setting("quip_rotate_minutes", guild_id)
+        return int(time.time() // (minutes * 60)) if minutes else 0
+
+    # ─── refresh only what changed ───────────────────────────
+    async def refresh_changed(self, channel: discord.TextChannel, priority=Priority.EDIT):
+        gid = _where(channel)[0]
+        dirty = await self.db.drain_dirty_resources(gid)
+        live = {it["id"] for it in await self.db.get_all_by_demand(["high", "medium"], gid)}
+        bucket = await self._quip_bucket(gid)
+        if bucket != self._last_bucket.get(gid, 0):
+            # footer rotation is due: every live post changes
+            self._last_bucket[gid] = bucket
+            dirty |= live
+        if await self._digest_mode(gid):
+            placed = {k[len("dslot_"):] for k in await self.db.get_settings_with_prefix("dslot_", gid)}
+            return await self._refresh_digest(channel, dirty | (live - placed), priority)
+        posted = {r["resource_id"] for r in await self.db.get_report_messages(channel.id, "single")}
+        dirty |= live - posted
+        results = await asyncio.gather(*(self._post_single(channel, i, priority) for i in dirty),
+                                       return_exceptions=True)
+        failed = [i for i, r in zip(dirty, results) if isinstance(r, discord.HTTPException)]
+        if failed:
+            await self.db.mark_resources_dirty(failed, gid)
+
+    # ─── rebuild all high/medium posts ───────────────────────
+    async def post_demand_report(self, channel: discord.TextChannel, priority=Priority.EDIT):
+        gid = _where(channel)[0]
+        await self.db.adopt_legacy_report_settings(*_where(channel))
+        digest = await self._digest_mode(gid)
+        # purge any orphan messages, including those of the report mode not in use
+        items = await self.db.get_all_by_demand(["high", "medium"], gid)
+        if not items or digest:
+            await self._purge(channel, "single")
+        if not items or not digest:
+            await self._purge(channel, "digest")
+            for key in await self.db.get_settings_with_prefix("dslot_", gid):
+                await self.db.delete_setting(key, gid)
+        if digest:
+            return await self._refresh_digest(channel, None, priority)
+        # posts run concurrently; the outbound queue bounds parallelism per channel
+        await asyncio.gather(*(self._post_single(channel, it["id"], priority) for it in items))
+
+    async def _purge(self, channel, kind: str):
+        """Deletes every registered post of one kind in the channel, 100 per request."""
+        rows = await self.db.get_report_messages(channel.id, kind)
+        ids = [r["message_id"] for r in rows]
+        try:
+            for i in range(0, len(ids), BULK_DELETE_LIMIT):
+                chunk = ids[i:i + BULK_DELETE_LIMIT]
+                await send(self.bot, lambda chunk=chunk: self._delete_many(channel, chunk),
+                           Priority.BACKGROUND, f"channel:{channel.id}")
+        except discord.HTTPException as e:
+            print(f"--- REPORT PURGE ERROR (channel {channel.id}): {e}")
+        # forgotten either way: rows kept for undeletable posts would only make every purge retry them
+        await self.db.delete_report_messages([(r["guild_id"], r["channel_id"], r["resource_id"]) for r in rows])
 
-        # build embed
+    @staticmethod
+    async def _delete_many(channel, ids: list[int]):
+        try:
+            if len(ids) > 1:
+                return await channel.delete_messages([discord.Object(id=i) for i in ids])
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise
+            # bulk delete refuses posts older than 14 days (or lacks Manage Messages): go one by one
+        for mid in ids:
+            try:
+                await channel.get_partial_message(mid).delete()
+            except discord.NotFound:
+                pass
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    raise
+                print(f"--- REPORT PURGE ERROR (message {mid}): {e}")
+
+    async def _digest_mode(self, guild_id: int) -> bool:
+        return await self.db.get_setting("report_mode", guild_id) == "digest"
+
+    # ─── shared publish / unpublish ──────────────────────────
+    async def _sync_post(self, channel, rkey: str, kind: str, render, route: dict):
+        """Makes one report post match `await render()`: (fingerprint, fields factory), or None for no post.
+
+        The queued job renders again when it runs, one job per post at a time, so the post ends up
+        showing the latest state however clicks, DB reads and the queue interleave.
+        """
+        key = (*_where(channel), rkey)
+        if not self._pending[key]:
+            row = await self.db.get_report_message(*key)
+            with span("render"):
+                rendered = await render()
+            if bool(row) == bool(rendered) and (not row or row["fingerprint"] == rendered[0]):
+                return  # the post already shows exactly this (or there is none, as there should be)
+
+        async def job():
+            async with self._post_locks.setdefault(key, asyncio.Lock()):
+                row = await self.db.get_report_message(*key)
+                with span("render"):
+                    rendered = await render()
+                if rendered is None:
+                    if row:
+                        try:
+                            await channel.get_partial_message(row["message_id"]).delete()
+                        except discord.NotFound:
+                            pass  # already gone
+                        await self.db.delete_report_messages([key])
+                    return
+                fp, fields = rendered
+                if row and fp == row["fingerprint"]:
+                    return
+                if row:
+                    try:
+                        # edit by id: no fetch round-trip; a vanished post surfaces as NotFound
+                        await channel.get_partial_message(row["message_id"]).edit(**fields())
+                        await self.db.set_report_message(*key, row["message_id"], fp, kind)
+                        return
+                    except discord.NotFound:
+                        pass  # deleted: post it afresh below
+                    except discord.Forbidden as e:
+                        # re-posting would fail the same way or orphan the old post; retry later
+                        print(f"--- REPORT EDIT ERROR (message {row['message_id']}): {e}")
+                        raise
+                msg = await channel.send(**fields())
+                await self.db.set_report_message(*key, msg.id, fp, kind)
+
+        self._pending[key] += 1
+        try:
+            # queued jobs for the same post collapse into the newest one
+            await send(self.bot, job, **route)
+        finally:
+            self._pending[key] -= 1
+
+    async def _build_embed(self, item: dict, guild_id: int, width: int = 350, footer: bool = True) -> discord.Embed:
         detail = item.get("details", "").strip()
-        detail = textwrap.shorten(detail, width=350, placeholder=" …") if detail else "—"
+        detail = textwrap.shorten(detail, width=width, placeholder=" …") if detail else "—"
         body = (f"**Demand:** {item['demand'].capitalize()}\n"
                 f"*{item['type']} • Tier {item['tier']}*\n\n"
                 f"{detail}")
@@ -155,50 +442,216 @@ class AdvisorCog(commands.Cog):
         embed = discord.Embed(title=item["name"], url=item["dgt_slug"],
                               description=body, colour=colour)
         if item.get("image_url"): embed.set_thumbnail(url=item["image_url"])
-        embed.set_footer(text=_quip())
+        if footer:
+            embed.set_footer(text=_quip(f"{item['id']}:{await self._quip_bucket(guild_id)}"))
+        return embed
 
-        view = DemandView(item, self.db)
+    # ─── one embed per resource ───────────────────────────────
+    async def _post_single(self, channel, item_id: str, priority=Priority.EDIT):
+        gid = _where(channel)[0]
+        if await self._digest_mode(gid):
+            return await self._refresh_digest(channel, [item_id], priority)
 
-        mid = self.db.get_setting(key)
-        if mid:
-            try:
-                msg = await channel.fetch_message(int(mid))
-                await msg.edit(embed=embed, view=view)
-                return
-            except (discord.NotFound, discord.Forbidden):
-                pass
-        msg = await channel.send(embed=embed, view=view)
-        self.db.set_setting(key, msg.id)
+        route = dict(priority=priority, bucket=f"channel:{channel.id}", dedupe_key=f"report:{channel.id}:{item_id}")
+
+        async def render():
+            item = await self.db.get_resource(item_id, gid)
+            if not item or item["demand"] == "low":
+                return None  # delete & forget
+            embed = await self._build_embed(item, gid)
+            return _fingerprint(embed), lambda: dict(embed=embed, view=DemandView(item, self.db))
+        await self._sync_post(channel, item_id, "single", render, route)
+
+    # ─── digest: up to 10 resources per message ──────────────
+    async def _refresh_digest(self, channel, item_ids=None, priority=Priority.EDIT):
+        """Re-renders the digest messages affected by `item_ids` (all of them by default)."""
+        gid = _where(channel)[0]
+        group_by = await self.db.get_setting("report_group_by", gid) or "demand"
+        live = {it["id"]: it for it in await self.db.get_all_by_demand(["high", "medium"], gid)}
+        assigned = {k[len("dslot_"):]: v for k, v in (await self.db.get_settings_with_prefix("dslot_", gid)).items()}
+        changes, touched = assign_slots(assigned, live, group_by, item_ids)
+        for rid, slot in changes.items():
+            if slot:
+                await self.db.set_setting(f"dslot_{rid}", slot, gid)
+            else:
+                await self.db.delete_setting(f"dslot_{rid}", gid)
+        await asyncio.gather(*(self._post_digest(channel, slot, [live[r] for r in slot_members(assigned, slot)], priority)
+                               for slot in touched))
+
+    async def _post_digest(self, channel, slot: str, items: list[dict], priority=Priority.EDIT):
+        rkey = f"digest:{slot}"
+        route = dict(priority=priority, bucket=f"channel:{channel.id}", dedupe_key=f"digest:{channel.id}:{slot}")
+        gid = _where(channel)[0]
+        items = sorted(items, key=lambda it: it["name"])
+
+        async def render():
+            if not items:
+                return None
+            embeds = [await self._build_embed(it, gid, width=200, footer=False) for it in items]
+            page = int(slot.rsplit(":", 1)[1])
+            group = slot_group(slot)
+            embeds[0].set_author(name=f"Mentat report — {group.capitalize()}" + (f" ({page + 1})" if page else ""))
+            embeds[-1].set_footer(text=_quip(f"{slot}:{await self._quip_bucket(gid)}"))
+            return _fingerprint(*embeds), lambda: dict(embeds=embeds, view=DigestView(slot, items, self.db))
+        await self._sync_post(channel, rkey, "digest", render, route)
+
+    async def refresh_report(self, guild_id: int):
+        """One refresh of the guild's report channel, covering every change since the last one."""
+        cid = await self.db.get_setting("report_channel_id", guild_id)
+        chan = self.bot.get_channel(cid) if cid else None
+        if isinstance(chan, discord.TextChannel):
+            await self.refresh_changed(chan)
 
     # ─── /report commands ────────────────────────────────────
     @report.command(name="start")
     @discord.default_permissions(manage_guild=True)
     async def rep_start(self, ctx):
-        self.db.set_setting("report_channel_id", ctx.channel.id)
-        await ctx.respond("Channel registered for reports.", ephemeral=True)
+        await self.db.set_setting("report_channel_id", ctx.channel.id, ctx.guild_id or 0)
+        await send(self.bot, lambda: ctx.respond("Channel registered for reports.", ephemeral=True),
+                   Priority.INTERACTION, interaction_bucket(ctx.interaction))
         await self.post_demand_report(ctx.channel)
 
     @report.command(name="now")
     async def rep_now(self, ctx):
-        await self.post_demand_report(ctx.channel)
+        await ctx.defer(ephemeral=True)
+        await self.post_demand_report(ctx.channel, Priority.BACKGROUND)
         await ctx.respond("Reports refreshed.", ephemeral=True)
 
+    @report.command(name="mode")
+    @discord.default_permissions(manage_guild=True)
+    async def rep_mode(self, ctx,
+                       mode: discord.Option(str, choices=["single", "digest"]),
+                       group_by: discord.Option(str, choices=list(GROUPINGS), default="demand"),
+                       quip_rotate_minutes: discord.Option(int, "Rotate footer quips this often (0 = never)",
+                                                           min_value=0, max_value=10080, default=None)):
+        gid = ctx.guild_id or 0
+        await self.db.set_setting("report_mode", mode, gid)
+        await self.db.set_setting("report_group_by", group_by, gid)
+        if quip_rotate_minutes:
+            await self.db.set_setting("quip_rotate_minutes", quip_rotate_minutes, gid)
+        elif quip_rotate_minutes == 0:
+            await self.db.delete_setting("quip_rotate_minutes", gid)
+        await ctx.defer(ephemeral=True)
+        # the rebuild renders every footer for the current bucket, so the loop has nothing to catch up
+        self._last_bucket[gid] = await self._quip_bucket(gid)
+        await self.post_demand_report(ctx.channel, Priority.BACKGROUND)
+        suffix = f", grouped by {group_by}" if mode == "digest" else ""
+        if minutes := await self.db.get_setting("quip_rotate_minutes", gid):
+            suffix += f"; quips rotate every {minutes} min"
+        await ctx.respond(f"Report mode set to **{mode}**{suffix}.", ephemeral=True)
+
+    @report.command(name="queue")
+    @discord.default_permissions(manage_guild=True)
+    async def rep_queue(self, ctx):
+        queue = getattr(self.bot, "outbound", None)
+        if queue is None:
+            return await ctx.respond("Outbound queue is not enabled.", ephemeral=True)
+        st = queue.stats()
+        lines = [f"**Submitted:** {st['submitted']} • **Done:** {st['completed']} • "
+                 f"**Deduplicated:** {st['deduplicated']} • **429 retries:** {st['rate_limited']}"]
+        for name, depth in st["depth"].items():
+            w = st["wait"][name]
+            lines.append(f"`{name:<11}` depth {depth} • wait avg {w['avg_ms']:.0f} ms, "
+                         f"p95 {w['p95_ms']:.0f} ms, max {w['max_ms']:.0f} ms")
+        await ctx.respond("\n".join(lines), ephemeral=True)
+
+    @report.command(name="trends", description="Time at high demand and most-changed items")
+    async def rep_trends(self, ctx, days: discord.Option(int, min_value=1, max_value=90, default=7)):
+        rows = await self.db.demand_trends(ctx.guild_id or 0, days)
+        hot = sorted((r for r in rows if r["high_hours"] >= 0.05), key=lambda r: -r["high_hours"])[:TRENDS_TOP]
+        flipped = sorted((r for r in rows if r["flips"]), key=lambda r: -r["flips"])[:TRENDS_TOP]
+        embed = discord.Embed(title=f"Demand trends — last {days} day{'s' if days != 1 else ''}",
+                              colour=discord.Color.dark_orange())
+        embed.add_field(name="🔥 Hours at high demand", inline=False,
+                        value="\n".join(f"**{r['name']}** — {r['high_hours']:.1f} h" for r in hot) or "_None_")
+        embed.add_field(name="🔁 Most-flipped items", inline=False,
+                        value="\n".join(f"**{r['name']}** — {r['flips']} change{'s' if r['flips'] != 1 else ''}"
+                                        for r in flipped) or "_None_")
+        await ctx.respond(embed=embed, ephemeral=True)
+
     # ─── /demand set ──────────────────────────────────────────
     async def _ac(self, ctx: discord.AutocompleteContext):
-        q = ctx.value.lower()
-        items = sorted(self.db.get_all_resources(), key=lambda x: x["name"])
-        return [i["name"] for i in items if q in i["name"].lower()][:25]
+        return await self.db.search_resource_names(ctx.value, guild_id=ctx.interaction.guild_id or 0)
 
     @demand.command(name="set")
     async def demand_set(self, ctx,
                          item: discord.Option(str, autocomplete=_ac),
                          level: discord.Option(str, choices=["high", "medium", "low"])):
-        ent = self.db.resources_table.get(self.db.Resource.name == item)
+        gid = ctx.guild_id or 0
+        ent = await self.db.resolve_resource(item, gid)
         if not ent:
             return await ctx.respond("Item not found.", ephemeral=True)
-        self.db.set_demand(ent["id"], level)
-        await ctx.respond(f"**{item}** demand set to **{level}**.", ephemeral=True)
+        await self.db.set_demand(ent["id"], level, gid, ctx.author.id)
+        await send(self.bot, lambda: ctx.respond(f"**{item}** demand set to **{level}**.", ephemeral=True),
+                   Priority.INTERACTION, interaction_bucket(ctx.interaction))
         await self._post_single(ctx.channel, ent["id"])
 
+    # ─── /demand mode ─────────────────────────────────────────
+    @demand.command(name="mode", description="Let the last click decide, or let members vote")
+    @discord.default_permissions(manage_guild=True)
+    async def demand_mode(self, ctx,
+                          mode: discord.Option(str, choices=["direct", "vote"]),
+                          half_life_hours: discord.Option(float, min_value=1, max_value=24 * 30, required=False,
+                                                          default=None)):
+        gid = ctx.guild_id or 0
+        await self.db.set_setting("demand_mode", mode, gid)
+        if half_life_hours is not None:
+            await self.db.set_setting("vote_half_life_hours", half_life_hours, gid)
+        if mode == "vote":
+            hours = half_life_hours or await self.db.get_setting("vote_half_life_hours", gid) or HALF_LIFE_HOURS
+            content = (f"Demand selects now cast votes; a vote's weight halves every **{hours:g} h**. "
+                       "`/demand set` still overrides directly and clears that item's votes.")
+        else:
+            content = "Demand selects now set the level directly."
+        await ctx.respond(content, ephemeral=True)
+
+    # ─── /demand bulk ─────────────────────────────────────────
+    async def _type_ac(self, ctx: discord.AutocompleteContext):
+        types = {it["type"] for it in await self.db.get_all_resources(ctx.interaction.guild_id or 0) if it.get("type")}
+        return sorted(t for t in types if ctx.value.lower() in t.lower())[:25]
+
+    @demand.command(name="bulk", description="Set many items at once, by filter or from a CSV of item,level lines")
+    @discord.default_permissions(manage_guild=True)
+    async def demand_bulk(self, ctx,
+                          level: discord.Option(str, choices=["high", "medium", "low"], required=False, default=None),
+                          item_type: discord.Option(str, name="type", autocomplete=_type_ac, required=False, default=None),
+                          tier: discord.Option(int, min_value=0, required=False, default=None),
+                          name: discord.Option(str, description="Name pattern, e.g. plast* or fuel",
+                                               required=False, default=None),
+                          file: discord.Option(discord.Attachment, description="CSV of item,level lines",
+                                               required=False, default=None)):
+        gid = ctx.guild_id or 0
+        if file and (level or item_type or tier is not None or name):
+            return await ctx.respond("Use either a CSV file or filters with a level, not both.", ephemeral=True)
+        if not file and (not level or (item_type is None and tier is None and not name)):
+            return await ctx.respond("Pick a level and at least one filter (type, tier or name), "
+                                     "or attach a CSV.", ephemeral=True)
+        if file and file.size > MAX_CSV_BYTES:
+            return await ctx.respond(f"CSV too large (max {MAX_CSV_BYTES // 1024} KB).", ephemeral=True)
+        await ctx.defer(ephemeral=True)
+
+        items, problems = await self.db.get_all_resources(gid), []
+        if file:
+            try:
+                text = (await file.read()).decode("utf-8-sig")
+            except (discord.HTTPException, UnicodeDecodeError) as e:
+                return await ctx.respond(f"Could not read the CSV: {e}", ephemeral=True)
+            targets, problems = parse_csv(text, items)
+        else:
+            targets = {it["id"]: level for it in select(items, item_type, tier, name)}
+        changes = plan(items, targets)
+
+        lines = [f"**{it['name']}**: {old} → **{new}**" for it, old, new in changes[:BULK_PREVIEW_LINES]]
+        if len(changes) > BULK_PREVIEW_LINES:
+            lines.append(f"…and {len(changes) - BULK_PREVIEW_LINES} more")
+        embed = discord.Embed(title=f"Bulk demand change — {len(changes)} item{'s' if len(changes) != 1 else ''}",
+                              description="\n".join(lines) or "Nothing to change.",
+                              colour=discord.Color.dark_orange())
+        if problems:
+            shown = problems[:10] + ([f"…and {len(problems) - 10} more"] if len(problems) > 10 else [])
+            embed.add_field(name="⚠️ Skipped lines", value="\n".join(shown)[:1024], inline=False)
+        view = BulkDemandView(self.db, gid, {it["id"]: new for it, _, new in changes}) if changes else None
+        await ctx.respond(embed=embed, view=view, ephemeral=True)
+
 # required for extension loader
 def setup(bot): bot.add_cog(AdvisorCog(bot))
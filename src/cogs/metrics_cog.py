@@ -0,0 +1,161 @@
+# ──────────────── src/cogs/metrics_cog.py ────────────────
+import asyncio, os, time, discord
+from discord.ext import commands
+from discord.commands import SlashCommandGroup
+from src.core.metrics import instrument_http, metrics, serve, watch_loop_lag
+from src.core.outbound import OutboundQueue
+from src.core.profiler import MAX_SECONDS, SamplingProfiler, profile_path, top_frames, write_folded
+from src.core.storage import DATA_DIR
+from src.core.tracing import tracer
+
+TOP_N = 5   # rows per section in /mentat stats
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms" if seconds < 10 else f"{seconds:.1f} s"
+
+def _label(key: tuple, name: str) -> str:
+    return dict(key).get(name, "?")
+
+
+# ──────────────────────────── COG ────────────────────────────
+class MetricsCog(commands.Cog):
+    """Records command latency and Discord API traffic; serves /metrics and /mentat stats."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.port = int(os.getenv("METRICS_PORT") or 0)
+        self._started: dict[int, float] = {}   # interaction id -> perf_counter at dispatch
+        self._lag_task = None
+        self._server = None
+        self._traces: dict[int, object] = {}   # interaction id -> open trace token
+        self.profiler = None
+        metrics.add_collector(self._collect_outbound)
+        # the hooks run inside the command's own task, so spans it opens land in its trace
+        bot.before_invoke(self._open_trace)
+        bot.after_invoke(self._close_trace)
+
+    mentat = SlashCommandGroup("mentat", "Bot diagnostics")
+
+    # ─── startup ──────────────────────────────────────────────
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not getattr(self.bot.http, "metrics_instrumented", False):
+            instrument_http(self.bot.http)
+            self.bot.http.metrics_instrumented = True
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.create_task(watch_loop_lag())
+        if self.port and self._server is None:
+            try:
+                self._server = await serve(self.port)
+                print(f"Metrics served on http://127.0.0.1:{self.port}/metrics")
+            except OSError as e:
+                print(f"--- METRICS ENDPOINT ERROR: {e}")
+
+    def cog_unload(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+        if self._server:
+            self._server.close()
+
+    def _collect_outbound(self):
+        queue = getattr(self.bot, "outbound", None)
+        if not isinstance(queue, OutboundQueue):
+            return
+        stats = queue.stats()
+        for priority, n in stats["depth"].items():
+            metrics.set("mentat_outbound_depth", n, priority=priority)
+        metrics.set("mentat_outbound_rate_limited", stats["rate_limited"])
+
+    # ─── command latency ──────────────────────────────────────
+    @commands.Cog.listener()
+    async def on_application_command(self, ctx):
+        self._started[ctx.interaction.id] = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_application_command_completion(self, ctx):
+        self._finish(ctx, "ok")
+
+    @commands.Cog.listener()
+    async def on_application_command_error(self, ctx, error):
+        self._finish(ctx, "error")
+
+    async def _open_trace(self, ctx):
+        if token := tracer.open(f"/{ctx.command.qualified_name}"):
+            self._traces[ctx.interaction.id] = token
+
+    async def _close_trace(self, ctx):
+        tracer.close(self._traces.pop(ctx.interaction.id, None))
+
+    def _finish(self, ctx, status: str):
+        started = self._started.pop(ctx.interaction.id, None)
+        if started is not None:
+            metrics.observe("mentat_command_seconds", time.perf_counter() - started,
+                            command=ctx.command.qualified_name, status=status)
+
+    # ─── /mentat stats ───────────────────────────────────────
+    def _section(self, title: str, name: str, label: str) -> list[str]:
+        rows = sorted(metrics.histogram(name).items(), key=lambda kv: kv[1].quantile(0.95), reverse=True)
+        if not rows:
+            return []
+        lines = [f"**{title}** (p50 / p95 / max, calls)"]
+        for key, h in rows[:TOP_N]:
+            lines.append(f"`{_label(key, label)}` — {_ms(h.quantile(0.5))} / {_ms(h.quantile(0.95))}"
+                         f" / {_ms(h.max)}, {h.count}")
+        return lines
+
+    def stats_text(self) -> str:
+        metrics.collect()
+        uptime = int(time.time() - metrics.started)
+        lines = [f"**Uptime:** {uptime // 3600}h {uptime % 3600 // 60}m"]
+        lines += self._section("Slowest commands", "mentat_command_seconds", "command")
+        lines += self._section("Slowest components", "mentat_component_seconds", "component")
+        lines += self._section("Slowest DB calls", "mentat_db_seconds", "method")
+        api = metrics.histogram("mentat_discord_api_seconds")
+        if api:
+            calls = sum(h.count for h in api.values())
+            errors = sum(metrics.counter("mentat_discord_api_errors_total").values())
+            limited = metrics.counter("mentat_discord_rate_limits_total")
+            lines.append(f"**Discord API:** {calls} calls, {int(errors)} errors, rate limited "
+                         f"{int(sum(limited.values()))}× ({int(limited.get((('scope', 'global'),), 0))} global)")
+            lines += self._section("Slowest routes", "mentat_discord_api_seconds", "route")[1:]
+        if lag := metrics.histogram("mentat_loop_lag_seconds").get(()):
+            lines.append(f"**Event loop lag:** p95 {_ms(lag.quantile(0.95))}, max {_ms(lag.max)}")
+        if tracer.slow:
+            lines.append(f"**Slow interactions** (over {_ms(tracer.threshold)})")
+            lines += [f"`{name}` {_ms(total)} — {breakdown}" for name, total, breakdown in tracer.slow[-TOP_N:]]
+        return "\n".join(lines)[:2000]
+
+    @mentat.command(name="stats", description="Latency and API usage since start-up")
+    @discord.default_permissions(administrator=True)
+    async def mentat_stats(self, ctx):
+        await ctx.respond(self.stats_text(), ephemeral=True)
+
+    @mentat.command(name="trace", description="Log interactions slower than a threshold, with their phases")
+    @discord.default_permissions(administrator=True)
+    async def mentat_trace(self, ctx, threshold_ms: discord.Option(int, min_value=0, max_value=60_000,
+                                                                   description="0 turns tracing off")):
+        tracer.threshold = threshold_ms / 1000
+        state = f"on, logging interactions over {threshold_ms} ms" if threshold_ms else "off"
+        await ctx.respond(f"Tracing is {state}.", ephemeral=True)
+
+    @mentat.command(name="profile", description="Sample every thread for a while and save a flamegraph profile")
+    @discord.default_permissions(administrator=True)
+    async def mentat_profile(self, ctx, seconds: discord.Option(int, min_value=1, max_value=MAX_SECONDS, default=30),
+                             interval_ms: discord.Option(int, min_value=1, max_value=100, default=5)):
+        if self.profiler and self.profiler.running:
+            return await ctx.respond("A profile is already being taken.", ephemeral=True)
+        await ctx.defer(ephemeral=True)
+        self.profiler = SamplingProfiler(interval_ms / 1000)
+        self.profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            stacks = await asyncio.to_thread(self.profiler.stop)
+        path = await asyncio.to_thread(write_folded, profile_path(os.path.join(DATA_DIR, "profiles")), stacks)
+        lines = [f"Profiled {seconds} s ({self.profiler.samples} samples) → `{os.path.relpath(path)}`",
+                 "Open it with speedscope, or `flamegraph.pl` for an SVG.", "**Busiest frames:**"]
+        lines += [f"`{frame}` — {n}" for frame, n in top_frames(stacks)] or ["_Threads were idle._"]
+        await ctx.respond("\n".join(lines)[:2000], ephemeral=True)
+
+def setup(bot): bot.add_cog(MetricsCog(bot))
@@ -1,42 +1,56 @@
 # ──────────────── src/cogs/mission_cog.py ────────────────
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.commands import SlashCommandGroup
 from discord.ui import Modal, InputText
+import asyncio
 import datetime
-import pytz
+import os
 import random
+from src.core.metrics import timed
+from src.core.outbound import Priority, interaction_bucket, send
+from src.core.scheduler import REMIND, MissionScheduler
+from src.core.tracing import span
+from src.core.timezones import get_zone, timezones
 
 # ────────────────────── Mentat quips ──────────────────────
+QUIPS = (
+    """The slow blade penetrates the shield.""",
+    """He who controls the spice controls the universe.""",
+    """The sleeper must awaken.""",
+    """Fear is the mind-killer.""",
+    """A plan is only as good as its execution.""",
+    """The spice must flow.""",
+)
+
 def _quip() -> str:
-    lines = [
-        """The slow blade penetrates the shield.""",
-        """He who controls the spice controls the universe.""",
-        """The sleeper must awaken.""",
-        """Fear is the mind-killer.""",
-        """A plan is only as good as its execution.""",
-        """The spice must flow."""
-    ]
-    return random.choice(lines)
+    return random.choice(QUIPS)
+
+async def _reply(interaction: discord.Interaction, content: str):
+    """Ephemeral acknowledgement, sent ahead of any queued edits."""
+    return await send(interaction.client, lambda: interaction.response.send_message(content, ephemeral=True),
+                      Priority.INTERACTION, interaction_bucket(interaction))
 
 # ─────────────────── Autocomplete Functions ───────────────────
 async def timezone_autocomplete(ctx: discord.AutocompleteContext):
-    """Returns a list of matching timezones."""
-    return [tz for tz in pytz.all_timezones if ctx.value.lower() in tz.lower()][:25]
+    """Returns a list of matching timezones (names, cities or abbreviations like AEST)."""
+    return timezones().search(ctx.value)
 
 # ────────────────────── Mission Modal ──────────────────────
 class MissionModal(Modal):
-    def __init__(self, db, timezone):
+    def __init__(self, db, timezone, scheduler=None):
         super().__init__(title="Create a new mission")
         self.db = db
         self.timezone = timezone
+        self.scheduler = scheduler
 
-        now = datetime.datetime.now(pytz.timezone(timezone))
+        now = datetime.datetime.now(get_zone(timezone))
 
         self.add_item(InputText(label="Mission Details", style=discord.InputTextStyle.long))
         self.add_item(InputText(label="Date (YYYY-MM-DD)", value=now.strftime("%Y-%m-%d")))
         self.add_item(InputText(label="Time (24-hour format)", value=now.strftime("%H:%M")))
 
+    @timed("mentat_component_seconds", component="mission_modal")
     async def callback(self, interaction: discord.Interaction):
         details = self.children[0].value
         date_str = self.children[1].value
@@ -44,9 +58,8 @@ class MissionModal(Modal):
 
         try:
             mission_time = datetime.datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-            tz = pytz.timezone(self.timezone)
-            mission_time = tz.localize(mission_time)
-        except (ValueError, pytz.UnknownTimeZoneError):
+            mission_time = mission_time.replace(tzinfo=get_zone(self.timezone))
+        except ValueError:
             await interaction.response.send_message("Invalid date or time format. Please use YYYY-MM-DD and HH:MM.", ephemeral=True)
             return
 
@@ -62,126 +75,268 @@ _{details}_""",
         embed.add_field(name=" operatives", value=f"<@{interaction.user.id}>", inline=False)
         embed.set_footer(text=_quip())
 
-        view = ConfirmView(self.db, embed, mission_time)
+        view = ConfirmView(self.db, embed, mission_time, self.scheduler)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 # ────────────────────── Confirm View ──────────────────────
 class ConfirmView(discord.ui.View):
-    def __init__(self, db, embed, mission_time):
-        super().__init__(timeout=None)
+    # the draft only lives in memory and in an ephemeral reply, so it cannot outlive a restart;
+    # 15 minutes matches the lifetime of the interaction token that shows it
+    def __init__(self, db, embed, mission_time, scheduler=None):
+        super().__init__(timeout=900)
         self.db = db
         self.embed = embed
         self.mission_time = mission_time
+        self.scheduler = scheduler
 
     @discord.ui.button(label="Confirm & Post", style=discord.ButtonStyle.success)
+    @timed("mentat_component_seconds", component="mission_confirm")
     async def confirm_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         message = await interaction.channel.send(embed=self.embed)
-        self.db.create_mission(message.id, message.id, interaction.channel.id, interaction.user.id, self.embed.description, self.mission_time.isoformat())
-        
-        view = MissionView(message.id, self.db)
+        await self.db.create_mission(message.id, message.id, interaction.channel.id, interaction.user.id, self.embed.description, self.mission_time.isoformat(),
+                                     guild_id=interaction.guild_id or 0)
+        if self.scheduler:
+            self.scheduler.add(message.id, self.mission_time)
+
+        view = MissionView(message.id, self.db, self.scheduler)
         await message.edit(view=view)
         await interaction.response.edit_message(content="Mission posted.", view=None)
 
     @discord.ui.button(label="Cancel", style=discord.ButtonStyle.danger)
+    @timed("mentat_component_seconds", component="mission_discard")
     async def cancel_button(self, button: discord.ui.Button, interaction: discord.Interaction):
         await interaction.response.edit_message(content="Mission creation cancelled.", view=None)
 
 # ────────────────────── Mission View ──────────────────────
+RENDER_DEBOUNCE_SECONDS = 0.75   # roster edits wait this long to absorb a burst of clicks
+_renders: dict[int, asyncio.Task] = {}   # mission id -> pending roster render (shared by all its views)
+
 class MissionView(discord.ui.View):
-    def __init__(self, mission_id: int, db):
+    """Join / Leave / Cancel buttons; custom_ids are "mission_<action>_<mission id>"."""
+    def __init__(self, mission_id: int, db, scheduler=None):
         super().__init__(timeout=None)
         self.mission_id = mission_id
         self.db = db
+        self.scheduler = scheduler
+        for item in self.children:
+            item.custom_id = f"mission_{item.custom_id}_{mission_id}"
 
     async def update_embed(self, interaction: discord.Interaction):
-        mission = self.db.get_mission(self.mission_id)
-        embed = interaction.message.embeds[0]
-        participant_list = "\n".join([f"<@{p}>" for p in mission['participants']]) or "_No one yet_"
-        embed.set_field_at(2, name=" operatives", value=participant_list, inline=False)
-        await interaction.message.edit(embed=embed)
+        """Re-renders the roster shortly; clicks landing meanwhile share the same edit."""
+        if self.mission_id not in _renders:
+            _renders[self.mission_id] = asyncio.create_task(self._render(interaction))
 
-    @discord.ui.button(label="Join", style=discord.ButtonStyle.success)
-    async def join_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        mission = self.db.get_mission(self.mission_id)
+    async def _render(self, interaction: discord.Interaction):
+        await asyncio.sleep(RENDER_DEBOUNCE_SECONDS)
+        # clicks after this point schedule a fresh render, so none of them is lost
+        _renders.pop(self.mission_id, None)
+        mission = await self.db.get_mission(self.mission_id)
         if not mission:
-            return await interaction.response.send_message("This mission no longer exists.", ephemeral=True)
+            return
+        with span("render"):
+            embed = interaction.message.embeds[0]
+            participant_list = "\n".join([f"<@{p}>" for p in mission['participants']]) or "_No one yet_"
+            embed.set_field_at(2, name=" operatives", value=participant_list, inline=False)
+        await send(interaction.client, lambda: interaction.message.edit(embed=embed), Priority.EDIT,
+                   f"channel:{interaction.channel_id}", f"mission:{self.mission_id}")
 
-        if interaction.user.id in mission['participants']:
-            return await interaction.response.send_message("You have already joined this mission.", ephemeral=True)
+    @discord.ui.button(label="Join", style=discord.ButtonStyle.success, custom_id="join")
+    @timed("mentat_component_seconds", component="mission_join")
+    async def join_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        added = await self.db.add_mission_participant(self.mission_id, interaction.user.id)
+        if added is None:
+            return await _reply(interaction, "This mission no longer exists.")
+        if not added:
+            return await _reply(interaction, "You have already joined this mission.")
 
-        mission['participants'].append(interaction.user.id)
-        self.db.update_mission_participants(self.mission_id, mission['participants'])
+        await _reply(interaction, "You have joined the mission.")
         await self.update_embed(interaction)
-        await interaction.response.send_message("You have joined the mission.", ephemeral=True)
 
-    @discord.ui.button(label="Leave", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="Leave", style=discord.ButtonStyle.secondary, custom_id="leave")
+    @timed("mentat_component_seconds", component="mission_leave")
     async def leave_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        mission = self.db.get_mission(self.mission_id)
-        if not mission:
-            return await interaction.response.send_message("This mission no longer exists.", ephemeral=True)
-
-        if interaction.user.id not in mission['participants']:
-            return await interaction.response.send_message("You are not part of this mission.", ephemeral=True)
+        removed = await self.db.remove_mission_participant(self.mission_id, interaction.user.id)
+        if removed is None:
+            return await _reply(interaction, "This mission no longer exists.")
+        if not removed:
+            return await _reply(interaction, "You are not part of this mission.")
 
-        mission['participants'].remove(interaction.user.id)
-        self.db.update_mission_participants(self.mission_id, mission['participants'])
+        await _reply(interaction, "You have left the mission.")
         await self.update_embed(interaction)
-        await interaction.response.send_message("You have left the mission.", ephemeral=True)
 
-    @discord.ui.button(label="Cancel Mission", style=discord.ButtonStyle.danger)
+    @discord.ui.button(label="Cancel Mission", style=discord.ButtonStyle.danger, custom_id="cancel")
+    @timed("mentat_component_seconds", component="mission_cancel")
     async def cancel_button(self, button: discord.ui.Button, interaction: discord.Interaction):
-        mission = self.db.get_mission(self.mission_id)
+        mission = await self.db.get_mission(self.mission_id)
         if not mission:
-            return await interaction.response.send_message("This mission no longer exists.", ephemeral=True)
+            return await _reply(interaction, "This mission no longer exists.")
 
         if interaction.user.id != mission['creator_id']:
-            return await interaction.response.send_message("You are not the creator of this mission.", ephemeral=True)
+            return await _reply(interaction, "You are not the creator of this mission.")
 
         await interaction.message.delete()
-        self.db.delete_mission(self.mission_id)
-        await interaction.response.send_message("Mission cancelled.", ephemeral=True)
+        await self.db.delete_mission(self.mission_id)
+        if self.scheduler:
+            self.scheduler.discard(self.mission_id)
+        await _reply(interaction, "Mission cancelled.")
+
+# ────────────────────── Mission List ──────────────────────
+LIST_PAGE_SIZE = 10
+LIST_SCOPES = ("upcoming", "mine", "channel")
+
+def _summary(details: str, width: int = 80) -> str:
+    # stored details are the directive's full text; the order itself is its last, italic line
+    line = (details or "").strip().splitlines()[-1:] or [""]
+    line = line[0].strip("_ ") or "—"
+    return line if len(line) <= width else line[:width - 1] + "…"
+
+async def _list_page(db, guild_id: int, user_id: int, channel_id: int, scope: str, page: int):
+    """(embed, total pages) for one page of a /mission list scope; one range query on the mission index."""
+    query = {"mine": {"participant_id": user_id}, "channel": {"channel_id": channel_id}}.get(scope, {})
+    now = datetime.datetime.now(datetime.timezone.utc)
+    missions, total = await db.get_missions_page(guild_id, now, offset=page * LIST_PAGE_SIZE,
+                                                 limit=LIST_PAGE_SIZE, **query)
+    pages = max(1, -(-total // LIST_PAGE_SIZE))
+    lines = []
+    for m in missions:
+        ts = int(datetime.datetime.fromisoformat(m['time']).timestamp())
+        link = f"https://discord.com/channels/{m['guild_id']}/{m['channel_id']}/{m['message_id']}"
+        lines.append(f"<t:{ts}:f> (<t:{ts}:R>) • [{_summary(m['details'])}]({link}) • {len(m['participants'])} 👤")
+    title = {"upcoming": "Upcoming missions", "mine": "Your missions", "channel": "Missions in this channel"}[scope]
+    embed = discord.Embed(title=title, description="\n".join(lines) or "_No upcoming missions._",
+                          color=discord.Color.dark_red())
+    embed.set_footer(text=f"Page {page + 1} of {pages} • {total} mission{'s' if total != 1 else ''}")
+    return embed, pages
+
+class MissionListView(discord.ui.View):
+    """Previous / Next under a private /mission list; each click fetches just the page it shows."""
+    def __init__(self, db, guild_id: int, user_id: int, channel_id: int, scope: str, pages: int, page: int = 0):
+        super().__init__(timeout=900)
+        self.db, self.guild_id, self.user_id, self.channel_id, self.scope = db, guild_id, user_id, channel_id, scope
+        self.page, self.pages = page, pages
+        self._sync_buttons()
+
+    def _sync_buttons(self):
+        self.prev_button.disabled = self.page <= 0
+        self.next_button.disabled = self.page >= self.pages - 1
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        embed, self.pages = await _list_page(self.db, self.guild_id, self.user_id, self.channel_id, self.scope, page)
+        # missions may have started meanwhile, leaving fewer pages
+        self.page = min(page, self.pages - 1)
+        if self.page != page:
+            embed, self.pages = await _list_page(self.db, self.guild_id, self.user_id, self.channel_id, self.scope, self.page)
+        self._sync_buttons()
+        await send(interaction.client, lambda: interaction.response.edit_message(embed=embed, view=self),
+                   Priority.INTERACTION, interaction_bucket(interaction))
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    @timed("mentat_component_seconds", component="mission_list_prev")
+    async def prev_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        await self._show(interaction, max(0, self.page - 1))
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    @timed("mentat_component_seconds", component="mission_list_next")
+    async def next_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        await self._show(interaction, self.page + 1)
 
 # ──────────────────────────── COG ────────────────────────────
 class MissionCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = bot.db_handler
-        self.cleanup_loop.start()
+        reminders = [int(m) for m in (os.getenv("MISSION_REMINDER_MINUTES") or "15").split(",") if m.strip()]
+        self.scheduler = MissionScheduler(self._on_mission_event, reminders)
+        self._task = None
 
     mission = SlashCommandGroup("mission", "Mission commands")
     user = SlashCommandGroup("user", "User settings")
 
+    async def rehydrate_views(self) -> int:
+        """Re-registers the buttons of every stored mission; no Discord API calls."""
+        missions = await self.db.get_all_missions()
+        for mission in missions:
+            self.bot.add_view(MissionView(mission['message_id'], self.db, self.scheduler))
+        return len(missions)
+
     @mission.command(name="create")
     async def create_mission(self, ctx: discord.ApplicationContext):
-        timezone = self.db.get_user_timezone(ctx.author.id)
-        if not timezone:
-            await ctx.respond("To create a mission, you must first set your timezone. Use the `/user set_timezone` command. This is a one-time setup.", ephemeral=True)
-            return
+        zone = timezones().for_user(ctx.author.id)
+        if zone is None:
+            timezone = await self.db.get_user_timezone(ctx.author.id)
+            if not timezone:
+                await ctx.respond("To create a mission, you must first set your timezone. Use the `/user set_timezone` command. This is a one-time setup.", ephemeral=True)
+                return
+            zone = timezones().remember(ctx.author.id, timezone)
 
-        modal = MissionModal(self.db, timezone)
+        modal = MissionModal(self.db, zone.key, self.scheduler)
         await ctx.send_modal(modal)
 
+    @mission.command(name="list", description="Upcoming missions, yours or this channel's")
+    async def list_missions(self, ctx: discord.ApplicationContext,
+                            scope: discord.Option(str, choices=list(LIST_SCOPES), default="upcoming")):
+        gid = ctx.guild_id or 0
+        embed, pages = await _list_page(self.db, gid, ctx.author.id, ctx.channel_id, scope, 0)
+        view = MissionListView(self.db, gid, ctx.author.id, ctx.channel_id, scope, pages) if pages > 1 else None
+        await send(self.bot, lambda: ctx.respond(embed=embed, view=view, ephemeral=True),
+                   Priority.INTERACTION, interaction_bucket(ctx.interaction))
+
     @user.command(name="set_timezone")
     async def set_timezone(self, ctx: discord.ApplicationContext, timezone: discord.Option(str, autocomplete=timezone_autocomplete)):
+        name = timezones().resolve(timezone)
+        if not name:
+            return await ctx.respond("Invalid timezone. Please select a valid timezone from the list.", ephemeral=True)
+        await self.db.set_user_timezone(ctx.author.id, name)
+        timezones().remember(ctx.author.id, name)
+        await ctx.respond(f"Your timezone has been set to {name}. You can now use `/mission create`.", ephemeral=True)
+
+    # ─── mission timers ───────────────────────────────────────
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if self._task is None or self._task.done():
+            # missions are read once; creates and cancels keep the heap current from here on
+            for mission in await self.db.get_all_missions():
+                self.scheduler.add(mission['message_id'], mission['time'])
+            self._task = asyncio.create_task(self.scheduler.run())
+
+    def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    async def _channel(self, channel_id: int):
+        # the gateway cache knows every channel the bot can see; the API is the fallback
+        return self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+    async def _on_mission_event(self, kind: str, mission_id: int):
+        mission = await self.db.get_mission(mission_id)
+        if not mission:
+            return
+        if kind == REMIND:
+            if not mission['participants']:
+                return
+            ts = int(datetime.datetime.fromisoformat(mission['time']).timestamp())
+            mentions = " ".join(f"<@{p}>" for p in mission['participants'])
+            channel = await self._channel(mission['channel_id'])
+            await send(self.bot, lambda: channel.send(
+                f"⏰ Mission starting <t:{ts}:R>: {mentions}",
+                reference=channel.get_partial_message(mission['message_id']).to_reference(fail_if_not_exists=False),
+                mention_author=False,
+            ), Priority.EDIT, f"channel:{mission['channel_id']}")
+            return
+
+        async def delete():
+            try:
+                channel = await self._channel(mission['channel_id'])
+                await channel.get_partial_message(mission['message_id']).delete()
+            except (discord.NotFound, discord.Forbidden):
+                pass
         try:
-            pytz.timezone(timezone)
-            self.db.set_user_timezone(ctx.author.id, timezone)
-            await ctx.respond(f"Your timezone has been set to {timezone}. You can now use `/mission create`.", ephemeral=True)
-        except pytz.UnknownTimeZoneError:
-            await ctx.respond("Invalid timezone. Please select a valid timezone from the list.", ephemeral=True)
-
-    @tasks.loop(hours=1)
-    async def cleanup_loop(self):
-        for mission in self.db.get_all_missions():
-            mission_time = datetime.datetime.fromisoformat(mission['time'])
-            if datetime.datetime.now(pytz.utc) > mission_time + datetime.timedelta(hours=4):
-                try:
-                    channel = await self.bot.fetch_channel(mission['channel_id'])
-                    message = await channel.fetch_message(mission['message_id'])
-                    await message.delete()
-                except (discord.NotFound, discord.Forbidden):
-                    pass
-                self.db.delete_mission(mission['message_id'])
+            await send(self.bot, delete, Priority.BACKGROUND, f"channel:{mission['channel_id']}")
+        except discord.HTTPException as e:
+            print(f"--- MISSION EXPIRE ERROR ({mission_id}): {e}")
+        finally:
+            # the expiry has left the scheduler, so this is the row's only chance to go
+            await self.db.delete_mission(mission_id)
 
 def setup(bot):
     bot.add_cog(MissionCog(bot))
@@ -0,0 +1,102 @@
+# ──────────────── src/cogs/sync_cog.py ────────────────
+import asyncio, datetime, os, random, time, discord
+from discord.ext import commands
+from discord.commands import SlashCommandGroup
+from src.core.metrics import metrics
+
+FAILURE_BACKOFF_SECONDS = 60   # first retry after a failed sync, doubled each time
+
+
+# ──────────────────────────── COG ────────────────────────────
+class SyncCog(commands.Cog):
+    """Keeps the resource catalogue in step with the Google Sheet, in the background."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot, self.db = bot, bot.db_handler
+        self.interval = float(os.getenv("SHEET_SYNC_INTERVAL_MINUTES") or 60) * 60
+        self.jitter = float(os.getenv("SHEET_SYNC_JITTER") or 0.1)
+        self.last_report = None
+        self.next_run_at = None
+        self.failures = 0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    sheet = SlashCommandGroup("sheet", "Google Sheet catalogue sync")
+
+    # ─── background loop ──────────────────────────────────────
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    def cog_unload(self):
+        if self._task:
+            self._task.cancel()
+
+    def _next_delay(self) -> float:
+        if self.failures:
+            delay = min(FAILURE_BACKOFF_SECONDS * 2 ** (self.failures - 1), self.interval)
+        else:
+            delay = self.interval
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def _loop(self):
+        # the bot starts on local data; the first sync runs right after login
+        while True:
+            try:
+                await self.run_sync()
+            except Exception as e:
+                print(f"--- SHEET SYNC ERROR: {e}")
+                self.failures += 1
+            delay = self._next_delay()
+            self.next_run_at = time.time() + delay
+            await asyncio.sleep(delay)
+
+    async def run_sync(self):
+        """Runs one sync and refreshes the report posts of every resource it touched, in every guild."""
+        async with self._lock:
+            report = await self.db.sync_from_google_sheet()
+            self.last_report = report
+            metrics.inc("mentat_sheet_sync_total", status=report.status)
+            for phase in ("fetch", "parse", "apply"):
+                if ms := getattr(report, f"{phase}_ms"):
+                    metrics.observe("mentat_sheet_sync_seconds", ms / 1000, phase=phase)
+            self.failures = self.failures + 1 if report.status == "failed" else 0
+            if report.changed_ids:
+                await self._refresh_reports()
+            return report
+
+    async def _refresh_reports(self):
+        # the sync already put the changed ids in every report guild's change feed; one refresh each drains it
+        advisor = self.bot.get_cog("AdvisorCog")
+        if not advisor:
+            return
+        guilds = list(await self.db.get_report_channels())
+        results = await asyncio.gather(*(advisor.refresh_report(gid) for gid in guilds), return_exceptions=True)
+        for gid, result in zip(guilds, results):
+            if isinstance(result, Exception):
+                print(f"--- SHEET SYNC REFRESH ERROR (guild {gid}): {result}")
+
+    # ─── /sheet commands ─────────────────────────────────────
+    @sheet.command(name="sync")
+    @discord.default_permissions(manage_guild=True)
+    async def sheet_sync(self, ctx):
+        await ctx.defer(ephemeral=True)
+        report = await self.run_sync()
+        await ctx.respond(f"Sheet sync {report.summary()}.", ephemeral=True)
+
+    @sheet.command(name="status")
+    @discord.default_permissions(manage_guild=True)
+    async def sheet_status(self, ctx):
+        if not self.last_report:
+            return await ctx.respond("No sheet sync has run yet.", ephemeral=True)
+        r = self.last_report
+        when = int(datetime.datetime.fromisoformat(r.finished_at).timestamp())
+        lines = [f"**Last sync:** <t:{when}:R> — {r.summary()}"]
+        if self.next_run_at:
+            lines.append(f"**Next sync:** <t:{int(self.next_run_at)}:R>")
+        if self.failures:
+            lines.append(f"**Consecutive failures:** {self.failures}")
+        await ctx.respond("\n".join(lines), ephemeral=True)
+
+def setup(bot): bot.add_cog(SyncCog(bot))
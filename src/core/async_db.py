@@ -0,0 +1,133 @@
+# ──────────────── src/core/async_db.py ────────────────
+"""Awaitable facade over MentatDB so cogs never block the event loop on disk I/O."""
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.core.database import MentatDB
+from src.core.metrics import metrics
+from src.core.tracing import span
+
+
+def _reader(name: str):
+    async def method(self, *args, **kwargs):
+        with metrics.time('mentat_db_seconds', method=name), span('db'):
+            return await self._run(self._readers, self._call, name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(MentatDB, name).__doc__
+    return method
+
+
+def _writer(name: str):
+    async def method(self, *args, **kwargs):
+        with metrics.time('mentat_db_seconds', method=name), span('db'):
+            return await self._run(self._writer, self._call, name, *args, **kwargs)
+    method.__name__ = name
+    method.__doc__ = getattr(MentatDB, name).__doc__
+    return method
+
+
+class AsyncMentatDB:
+    """Runs MentatDB calls off the event loop.
+
+    Writes go through a single dedicated thread, so they are applied one at a time and in the
+    order they were awaited; reads share a small pool and run concurrently.
+    `opening()` returns before the database is even open: calls wait for it on their worker thread.
+    """
+
+    def __init__(self, db: MentatDB | None, readers: int = 4):
+        self._db: MentatDB | Future | None = db
+        self._readers = ThreadPoolExecutor(readers, thread_name_prefix='mentatdb-read')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='mentatdb-write')
+
+    @classmethod
+    def opening(cls, factory=MentatDB, readers: int = 4) -> 'AsyncMentatDB':
+        """Builds the MentatDB with `factory()` on the writer thread, so boot can go on meanwhile."""
+        adb = cls(None, readers)
+        adb._db = adb._writer.submit(factory)
+        return adb
+
+    @property
+    def db(self) -> MentatDB:
+        """The MentatDB, waiting for it to open if need be (re-raises the error if it failed to)."""
+        if isinstance(self._db, Future):
+            self._db = self._db.result()
+        return self._db
+
+    async def ready(self) -> MentatDB:
+        if isinstance(self._db, Future):
+            await asyncio.wrap_future(self._db)
+        return self.db
+
+    def _call(self, name: str, *args, **kwargs):
+        return getattr(self.db, name)(*args, **kwargs)
+
+    @staticmethod
+    async def _run(executor, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    # --- Sync ---
+    # mostly network time; its writes take MentatDB's lock themselves, so keep the writer thread free
+    sync_from_google_sheet = _reader('sync_from_google_sheet')
+
+    # --- Resources ---
+    set_demand = _writer('set_demand')
+    set_demand_many = _writer('set_demand_many')
+    get_resource = _reader('get_resource')
+    get_resource_by_name = _reader('get_resource_by_name')
+    search_resource_names = _reader('search_resource_names')
+    resolve_resource = _reader('resolve_resource')
+    get_all_by_demand = _reader('get_all_by_demand')
+    get_all_resources = _reader('get_all_resources')
+    drain_dirty_resources = _writer('drain_dirty_resources')
+    mark_resources_dirty = _writer('mark_resources_dirty')
+
+    # --- Demand history ---
+    demand_trends = _reader('demand_trends')
+    compact_demand_log = _writer('compact_demand_log')
+
+    # --- Demand votes ---
+    cast_vote = _writer('cast_vote')
+    decay_votes = _writer('decay_votes')
+
+    # --- Settings ---
+    get_setting = _reader('get_setting')
+    set_setting = _writer('set_setting')
+    delete_setting = _writer('delete_setting')
+    get_settings_with_prefix = _reader('get_settings_with_prefix')
+    get_report_channels = _reader('get_report_channels')
+    adopt_legacy_guild = _writer('adopt_legacy_guild')
+
+    # --- Missions ---
+    create_mission = _writer('create_mission')
+    get_mission = _reader('get_mission')
+    get_all_missions = _reader('get_all_missions')
+    get_missions_page = _reader('get_missions_page')
+    add_mission_participant = _writer('add_mission_participant')
+    remove_mission_participant = _writer('remove_mission_participant')
+    update_mission_participants = _writer('update_mission_participants')
+    delete_mission = _writer('delete_mission')
+
+    # --- Report message registry ---
+    get_report_message = _reader('get_report_message')
+    get_report_messages = _reader('get_report_messages')
+    set_report_message = _writer('set_report_message')
+    delete_report_messages = _writer('delete_report_messages')
+    adopt_legacy_report_settings = _writer('adopt_legacy_report_settings')
+
+    # --- User settings ---
+    set_user_timezone = _writer('set_user_timezone')
+    get_user_timezone = _reader('get_user_timezone')
+
+    # --- Lifecycle ---
+    warm = _reader('warm')
+    flush = _writer('flush')
+
+    def write_stats(self) -> dict:
+        return self.db.write_stats()
+
+    async def close(self):
+        """Flushes pending writes, closes the storage and stops the worker threads."""
+        await self._run(self._writer, self._call, 'close')
+        self._readers.shutdown(wait=False)
+        self._writer.shutdown(wait=True)
@@ -0,0 +1,61 @@
+# ──────────────── src/core/bulk_demand.py ────────────────
+"""Planning for /demand bulk: which items get which level, before anything is written.
+
+Targets come either from a filter (type, tier, name pattern) with one level for every match,
+or from a CSV of `item,level` lines.  `plan()` turns the targets into the diff shown for
+confirmation; only items whose level actually changes are in it.
+"""
+import csv
+import fnmatch
+import io
+
+LEVELS = ('high', 'medium', 'low')
+MAX_CSV_BYTES = 256 * 1024
+
+
+def select(items: list[dict], type_: str | None = None, tier: int | None = None,
+           pattern: str | None = None) -> list[dict]:
+    """The items matching every given filter; `pattern` is a case-insensitive glob, or a substring without * / ?."""
+    if pattern:
+        pattern = pattern.lower()
+        if not any(c in pattern for c in '*?['):
+            pattern = f'*{pattern}*'
+    return [it for it in items
+            if (type_ is None or (it.get('type') or '').lower() == type_.lower())
+            and (tier is None or it.get('tier') == tier)
+            and (not pattern or fnmatch.fnmatchcase(it['name'].lower(), pattern))]
+
+
+def parse_csv(text: str, items: list[dict]) -> tuple[dict[str, str], list[str]]:
+    """({resource id: level}, problems) from `item,level` lines; items match by name or id, any case.
+
+    A header line and blank lines are skipped; a later line for the same item wins.
+    """
+    known = {}
+    for it in items:
+        known[it['id'].lower()] = known[it['name'].lower()] = it['id']
+    targets, problems = {}, []
+    for n, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        cells = [c.strip() for c in row]
+        if not any(cells):
+            continue
+        if n == 1 and [c.lower() for c in cells[:2]] in (['item', 'level'], ['name', 'demand'], ['item', 'demand']):
+            continue
+        if len(cells) < 2:
+            problems.append(f"line {n}: expected `item,level`")
+            continue
+        name, level = cells[0], cells[1].lower()
+        if level not in LEVELS:
+            problems.append(f"line {n}: unknown level `{cells[1]}`")
+        elif (rid := known.get(name.lower())) is None:
+            problems.append(f"line {n}: unknown item `{name}`")
+        else:
+            targets[rid] = level
+    return targets, problems
+
+
+def plan(items: list[dict], targets: dict[str, str]) -> list[tuple[dict, str, str]]:
+    """(item, current level, new level) for each target that changes, ordered by name."""
+    by_id = {it['id']: it for it in items}
+    return sorted(((by_id[rid], by_id[rid]['demand'], level) for rid, level in targets.items()
+                   if rid in by_id and by_id[rid]['demand'] != level), key=lambda c: c[0]['name'])
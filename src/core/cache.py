@@ -0,0 +1,152 @@
+# ──────────────── src/core/cache.py ────────────────
+"""In-memory copies of MentatDB tables with hash indexes for O(1) lookups.
+
+Ordered indexes keep each partition (e.g. one guild's missions) sorted by one field, so a
+page of rows is two binary searches and a slice rather than a scan and a sort.
+
+Writes are serialised by MentatDB's lock; reads take no lock, so they snapshot
+containers before iterating and never see a row disappear while it is replaced.
+Ordered partitions are replaced on write rather than changed in place for the same reason.
+"""
+import bisect
+import itertools
+
+
+def _copy(doc: dict) -> dict:
+    # callers are free to mutate what they get back (e.g. a participants list)
+    return {k: list(v) if isinstance(v, list) else v for k, v in doc.items()}
+
+
+def _field(doc: dict, field):
+    # a tuple of field names indexes the combination, e.g. ('guild_id', 'demand')
+    return tuple(doc.get(f) for f in field) if isinstance(field, tuple) else doc.get(field)
+
+
+def _partitions(doc: dict, fields: tuple) -> list[tuple]:
+    # a list-valued field puts the row in one partition per element, e.g. per participant
+    values = tuple(doc.get(f) for f in fields)
+    if not any(isinstance(v, list) for v in values):
+        return [values]
+    return list(itertools.product(*(v if isinstance(v, list) else [v] for v in values)))
+
+
+class TableCache:
+    """Every document of one table, keyed by the table's key, plus hash indexes on selected fields."""
+
+    def __init__(self, key_fields: tuple, index_fields=(), ordered=()):
+        """`ordered` holds (partition fields, sort field, sort key function) triples."""
+        self.key_fields = key_fields
+        self.rows: dict[tuple, dict] = {}
+        self.indexes: dict[str, dict] = {f: {} for f in index_fields}
+        # partition fields -> (sort field, sort key, {partition: sorted [(sort value, row key)]})
+        self.ordered: dict[tuple, tuple] = {part: (field, sort_key, {}) for part, field, sort_key in ordered}
+
+    def key(self, doc: dict) -> tuple:
+        return tuple(doc[f] for f in self.key_fields)
+
+    def load(self, docs):
+        self.rows.clear()
+        for idx in self.indexes.values():
+            idx.clear()
+        for doc in docs:
+            self._put(doc)
+        # ordered partitions are sorted once here rather than kept sorted row by row
+        sort_values = {}
+        for part, (field, sort_key, idx) in self.ordered.items():
+            idx.clear()
+            for key, doc in self.rows.items():
+                value = sort_values.get((field, key))
+                if value is None:
+                    value = sort_values[field, key] = sort_key(doc.get(field))
+                for p in _partitions(doc, part):
+                    idx.setdefault(p, []).append((value, key))
+            for entries in idx.values():
+                entries.sort()
+
+    # ─── reads ────────────────────────────────────────────────
+    def get(self, key) -> dict | None:
+        doc = self.rows.get(key if isinstance(key, tuple) else (key,))
+        return _copy(doc) if doc else None
+
+    def lookup(self, field: str | tuple, value) -> list[dict]:
+        keys = list(self.indexes[field].get(value, ()))
+        return [_copy(d) for d in map(self.rows.get, keys) if d is not None]
+
+    def range(self, partition: tuple, value: tuple, lo=None, hi=None, offset: int = 0,
+              limit: int | None = None) -> tuple[list[dict], int]:
+        """Rows of one partition whose sort key k has lo <= k < hi, in order: (`limit` rows from `offset`, total)."""
+        entries = self.ordered[partition][2].get(value, ())
+        i = 0 if lo is None else bisect.bisect_left(entries, (lo,))
+        j = len(entries) if hi is None else bisect.bisect_left(entries, (hi,))
+        end = j if limit is None else min(j, i + offset + limit)
+        docs = [self.rows.get(key) for _, key in entries[i + offset:end]]
+        return [_copy(d) for d in docs if d is not None], max(0, j - i)
+
+    def snapshot(self) -> dict[tuple, dict]:
+        """The live documents by key, without copying them; treat them as read-only."""
+        return dict(self.rows)
+
+    def values(self) -> list[dict]:
+        return [_copy(d) for d in list(self.rows.values())]
+
+    def __len__(self):
+        return len(self.rows)
+
+    # ─── writes ───────────────────────────────────────────────
+    def put(self, doc: dict):
+        key, old = self._put(doc)
+        for part in self.ordered:
+            self._reorder(part, key, old, doc)
+
+    def _put(self, doc: dict) -> tuple[tuple, dict | None]:
+        key = self.key(doc)
+        old = self.rows.get(key)
+        self.rows[key] = _copy(doc)
+        for field, idx in self.indexes.items():
+            if old is not None and _field(old, field) != _field(doc, field):
+                self._unindex(idx, _field(old, field), key)
+            idx.setdefault(_field(doc, field), set()).add(key)
+        return key, old
+
+    def remove(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        old = self.rows.pop(key, None)
+        if old is None:
+            return None
+        for field, idx in self.indexes.items():
+            self._unindex(idx, _field(old, field), key)
+        for part in self.ordered:
+            self._reorder(part, key, old, None)
+        return old
+
+    def _entries(self, part: tuple, doc: dict | None) -> set[tuple]:
+        if doc is None:
+            return set()
+        field, sort_key, _ = self.ordered[part]
+        value = sort_key(doc.get(field))
+        return {(p, value) for p in _partitions(doc, part)}
+
+    def _reorder(self, part: tuple, key: tuple, old: dict | None, new: dict | None):
+        idx = self.ordered[part][2]
+        before, after = self._entries(part, old), self._entries(part, new)
+        for p, value in before - after:
+            entries = list(idx.get(p, ()))
+            i = bisect.bisect_left(entries, (value, key))
+            if i < len(entries) and entries[i] == (value, key):
+                del entries[i]
+            if entries:
+                idx[p] = entries
+            else:
+                idx.pop(p, None)
+        for p, value in after - before:
+            entries = list(idx.get(p, ()))
+            bisect.insort(entries, (value, key))
+            idx[p] = entries
+
+    @staticmethod
+    def _unindex(idx: dict, value, key):
+        bucket = idx.get(value)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del idx[value]
@@ -1,101 +1,546 @@
-import requests
-import csv
+import datetime
 import os
-from tinydb import TinyDB, Query
+import threading
+import time
+from contextlib import contextmanager, nullcontext
 from dotenv import load_dotenv
+from src.core.cache import TableCache
+from src.core.demand_log import DAY, RETAIN_DAYS, SNAPSHOT, DemandLog, Event, daily_summaries, flips, level_seconds
+from src.core.search import ResourceIndex
+from src.core.sheet_sync import SyncReport, Timer, diff_items, stream_items
+from src.core.storage import SCHEMA, Storage, open_storage
+from src.core.votes import HALF_LIFE_HOURS, apply_vote, decay, level_for
+from src.core.write_buffer import DELETE, UPSERT, WriteBuffer
 
-# --- Database Setup ---
-DB_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'db.json')
+# in-memory indexes kept per table, on top of the table's key
+CACHE_INDEXES = {
+    'resources': ('name',),
+    'demand': (('guild_id', 'demand'),),
+    'demand_daily': ('guild_id',),
+    'demand_votes': (('guild_id', 'resource_id'),),
+    'vote_tallies': ('guild_id',),
+    'settings': ('guild_id', 'key'),
+    'missions': ('guild_id',),
+    'user_settings': (),
+    'report_messages': ('channel_id', 'message_id'),
+}
+
+
+def _start_ts(value: str | None) -> float:
+    """A mission's start as a timestamp (times carry their creator's UTC offset, so strings do not sort)."""
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# sorted indexes kept per table: (partition fields, sort field, sort key); pages are range queries
+CACHE_ORDERED = {
+    'missions': ((('guild_id',), 'time', _start_ts),
+                 (('channel_id',), 'time', _start_ts),
+                 (('guild_id', 'creator_id'), 'time', _start_ts),
+                 (('guild_id', 'participants'), 'time', _start_ts)),
+}
+# how often (seconds) reads check the storage for changes made outside this process
+CACHE_CHECK_INTERVAL = 1.0
+# what the first on_ready reads (view rehydration, report loops), loaded while the gateway connects
+WARM_TABLES = ('settings', 'report_messages', 'resources', 'demand', 'missions')
+# settings that stay bot-wide (guild 0) rather than moving to a guild, see adopt_legacy_guild
+BOT_SETTINGS = ('sheet_etag', 'sheet_last_modified', 'report_interval_minutes')
 
 
 class MentatDB:
-    def __init__(self):
-        """Initializes the database connection."""
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-        self.db = TinyDB(DB_PATH, indent=4)
-        self.resources_table = self.db.table('resources')
-        self.settings_table = self.db.table('settings')
-        self.missions_table = self.db.table('missions')
-        self.user_settings_table = self.db.table('user_settings')
-        self.Resource = Query()
-        self.Setting = Query()
-        self.Mission = Query()
-        self.UserSetting = Query()
+    def __init__(self, storage: Storage | None = None, write_behind_ms: int | None = None,
+                 write_behind_max_ops: int | None = None, demand_log: DemandLog | None = None):
+        """Initializes the database connection.
 
+        With `write_behind_ms` > 0 (or DB_WRITE_BEHIND_MS) writes are applied to the cache at once and
+        persisted together after that delay, or as soon as `write_behind_max_ops` writes are pending.
+        Demand changes are also appended to `demand_log` (by default a file next to the storage).
+        """
         load_dotenv()
+        self.storage = storage or open_storage()
+        self.demand_log = demand_log if demand_log is not None else DemandLog.beside(self.storage)
+        self._log_seeded = False
+        self._lock = threading.RLock()
+        self._caches: dict[str, TableCache] = {}
+        self._seen_version = self.storage.version()
+        self._checked_at = time.monotonic()
+        self._txn_depth = 0
+        self._search_index: ResourceIndex | None = None
+        self._dirty_resources: dict[int, set[str]] = {}   # guild id -> resource ids
+
+        if write_behind_ms is None:
+            write_behind_ms = int(os.getenv('DB_WRITE_BEHIND_MS') or 0)
+        if write_behind_max_ops is None:
+            write_behind_max_ops = int(os.getenv('DB_WRITE_BEHIND_MAX_OPS') or 100)
+        self.write_buffer = (WriteBuffer(self._apply_writes, write_behind_ms / 1000, write_behind_max_ops, self._lock)
+                             if write_behind_ms > 0 else None)
+
         self.google_sheet_url = os.getenv('GOOGLE_SHEET_URL')
 
-    def sync_from_google_sheet(self):
-        """Fetches data from the Google Sheet and syncs it with the resources table."""
+    # --- Cache ---
+    def _table(self, name: str) -> TableCache:
+        """Returns the in-memory copy of a table, loading it on first use or after an outside change."""
+        now = time.monotonic()
+        if now - self._checked_at >= CACHE_CHECK_INTERVAL:
+            self._checked_at = now
+            if self.storage.version() != self._seen_version:
+                self.invalidate()
+        cache = self._caches.get(name)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.get(name)
+                if cache is None:
+                    cache = TableCache(SCHEMA[name]['key'], CACHE_INDEXES[name], CACHE_ORDERED.get(name, ()))
+                    cache.load(self.storage.all(name))
+                    self._caches[name] = cache
+        return cache
+
+    def _wrote(self):
+        # our own writes must not look like an outside change
+        self._seen_version = self.storage.version()
+
+    def warm(self, tables=WARM_TABLES) -> int:
+        """Loads `tables` (and the resource search index) ahead of first use; returns the rows held."""
+        rows = sum(len(self._table(name)) for name in tables)
+        if 'resources' in tables:
+            self._resource_index()
+        return rows
+
+    def invalidate(self, *tables: str):
+        """Drops cached tables (all of them by default) so the next read reloads from storage."""
+        with self._lock:
+            self.flush()
+            for name in tables or list(self._caches):
+                self._caches.pop(name, None)
+            if not tables or 'resources' in tables:
+                self._search_index = None
+            self._seen_version = self.storage.version()
+
+    @contextmanager
+    def transaction(self):
+        """Applies the writes made inside the block together; a failure rolls back storage and cache."""
+        with self._lock:
+            self.flush()
+            self._txn_depth += 1
+            try:
+                with self.storage.transaction():
+                    yield self
+            except BaseException:
+                self.invalidate()
+                raise
+            finally:
+                self._txn_depth -= 1
+                self._wrote()
+
+    def sync_from_google_sheet(self) -> SyncReport:
+        """Fetches the Google Sheet and applies only what changed to the resources table.
+
+        Sends the stored ETag / Last-Modified so an unchanged sheet costs one 304 round trip.
+        Items missing from the sheet are removed; demand is kept per guild and left untouched.
+        """
         if not self.google_sheet_url:
             print("--- DATABASE SYNC SKIPPED: GOOGLE_SHEET_URL not in .env file.")
-            return
+            return SyncReport('skipped')
 
         print("Attempting to sync database from Google Sheet...")
+        headers = {}
+        if etag := self.get_setting('sheet_etag'):
+            headers['If-None-Match'] = etag
+        if modified := self.get_setting('sheet_last_modified'):
+            headers['If-Modified-Since'] = modified
+
+        import requests   # only the sheet sync needs it, and it is the slowest import at boot
+        timer = Timer()
         try:
-            response = requests.get(self.google_sheet_url, timeout=15)
-            response.raise_for_status()
-            csv_content = response.content.decode('utf-8').splitlines()
-            reader = csv.DictReader(csv_content)
-
-            items_from_sheet = []
-            for row in reader:
-                item_id = row.get('Name', '').lower().replace(' ', '_').replace(':', '')
-                if not item_id: continue
-                items_from_sheet.append({
-                    'id': item_id, 'name': row.get('Name', ''), 'type': row.get('Type', ''),
-                    'tier': int(row['Tier']) if row.get('Tier', '').isdigit() else 0,
-                    'details': row.get('Details', ''), 'image_url': row.get('ImageURL', ''),
-                    'dgt_slug': row.get('dgtSlug', ''), 'demand': 'low'
-                })
-
-            if not items_from_sheet:
-                print("WARNING: No data found in Google Sheet. DB not changed.")
-                return
-
-            print(f"Fetched {len(items_from_sheet)} items. Syncing to local database...")
-            # We preserve demand levels for existing items during a sync
-            all_local_items = self.resources_table.all()
-            for sheet_item in items_from_sheet:
-                for local_item in all_local_items:
-                    if sheet_item['id'] == local_item['id']:
-                        sheet_item['demand'] = local_item['demand']
-                        break
-
-            self.resources_table.truncate()
-            self.resources_table.insert_multiple(items_from_sheet)
-            print("Database sync complete.")
+            with requests.get(self.google_sheet_url, headers=headers, timeout=15, stream=True) as response:
+                fetch_ms = timer.lap()
+                if response.status_code == 304:
+                    print("Google Sheet not modified since last sync.")
+                    return SyncReport('not_modified', fetch_ms=fetch_ms)
+                response.raise_for_status()
+
+                local = {key[0]: doc for key, doc in self._table('resources').snapshot().items()}
+                added, changed, removed, unchanged = diff_items(local, stream_items(response))
+                parse_ms = timer.lap()
         except requests.RequestException as e:
             print(f"--- DATABASE SYNC FAILED: {e}. Bot will use local data.")
+            return SyncReport('failed', error=str(e), fetch_ms=timer.lap())
+
+        if not (added or changed or unchanged):
+            print("WARNING: No data found in Google Sheet. DB not changed.")
+            return SyncReport('empty', fetch_ms=fetch_ms, parse_ms=parse_ms)
+
+        with self.transaction():
+            cache = self._table('resources')
+            if added or changed:
+                self.storage.upsert_many('resources', added + changed)
+            for rid in removed:
+                self.storage.delete('resources', rid)
+            for item in added + changed:
+                cache.put(item)
+            for rid in removed:
+                cache.remove(rid)
+            if added or changed or removed:
+                self._search_index = None
+                # the catalogue is shared, so every guild's report shows the change
+                for guild_id in self.get_report_channels():
+                    self._dirty_resources.setdefault(guild_id, set()).update([i['id'] for i in added + changed] + removed)
+            self._upsert('settings', {'guild_id': 0, 'key': 'sheet_etag', 'value': response.headers.get('ETag')})
+            self._upsert('settings', {'guild_id': 0, 'key': 'sheet_last_modified', 'value': response.headers.get('Last-Modified')})
+
+        report = SyncReport('updated' if added or changed or removed else 'unchanged',
+                            added=len(added), changed=len(changed), removed=len(removed), unchanged=unchanged,
+                            changed_ids=[i['id'] for i in added + changed] + removed,
+                            fetch_ms=fetch_ms, parse_ms=parse_ms, apply_ms=timer.lap())
+        print(f"Database sync complete — {report.summary()}")
+        return report
+
+    # --- Write-behind ---
+    def _apply_writes(self, ops: list[tuple]):
+        with self.storage.transaction():
+            for op, table, key, doc in ops:
+                if op == UPSERT:
+                    self.storage.upsert(table, doc)
+                else:
+                    self.storage.delete(table, key)
+        self._wrote()
+
+    def _write(self, op: str, table: str, key, doc: dict | None = None):
+        key = key if isinstance(key, tuple) else (key,)
+        if self.write_buffer and not self._txn_depth:
+            self.write_buffer.add(op, table, key, doc)
+        else:
+            self._apply_writes([(op, table, key, doc)])
+
+    def flush(self) -> int:
+        """Persists pending write-behind mutations; returns how many logical writes were folded in."""
+        with self._lock:
+            return self.write_buffer.flush() if self.write_buffer else 0
+
+    def write_stats(self) -> dict:
+        """Counters showing how many logical writes went into each physical flush."""
+        if not self.write_buffer:
+            return {'write_behind': False}
+        return {'write_behind': True, **self.write_buffer.stats()}
+
+    def close(self):
+        """Flushes pending writes and closes the storage."""
+        self.flush()
+        self.storage.close()
+
+    def _upsert(self, table: str, doc: dict):
+        with self._lock:
+            cache = self._table(table)
+            self._write(UPSERT, table, cache.key(doc), doc)
+            cache.put(doc)
+
+    def _update(self, table: str, key, fields: dict) -> bool:
+        with self._lock:
+            cache = self._table(table)
+            doc = cache.get(key)
+            if doc is None:
+                return False
+            doc.update(fields)
+            self._write(UPSERT, table, key, doc)
+            cache.put(doc)
+            return True
+
+    def _delete(self, table: str, key):
+        with self._lock:
+            self._write(DELETE, table, key)
+            self._table(table).remove(key)
 
     # --- Resource Functions ---
-    def set_demand(self, resource_id: str, level: str) -> bool:
-        return self.resources_table.update({'demand': level}, self.Resource.id == resource_id)
+    # The catalogue is shared; demand is per guild (guild 0: bot-wide / not yet adopted).
+    # Resource documents come back with the guild's level in their 'demand' field.
+    def _demand_of(self, guild_id: int):
+        rows = self._table('demand').rows
+
+        def demand_of(rid):
+            row = rows.get((guild_id, rid))
+            return row['demand'] if row else 'low'
+        return demand_of
+
+    def _with_demand(self, doc: dict | None, guild_id: int):
+        if doc is not None:
+            doc['demand'] = self._demand_of(guild_id)(doc['id'])
+        return doc
+
+    def set_demand(self, resource_id: str, level: str, guild_id: int = 0, user_id: int = 0) -> bool:
+        """Sets a resource's level in the guild; an actual change is also logged against `user_id`."""
+        with self._lock:
+            if self._table('resources').get(resource_id) is None:
+                return False
+            log = self._history()
+            before = self._demand_of(guild_id)(resource_id)
+            voted = self._table('vote_tallies').get((guild_id, resource_id)) is not None
+            with self.transaction() if voted else nullcontext():
+                self._upsert('demand', {'guild_id': guild_id, 'resource_id': resource_id, 'demand': level})
+                self._reset_votes(guild_id, (resource_id,))
+            if level != before:
+                log.append(guild_id, resource_id, level, user_id, prev=before)
+            self._dirty_resources.setdefault(guild_id, set()).add(resource_id)
+            return True
+
+    def set_demand_many(self, levels: dict[str, str], guild_id: int = 0, user_id: int = 0) -> dict[str, tuple[str, str]]:
+        """Sets several levels in one transaction; returns {resource id: (old, new)} for those that changed.
+
+        Unknown ids and unchanged levels are skipped.
+        """
+        changed = {}
+        with self._lock:
+            resources, demand_of, log = self._table('resources'), self._demand_of(guild_id), self._history()
+            with self.transaction():
+                for rid, level in levels.items():
+                    before = demand_of(rid)
+                    if level != before and resources.get(rid) is not None:
+                        self._upsert('demand', {'guild_id': guild_id, 'resource_id': rid, 'demand': level})
+                        changed[rid] = (before, level)
+                self._reset_votes(guild_id, [rid for rid in levels if resources.get(rid) is not None])
+            for rid, (before, level) in changed.items():
+                log.append(guild_id, rid, level, user_id, prev=before)
+            self._dirty_resources.setdefault(guild_id, set()).update(changed)
+            return changed
+
+    def drain_dirty_resources(self, guild_id: int = 0) -> set[str]:
+        """Returns the ids of the guild's resources changed since the last call, and clears the set."""
+        with self._lock:
+            return self._dirty_resources.pop(guild_id, set())
+
+    def mark_resources_dirty(self, resource_ids, guild_id: int = 0):
+        """Puts resources back in the guild's change feed (e.g. after a failed report refresh)."""
+        with self._lock:
+            self._dirty_resources.setdefault(guild_id, set()).update(resource_ids)
 
-    def get_resource(self, resource_id: str):
-        return self.resources_table.get(self.Resource.id == resource_id)
+    def get_resource(self, resource_id: str, guild_id: int = 0):
+        return self._with_demand(self._table('resources').get(resource_id), guild_id)
 
-    def get_all_by_demand(self, levels: list[str]):
-        return self.resources_table.search(self.Resource.demand.one_of(levels))
+    def get_resource_by_name(self, name: str, guild_id: int = 0):
+        found = self._table('resources').lookup('name', name)
+        return self._with_demand(found[0], guild_id) if found else None
 
-    def get_all_resources(self):
-        return self.resources_table.all()
+    def _resource_index(self) -> ResourceIndex:
+        index = self._search_index
+        if index is None:
+            index = self._search_index = ResourceIndex(self._table('resources').values())
+        return index
 
-    # --- NEW Settings Functions ---
-    def get_setting(self, key: str):
+    def search_resource_names(self, query: str, limit: int = 25, guild_id: int = 0) -> list[str]:
+        """Ranked resource names for autocomplete; the guild's high/medium demand items rank higher."""
+        index = self._resource_index()
+        hot = [] if query.strip() else [r['id'] for r in self.get_all_by_demand(['high', 'medium'], guild_id)]
+        return index.search(query, self._demand_of(guild_id), limit, boosted=hot)
+
+    def resolve_resource(self, name: str, guild_id: int = 0):
+        """Returns the resource whose display name matches `name` (case-insensitive), or None."""
+        rid = self._resource_index().resolve(name)
+        return self.get_resource(rid, guild_id) if rid else None
+
+    def get_all_by_demand(self, levels: list[str], guild_id: int = 0):
+        resources, demand = self._table('resources'), self._table('demand')
+        found = []
+        for level in levels:
+            for row in demand.lookup(('guild_id', 'demand'), (guild_id, level)):
+                if (doc := resources.get(row['resource_id'])) is not None:
+                    doc['demand'] = level
+                    found.append(doc)
+        return found
+
+    def get_all_resources(self, guild_id: int = 0):
+        demand_of = self._demand_of(guild_id)
+        return [dict(doc, demand=demand_of(doc['id'])) for doc in self._table('resources').values()]
+
+    # --- Demand History ---
+    # Changes go to the append-only demand log; records older than RETAIN_DAYS are folded into
+    # the demand_daily table by compact_demand_log().
+    def _history(self) -> DemandLog:
+        """The demand log; a brand-new one starts from a snapshot of the current levels."""
+        if not self._log_seeded:
+            with self._lock:
+                if not len(self.demand_log):
+                    for row in self._table('demand').values():
+                        if row['demand'] != 'low':
+                            self.demand_log.append(row['guild_id'], row['resource_id'], row['demand'], kind=SNAPSHOT)
+                self._log_seeded = True
+        return self.demand_log
+
+    def compact_demand_log(self, now: float | None = None) -> int:
+        """Folds log records older than RETAIN_DAYS (whole UTC days) into demand_daily; returns how many."""
+        now = time.time() if now is None else now
+        cutoff = int(now - RETAIN_DAYS * DAY)
+        cutoff -= cutoff % DAY
+        with self._lock:
+            log = self._history()
+            if log.start is None or log.start >= cutoff:
+                return 0
+            rows = daily_summaries(log.events(until=cutoff), cutoff)
+            with self.transaction():
+                for row in rows:
+                    self._upsert('demand_daily', row)
+            return log.compact(cutoff)
+
+    def demand_trends(self, guild_id: int = 0, days: int = 7, now: float | None = None) -> list[dict]:
+        """Hours at high / medium demand and level changes per resource over the last `days` days.
+
+        Returns one dict per resource with any of those, with 'id', 'name', 'high_hours',
+        'medium_hours' and 'flips'.  Days already compacted count from their daily totals.
+        """
+        until = time.time() if now is None else now
+        since = until - days * DAY
+        log = self._history()
+        start = log.start if log.start is not None else until
+        stats = {}
+
+        def entry(rid):
+            return stats.setdefault(rid, {'high_s': 0.0, 'medium_s': 0.0, 'flips': 0})
+        if since < start:
+            first = time.strftime('%Y-%m-%d', time.gmtime(since))
+            last = time.strftime('%Y-%m-%d', time.gmtime(start))
+            for row in self._table('demand_daily').lookup('guild_id', guild_id):
+                if first <= row['day'] < last:
+                    e = entry(row['resource_id'])
+                    e['high_s'] += row['high_s']
+                    e['medium_s'] += row['medium_s']
+                    e['flips'] += row['flips']
+        # only the window is read: the levels at its start come with it
+        lo = max(since, start)
+        levels, events = log.window(guild_id, lo, until)
+        events = [Event(int(lo), guild_id, 0, rid, level, SNAPSHOT) for rid, level in levels.items()] + events
+        for (_, rid), spent in level_seconds(events, since, until).items():
+            e = entry(rid)
+            e['high_s'] += spent['high']
+            e['medium_s'] += spent['medium']
+        for (_, rid), n in flips(events, since, until).items():
+            entry(rid)['flips'] += n
+
+        resources = self._table('resources')
+        out = []
+        for rid, e in stats.items():
+            doc = resources.get(rid)
+            out.append({'id': rid, 'name': doc['name'] if doc else rid, 'high_hours': e['high_s'] / 3600,
+                        'medium_hours': e['medium_s'] / 3600, 'flips': e['flips']})
+        return out
+
+    # --- Demand Votes ---
+    # In vote mode a member's select is a vote; the level follows the decayed tally of all votes.
+    def _half_life(self, guild_id: int) -> float:
+        return float(self.get_setting('vote_half_life_hours', guild_id) or HALF_LIFE_HOURS) * 3600
+
+    def _reset_votes(self, guild_id: int, resource_ids):
+        # a direct set overrides the votes: they are dropped, so decay cannot undo it and voting starts afresh
+        votes, tallies = self._table('demand_votes'), self._table('vote_tallies')
+        for rid in resource_ids:
+            if tallies.get((guild_id, rid)) is not None:
+                self._delete('vote_tallies', (guild_id, rid))
+            for vote in votes.lookup(('guild_id', 'resource_id'), (guild_id, rid)):
+                self._delete('demand_votes', (guild_id, rid, vote['user_id']))
+
+    def _follow_tally(self, guild_id: int, resource_id: str, level: str, user_id: int) -> bool:
+        # only a threshold crossing touches the demand level (and so the report posts)
+        before = self._demand_of(guild_id)(resource_id)
+        if level == before:
+            return False
+        log = self._history()   # seeded from the levels as they were before this change
+        self._upsert('demand', {'guild_id': guild_id, 'resource_id': resource_id, 'demand': level})
+        log.append(guild_id, resource_id, level, user_id, prev=before)
+        self._dirty_resources.setdefault(guild_id, set()).add(resource_id)
+        return True
+
+    def cast_vote(self, resource_id: str, level: str, guild_id: int = 0, user_id: int = 0,
+                  now: float | None = None) -> dict | None:
+        """Records a member's vote; returns {'score', 'level', 'changed'} or None for an unknown resource.
+
+        The voter's earlier vote on the resource is replaced.  'changed' tells whether the
+        effective level crossed a threshold.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._table('resources').get(resource_id) is None:
+                return None
+            half_life = self._half_life(guild_id)
+            old = self._table('demand_votes').get((guild_id, resource_id, user_id))
+            score = apply_vote(self._table('vote_tallies').get((guild_id, resource_id)), old, level, now, half_life)
+            effective = level_for(score)
+            with self.transaction():
+                self._upsert('demand_votes', {'guild_id': guild_id, 'resource_id': resource_id, 'user_id': user_id,
+                                              'level': level, 'ts': now})
+                self._upsert('vote_tallies', {'guild_id': guild_id, 'resource_id': resource_id,
+                                              'score': score, 'as_of': now})
+                changed = self._follow_tally(guild_id, resource_id, effective, user_id)
+            return {'score': score, 'level': effective, 'changed': changed}
+
+    def decay_votes(self, guild_id: int = 0, now: float | None = None) -> set[str]:
+        """Moves each voted resource's level to where its faded tally now stands; returns those that moved."""
+        now = time.time() if now is None else now
+        moved = set()
+        with self._lock:
+            half_life = self._half_life(guild_id)
+            with self.transaction():
+                resources = self._table('resources')
+                for tally in self._table('vote_tallies').lookup('guild_id', guild_id):
+                    if resources.get(tally['resource_id']) is None:
+                        continue   # dropped from the sheet
+                    level = level_for(decay(tally['score'], tally['as_of'], now, half_life))
+                    if self._follow_tally(guild_id, tally['resource_id'], level, 0):
+                        moved.add(tally['resource_id'])
+        return moved
+
+    # --- Settings Functions ---
+    # Settings are per guild; guild 0 holds the bot-wide ones (sheet sync state, loop interval).
+    def get_setting(self, key: str, guild_id: int = 0):
         """Gets a setting value from the database."""
-        result = self.settings_table.get(self.Setting.key == key)
+        result = self._table('settings').get((guild_id, key))
         return result['value'] if result else None
 
-    def set_setting(self, key: str, value):
+    def set_setting(self, key: str, value, guild_id: int = 0):
         """Saves a setting value to the database."""
-        self.settings_table.upsert({'key': key, 'value': value}, self.Setting.key == key)
+        self._upsert('settings', {'guild_id': guild_id, 'key': key, 'value': value})
+
+    def delete_setting(self, key: str, guild_id: int = 0):
+        """Removes a setting from the database."""
+        self._delete('settings', (guild_id, key))
+
+    def get_settings_with_prefix(self, prefix: str, guild_id: int = 0) -> dict:
+        """Returns every setting of the guild whose key starts with `prefix` as a {key: value} dict."""
+        return {s['key']: s['value'] for s in self._table('settings').lookup('guild_id', guild_id)
+                if s['key'].startswith(prefix)}
+
+    def get_report_channels(self) -> dict[int, int]:
+        """{guild_id: report channel id} for every guild that ran /report start."""
+        return {s['guild_id']: s['value'] for s in self._table('settings').lookup('key', 'report_channel_id')}
+
+    def adopt_legacy_guild(self, guild_id: int) -> dict[str, int]:
+        """Moves data written before guild support (guild 0) to `guild_id`; returns counts per table.
+
+        Bot-wide settings stay where they are.  Safe to call again: there is nothing left to move.
+        """
+        moved = {'settings': 0, 'demand': 0, 'missions': 0}
+        with self.transaction():
+            for s in self._table('settings').lookup('guild_id', 0):
+                if s['key'] not in BOT_SETTINGS:
+                    self._upsert('settings', dict(s, guild_id=guild_id))
+                    self._delete('settings', (0, s['key']))
+                    moved['settings'] += 1
+            for row in self._table('demand').values():
+                if row['guild_id'] == 0:
+                    self._upsert('demand', dict(row, guild_id=guild_id))
+                    self._delete('demand', (0, row['resource_id']))
+                    moved['demand'] += 1
+            for mission in self._table('missions').lookup('guild_id', 0):
+                self._upsert('missions', dict(mission, guild_id=guild_id))
+                moved['missions'] += 1
+            self.mark_resources_dirty(self.drain_dirty_resources(0), guild_id)
+        return moved
 
     # --- Mission Functions ---
-    def create_mission(self, mission_id: int, message_id: int, channel_id: int, creator_id: int, details: str, time: str):
-        self.missions_table.insert({
+    def create_mission(self, mission_id: int, message_id: int, channel_id: int, creator_id: int, details: str, time: str,
+                       guild_id: int = 0):
+        self._upsert('missions', {
             'id': mission_id,
             'message_id': message_id,
+            'guild_id': guild_id,
             'channel_id': channel_id,
             'creator_id': creator_id,
             'details': details,
@@ -104,21 +549,99 @@ class MentatDB:
         })
 
     def get_mission(self, message_id: int):
-        return self.missions_table.get(self.Mission.message_id == message_id)
+        return self._table('missions').get(message_id)
+
+    def get_all_missions(self, guild_id: int | None = None):
+        """Every mission, or only those of one guild."""
+        missions = self._table('missions')
+        return missions.values() if guild_id is None else missions.lookup('guild_id', guild_id)
 
-    def get_all_missions(self):
-        return self.missions_table.all()
+    def get_missions_page(self, guild_id: int = 0, since: datetime.datetime | None = None, channel_id: int | None = None,
+                          creator_id: int | None = None, participant_id: int | None = None, offset: int = 0,
+                          limit: int = 10) -> tuple[list[dict], int]:
+        """Missions starting at or after `since` in start order, as (`limit` missions from `offset`, total).
+
+        Narrowed to one channel, creator or participant (the first given); served from a sorted index.
+        """
+        if channel_id is not None:
+            partition, value = ('channel_id',), (channel_id,)
+        elif creator_id is not None:
+            partition, value = ('guild_id', 'creator_id'), (guild_id, creator_id)
+        elif participant_id is not None:
+            partition, value = ('guild_id', 'participants'), (guild_id, participant_id)
+        else:
+            partition, value = ('guild_id',), (guild_id,)
+        lo = since.timestamp() if since else None
+        return self._table('missions').range(partition, value, lo, None, offset, limit)
 
     def update_mission_participants(self, message_id: int, participants: list[int]):
-        self.missions_table.update({'participants': participants}, self.Mission.message_id == message_id)
+        self._update('missions', message_id, {'participants': participants})
+
+    def add_mission_participant(self, message_id: int, user_id: int) -> bool | None:
+        """Adds a user to the roster in one step; False if already in it, None if no such mission."""
+        return self._change_roster(message_id, user_id, join=True)
+
+    def remove_mission_participant(self, message_id: int, user_id: int) -> bool | None:
+        """Removes a user from the roster in one step; False if not in it, None if no such mission."""
+        return self._change_roster(message_id, user_id, join=False)
+
+    def _change_roster(self, message_id: int, user_id: int, join: bool) -> bool | None:
+        # read-modify-write under the write lock, so concurrent clicks cannot drop each other
+        with self._lock:
+            mission = self._table('missions').get(message_id)
+            if mission is None:
+                return None
+            participants = mission['participants']
+            if (user_id in participants) == join:
+                return False
+            if join:
+                participants.append(user_id)
+            else:
+                participants.remove(user_id)
+            return self._update('missions', message_id, {'participants': participants})
 
     def delete_mission(self, message_id: int):
-        self.missions_table.remove(self.Mission.message_id == message_id)
+        self._delete('missions', message_id)
+
+    # --- Report Message Registry ---
+    def get_report_message(self, guild_id: int, channel_id: int, resource_id: str):
+        return self._table('report_messages').get((guild_id, channel_id, resource_id))
+
+    def get_report_messages(self, channel_id: int | None = None, kind: str | None = None) -> list[dict]:
+        """Every registered report post (in one channel if given), optionally only one kind (single/digest)."""
+        cache = self._table('report_messages')
+        rows = cache.values() if channel_id is None else cache.lookup('channel_id', channel_id)
+        return [r for r in rows if kind is None or r['kind'] == kind]
+
+    def set_report_message(self, guild_id: int, channel_id: int, resource_id: str, message_id: int,
+                           fingerprint: str | None = None, kind: str = 'single'):
+        self._upsert('report_messages', {'guild_id': guild_id, 'channel_id': channel_id, 'resource_id': resource_id,
+                                         'message_id': message_id, 'kind': kind, 'fingerprint': fingerprint})
+
+    def delete_report_messages(self, keys: list[tuple]):
+        """Forgets several (guild_id, channel_id, resource_id) posts in one transaction."""
+        with self.transaction():
+            for key in keys:
+                self._delete('report_messages', tuple(key))
+
+    def adopt_legacy_report_settings(self, guild_id: int, channel_id: int) -> int:
+        """Moves old msg_/fp_ and digest_/dfp_ settings into the registry; returns how many moved."""
+        moved = 0
+        with self.transaction():
+            for prefix, fp_prefix, kind, rkey in (('msg_', 'fp_', 'single', '{}'), ('digest_', 'dfp_', 'digest', 'digest:{}')):
+                for key, mid in self.get_settings_with_prefix(prefix, guild_id).items():
+                    name = key[len(prefix):]
+                    fp = self.get_setting(fp_prefix + name, guild_id)
+                    self.set_report_message(guild_id, channel_id, rkey.format(name), int(mid), fp, kind)
+                    self.delete_setting(key, guild_id)
+                    self.delete_setting(fp_prefix + name, guild_id)
+                    moved += 1
+        return moved
 
     # --- User Settings Functions ---
     def set_user_timezone(self, user_id: int, timezone: str):
-        self.user_settings_table.upsert({'user_id': user_id, 'timezone': timezone}, self.UserSetting.user_id == user_id)
+        self._upsert('user_settings', {'user_id': user_id, 'timezone': timezone})
 
     def get_user_timezone(self, user_id: int):
-        result = self.user_settings_table.get(self.UserSetting.user_id == user_id)
-        return result['timezone'] if result else None
\ No newline at end of file
+        result = self._table('user_settings').get(user_id)
+        return result['timezone'] if result else None
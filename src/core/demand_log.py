@@ -0,0 +1,255 @@
+# ──────────────── src/core/demand_log.py ────────────────
+"""Append-only history of demand changes, as fixed-width records.
+
+Every change is one 28-byte record (time, guild, user, resource number, level, kind, previous
+level) appended to the log file; resource ids are numbered in an append-only side file
+(`<log>.ids`, one id per line) and keep their number for good.  Records are written in time
+order, so any time range is two binary searches away, and with each record's previous level
+the state at the start of a range needs no scan of what came before (`window()`).
+`compact()` cuts off the old records (the caller folds them into per-day summaries first)
+and starts the file with a snapshot of every level at the cut-off.
+"""
+import bisect
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple
+
+RECORD = struct.Struct('<IQQIBBBx')   # ts, guild_id, user_id, resource number, level, kind, prev
+LEVELS = ('low', 'medium', 'high')
+CHANGE, SNAPSHOT = 0, 1               # a user's change / the level carried over by a compaction
+NO_PREV = 0                           # prev byte: not recorded; otherwise the level's index + 1
+DAY = 86400
+RETAIN_DAYS = 35                      # raw records kept before they are folded into daily summaries
+
+
+class Event(NamedTuple):
+    ts: int
+    guild_id: int
+    user_id: int
+    resource_id: str
+    level: str
+    kind: int
+    prev: str | None = None   # the level before this record, when it was recorded
+
+
+class _Stamps:
+    """The records' timestamps as a sequence, for bisect."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def __len__(self):
+        return len(self.log)
+
+    def __getitem__(self, i):
+        return RECORD.unpack_from(self.log._buf, i * RECORD.size)[0]
+
+
+class DemandLog:
+    def __init__(self, path: str | None = None):
+        """Opens (or creates) the log at `path`; without a path it lives in memory only."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._buf = bytearray()
+        self._ids: list[str] = []
+        self._numbers: dict[str, int] = {}
+        self._latest: dict[int, dict[int, int]] = {}   # guild -> resource number -> its last level
+        if path and os.path.exists(path):
+            with open(path, 'rb') as fh:
+                self._buf = bytearray(fh.read())
+            # a record torn by a crash mid-write is dropped
+            del self._buf[len(self._buf) - len(self._buf) % RECORD.size:]
+            if os.path.exists(path + '.ids'):
+                with open(path + '.ids', encoding='utf-8') as fh:
+                    for line in fh:
+                        self._intern(line.rstrip('\n'))
+            for _, gid, _, number, level, _, _ in RECORD.iter_unpack(self._buf):
+                self._latest.setdefault(gid, {})[number] = level
+
+    @classmethod
+    def beside(cls, storage) -> 'DemandLog':
+        """The log kept next to a storage backend's file (in memory for an in-memory database)."""
+        path = getattr(storage, 'path', None)
+        if not path or path == ':memory:':
+            return cls()
+        return cls(os.path.join(os.path.dirname(path), 'demand_log.bin'))
+
+    def __len__(self):
+        return len(self._buf) // RECORD.size
+
+    @property
+    def start(self) -> int | None:
+        return RECORD.unpack_from(self._buf, 0)[0] if self._buf else None
+
+    # ─── writing ──────────────────────────────────────────────
+    def _intern(self, resource_id: str) -> int:
+        number = self._numbers.get(resource_id)
+        if number is None:
+            number = self._numbers[resource_id] = len(self._ids)
+            self._ids.append(resource_id)
+        return number
+
+    def append(self, guild_id: int, resource_id: str, level: str, user_id: int = 0,
+               ts: float | None = None, kind: int = CHANGE, prev: str | None = None) -> Event:
+        """Logs `level`; `prev` is the level it replaces ('low' when there was none)."""
+        with self._lock:
+            # never step back in time, so the file stays sorted for bisect
+            last = RECORD.unpack_from(self._buf, len(self._buf) - RECORD.size)[0] if self._buf else 0
+            ts = max(int(time.time() if ts is None else ts), last)
+            new_id = resource_id not in self._numbers
+            number = self._intern(resource_id)
+            record = RECORD.pack(ts, guild_id, user_id, number, LEVELS.index(level), kind,
+                                 NO_PREV if prev is None else LEVELS.index(prev) + 1)
+            self._buf += record
+            self._latest.setdefault(guild_id, {})[number] = LEVELS.index(level)
+            if self.path:
+                if new_id:
+                    with open(self.path + '.ids', 'a', encoding='utf-8') as fh:
+                        fh.write(resource_id + '\n')
+                with open(self.path, 'ab') as fh:
+                    fh.write(record)
+        return Event(ts, guild_id, user_id, resource_id, level, kind, prev)
+
+    # ─── reading ──────────────────────────────────────────────
+    def _event(self, i: int) -> Event:
+        return self._decode(RECORD.unpack_from(self._buf, i * RECORD.size))
+
+    def _decode(self, fields: tuple) -> Event:
+        ts, gid, uid, number, level, kind, prev = fields
+        return Event(ts, gid, uid, self._ids[number], LEVELS[level], kind,
+                     None if prev == NO_PREV else LEVELS[prev - 1])
+
+    def events(self, since: float | None = None, until: float | None = None) -> list[Event]:
+        """Records with since <= ts < until, oldest first."""
+        with self._lock:
+            stamps = _Stamps(self)
+            lo = 0 if since is None else bisect.bisect_left(stamps, since)
+            hi = len(self) if until is None else bisect.bisect_left(stamps, until)
+            return [self._event(i) for i in range(lo, hi)]
+
+    def window(self, guild_id: int, since: float, until: float) -> tuple[dict[str, str], list[Event]]:
+        """The guild's levels just before `since` and its records with since <= ts < until.
+
+        Only the records from `since` on are read: a resource's level before the range is the
+        previous level of its first record in or after the range, or its latest level if it
+        has none.  Before the first record of the log nothing is known, so the levels are empty.
+        """
+        with self._lock:
+            lo = bisect.bisect_left(_Stamps(self), since)
+            hi = bisect.bisect_left(_Stamps(self), until, lo)
+            events, first_prev = [], {}
+            records = RECORD.iter_unpack(memoryview(self._buf)[lo * RECORD.size:])
+            for i, fields in enumerate(records, lo):
+                if fields[1] != guild_id:
+                    continue
+                first_prev.setdefault(fields[3], fields[6])
+                if i < hi:
+                    events.append(self._decode(fields))
+            if not lo:
+                return {}, events
+            levels = dict(self._latest.get(guild_id, {}))
+            unknown = set()
+            for number, prev in first_prev.items():
+                if prev == NO_PREV:
+                    unknown.add(number)   # written before prev levels were recorded
+                else:
+                    levels[number] = prev - 1
+            # fall back to scanning back for the last earlier record of each of those
+            i = lo
+            while unknown and i:
+                i -= 1
+                _, gid, _, number, level, _, _ = RECORD.unpack_from(self._buf, i * RECORD.size)
+                if gid == guild_id and number in unknown:
+                    levels[number] = level
+                    unknown.discard(number)
+            for number in unknown:
+                levels.pop(number, None)   # no record before the range
+            return {self._ids[n]: LEVELS[level] for n, level in levels.items() if level}, events
+
+    # ─── compaction ───────────────────────────────────────────
+    def compact(self, before: int) -> int:
+        """Drops the records older than `before`, keeping each non-low level as a snapshot; returns how many went."""
+        with self._lock:
+            cut = bisect.bisect_left(_Stamps(self), before)
+            if not cut:
+                return 0
+            state = {}
+            for _, gid, _, number, level, _, _ in RECORD.iter_unpack(memoryview(self._buf)[:cut * RECORD.size]):
+                state[(gid, number)] = level
+            buf = bytearray()
+            for (gid, number), level in state.items():
+                if level:
+                    buf += RECORD.pack(before, gid, 0, number, level, SNAPSHOT, level + 1)
+            buf += self._buf[cut * RECORD.size:]
+            # resource numbers never change, so the .ids file stays valid for the old and the new
+            # records alike and swapping the one file is atomic
+            if self.path:
+                with open(self.path + '.tmp', 'wb') as fh:
+                    fh.write(buf)
+                os.replace(self.path + '.tmp', self.path)
+            self._buf = buf
+            return cut
+
+
+# ─── analytics ──────────────────────────────────────────────
+def intervals(events, until: float):
+    """(guild_id, resource_id, level, start, end) for each stretch a resource spent at one level."""
+    current = {}
+    for e in events:
+        if e.ts >= until:
+            break
+        key = (e.guild_id, e.resource_id)
+        if key in current:
+            level, start = current[key]
+            yield (*key, level, start, e.ts)
+        current[key] = (e.level, e.ts)
+    for key, (level, start) in current.items():
+        yield (*key, level, start, until)
+
+
+def level_seconds(events, since: float, until: float) -> dict[tuple, dict[str, float]]:
+    """Seconds each (guild_id, resource_id) spent at medium and high within [since, until)."""
+    totals = {}
+    for gid, rid, level, start, end in intervals(events, until):
+        overlap = min(end, until) - max(start, since)
+        if level != 'low' and overlap > 0:
+            spent = totals.setdefault((gid, rid), {'medium': 0.0, 'high': 0.0})
+            spent[level] += overlap
+    return totals
+
+
+def flips(events, since: float, until: float) -> dict[tuple, int]:
+    """How many times each (guild_id, resource_id) changed level within [since, until)."""
+    counts = {}
+    for e in events:
+        if e.kind == CHANGE and since <= e.ts < until:
+            counts[(e.guild_id, e.resource_id)] = counts.get((e.guild_id, e.resource_id), 0) + 1
+    return counts
+
+
+def daily_summaries(events, until: int) -> list[dict]:
+    """Per (guild, resource, UTC day) totals of the events before `until`: rows for the demand_daily table."""
+    days = {}
+
+    def row(gid, rid, day):
+        key = (gid, rid, day)
+        if key not in days:
+            days[key] = {'guild_id': gid, 'resource_id': rid,
+                         'day': time.strftime('%Y-%m-%d', time.gmtime(day)), 'high_s': 0, 'medium_s': 0, 'flips': 0}
+        return days[key]
+
+    for gid, rid, level, start, end in intervals(events, until):
+        if level == 'low':
+            continue
+        day = start - start % DAY
+        while day < end:
+            spent = min(end, day + DAY) - max(start, day)
+            if spent > 0:
+                row(gid, rid, day)[f'{level}_s'] += spent
+            day += DAY
+    for e in events:
+        if e.kind == CHANGE and e.ts < until:
+            row(e.guild_id, e.resource_id, e.ts - e.ts % DAY)['flips'] += 1
+    return list(days.values())
@@ -0,0 +1,61 @@
+# ──────────────── src/core/digest.py ────────────────
+"""Slot bookkeeping for digest reports (many resources packed into one message).
+
+A slot is one report message, named "<group>:<n>", holding up to DIGEST_SIZE resources of the
+same group.  Resources keep their slot until they leave the group, so one demand change
+re-renders at most the slot it left and the slot it joined.
+"""
+
+DIGEST_SIZE = 10          # Discord allows 10 embeds per message
+GROUPINGS = ('demand', 'type', 'tier')
+
+
+def group_of(item: dict, group_by: str) -> str:
+    if group_by == 'type':
+        return item.get('type') or 'Other'
+    if group_by == 'tier':
+        return f"Tier {item.get('tier', 0)}"
+    return item['demand']
+
+
+def slot_group(slot: str) -> str:
+    return slot.rsplit(':', 1)[0]
+
+
+def assign_slots(assigned: dict[str, str], live: dict[str, dict], group_by: str, ids=None):
+    """Moves resources in and out of slots.
+
+    `assigned` maps resource id -> slot and is updated in place; `live` holds the resources that
+    should appear in the digest.  Only `ids` are reconsidered (all known ids by default).
+    Returns (changes, touched): the {id: slot or None} assignments to persist and the slots
+    whose content changed.
+    """
+    members: dict[str, set[str]] = {}
+    for rid, slot in assigned.items():
+        members.setdefault(slot, set()).add(rid)
+
+    changes, touched = {}, set()
+    for rid in sorted(set(assigned) | set(live) if ids is None else ids):
+        item = live.get(rid)
+        group = group_of(item, group_by) if item else None
+        slot = assigned.get(rid)
+        if slot is not None and slot_group(slot) != group:
+            members[slot].discard(rid)
+            touched.add(slot)
+            del assigned[rid]
+            changes[rid] = slot = None
+        if group is None:
+            continue
+        if slot is None:
+            n = 0
+            while len(members.get(f"{group}:{n}", ())) >= DIGEST_SIZE:
+                n += 1
+            slot = f"{group}:{n}"
+            members.setdefault(slot, set()).add(rid)
+            assigned[rid] = changes[rid] = slot
+        touched.add(slot)
+    return changes, touched
+
+
+def slot_members(assigned: dict[str, str], slot: str) -> list[str]:
+    return [rid for rid, s in assigned.items() if s == slot]
@@ -0,0 +1,245 @@
+# ──────────────── src/core/metrics.py ────────────────
+"""In-process metrics: counters, gauges and latency histograms, exported as Prometheus text.
+
+Everything records into the module-level `metrics` registry.  `timed()` wraps a block or an
+async function, `instrument_http()` counts every Discord REST call by route, and
+`serve()` exposes `/metrics` on a local port for a Prometheus scraper.
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from src.core.tracing import span, tracer
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+LOOP_LAG_INTERVAL = 0.5   # seconds between event-loop lag probes
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (the max for the last bucket)."""
+        if not self.count:
+            return 0.0
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= q * self.count:
+                return min(bound, self.max)
+        return self.max
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _fmt(labels: tuple, extra: tuple = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.gauges: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, Histogram]] = {}
+        self.help: dict[str, str] = {}
+        self._collectors = []
+        self.started = time.time()
+
+    # ─── recording ────────────────────────────────────────────
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram()
+            hist.observe(seconds)
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def add_collector(self, fn):
+        """`fn()` runs before every export, e.g. to refresh gauges read from elsewhere."""
+        self._collectors.append(fn)
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # ─── reading ──────────────────────────────────────────────
+    def collect(self):
+        for fn in self._collectors:
+            try:
+                fn()
+            except Exception as e:
+                print(f"--- METRICS COLLECTOR ERROR: {e}")
+
+    def histogram(self, name: str) -> dict[tuple, Histogram]:
+        with self._lock:
+            return dict(self.histograms.get(name, {}))
+
+    def counter(self, name: str) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self.counters.get(name, {}))
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)."""
+        self.collect()
+        lines = []
+        with self._lock:
+            for kind, families in (('counter', self.counters), ('gauge', self.gauges)):
+                for name, series in sorted(families.items()):
+                    if name in self.help:
+                        lines.append(f'# HELP {name} {self.help[name]}')
+                    lines.append(f'# TYPE {name} {kind}')
+                    lines.extend(f'{name}{_fmt(k)} {v}' for k, v in sorted(series.items()))
+            for name, series in sorted(self.histograms.items()):
+                if name in self.help:
+                    lines.append(f'# HELP {name} {self.help[name]}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS, hist.counts):
+                        cumulative += n
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_fmt(key, (("le", le),))} {cumulative}')
+                    lines.append(f'{name}_sum{_fmt(key)} {hist.sum}')
+                    lines.append(f'{name}_count{_fmt(key)} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+metrics.describe('mentat_command_seconds', 'Slash command handling time.')
+metrics.describe('mentat_component_seconds', 'Button / select / modal callback time.')
+metrics.describe('mentat_db_seconds', 'MentatDB call time, including the wait for a worker thread.')
+metrics.describe('mentat_sheet_sync_seconds', 'Google Sheet sync time by phase.')
+metrics.describe('mentat_report_cycle_seconds', 'One guild report refresh in the report loop.')
+metrics.describe('mentat_discord_api_seconds', 'Discord REST call time by route; _count is the call count.')
+metrics.describe('mentat_discord_rate_limits_total', 'HTTP 429 responses received from Discord.')
+metrics.describe('mentat_loop_lag_seconds', 'How late the event loop ran a timer it was due to run.')
+metrics.describe('mentat_startup_phase_seconds', 'Duration of each cold-start phase; background phases overlap the rest.')
+metrics.describe('mentat_startup_seconds', 'Process start to online (on_ready).')
+
+
+def timed(name: str, **labels):
+    """Decorator recording how long an async function takes; it is also traced (see tracing.py)."""
+    trace_name = ' '.join(str(v) for v in labels.values()) or name
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def inner(*args, **kwargs):
+            with metrics.time(name, **labels), tracer.trace(trace_name):
+                return await fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+# ─── Discord REST calls ─────────────────────────────────────
+class _RateLimitCounter(logging.Handler):
+    # discord.http retries 429s internally and only logs them, so count the log records
+    def emit(self, record):
+        msg = str(record.msg)
+        if msg.startswith('We are being rate limited'):
+            metrics.inc('mentat_discord_rate_limits_total', scope='route')
+        elif msg.startswith('Global rate limit has been hit'):
+            metrics.inc('mentat_discord_rate_limits_total', scope='global')
+
+
+def instrument_http(http):
+    """Times every request made through `http` (a discord HTTPClient), labelled by route template."""
+    request = http.request
+
+    async def timed_request(route, **kwargs):
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            with span('discord'):
+                return await request(route, **kwargs)
+        except Exception as e:
+            status = str(getattr(e, 'status', type(e).__name__))
+            raise
+        finally:
+            label = f'{route.method} {route.path}'
+            metrics.observe('mentat_discord_api_seconds', time.perf_counter() - started, route=label)
+            if status != 'ok':
+                metrics.inc('mentat_discord_api_errors_total', route=label, status=status)
+
+    http.request = timed_request
+    http_log = logging.getLogger('discord.http')
+    if not any(isinstance(h, _RateLimitCounter) for h in http_log.handlers):
+        http_log.addHandler(_RateLimitCounter(logging.WARNING))
+
+
+# ─── event loop lag ─────────────────────────────────────────
+async def watch_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Sleeps `interval` over and over and records how late each wake-up was."""
+    loop = asyncio.get_running_loop()
+    while True:
+        due = loop.time() + interval
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - due)
+        metrics.observe('mentat_loop_lag_seconds', lag)
+        metrics.set('mentat_loop_lag_last_seconds', lag)
+
+
+# ─── /metrics endpoint ──────────────────────────────────────
+async def serve(port: int, host: str = '127.0.0.1'):
+    """Starts a minimal HTTP server answering GET /metrics; returns the asyncio server."""
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass  # skip headers
+            parts = request.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', metrics.render().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(f'HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                         f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
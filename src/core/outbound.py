@@ -0,0 +1,210 @@
+# ──────────────── src/core/outbound.py ────────────────
+"""Central outbound queue for Discord API calls.
+
+Jobs are coroutine factories.  They run in priority order (user-visible edits, then background
+rebuilds), at most `per_bucket` at a time per route bucket (e.g. one channel), and a queued job
+is replaced when a newer one arrives with the same `dedupe_key` — both callers then receive the
+newer job's result.  A job answered 429 goes back in the queue, not before its retry_after.
+
+Interaction replies skip the queue: each goes to its own webhook token, outside the bot's
+route buckets, and must land within Discord's 3 s deadline, so it runs at once in the caller.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from enum import IntEnum
+import discord
+from src.core.tracing import span
+
+RATE_LIMIT_RETRIES = 3
+
+
+class Priority(IntEnum):
+    INTERACTION = 0   # replies to a user's click or command
+    EDIT = 1          # visible updates caused by a user action
+    BACKGROUND = 2    # scheduled report rebuilds, cleanups
+
+
+class _Job:
+    __slots__ = ('factory', 'priority', 'bucket', 'dedupe_key', 'future', 'queued_at', 'started',
+                 'attempts', 'not_before')
+
+    def __init__(self, factory, priority, bucket, dedupe_key, future):
+        self.factory, self.priority, self.bucket, self.dedupe_key = factory, priority, bucket, dedupe_key
+        self.future, self.queued_at, self.started = future, time.monotonic(), False
+        self.attempts, self.not_before = 0, 0.0
+
+
+def _retry_delay(error: discord.HTTPException, attempt: int) -> float:
+    retry_after = getattr(error, 'retry_after', None)
+    return 2 ** attempt if retry_after is None else retry_after
+
+
+class OutboundQueue:
+    def __init__(self, workers: int = 8, per_bucket: int = 2):
+        self.workers = workers
+        self.per_bucket = per_bucket
+        self._queue: asyncio.PriorityQueue | None = None
+        self._order = itertools.count()
+        self._queued: dict = {}                       # dedupe_key -> queued job
+        self._running: dict[str, int] = {}            # bucket -> jobs in flight
+        self._parked: dict[str, list] = {}             # bucket -> heap of jobs waiting for a slot
+        self._tasks: list[asyncio.Task] = []
+
+        # stats
+        self.submitted = 0
+        self.completed = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self._depth = {p: 0 for p in Priority}
+        self._waits = {p: deque(maxlen=500) for p in Priority}
+
+    # ─── lifecycle ────────────────────────────────────────────
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ─── submit ───────────────────────────────────────────────
+    async def submit(self, factory, priority: Priority = Priority.EDIT, bucket: str = 'global', dedupe_key=None):
+        """Queues `factory()` and returns its result once it has run."""
+        priority = Priority(priority)
+        if priority == Priority.INTERACTION:
+            return await self._reply(factory)
+        self._ensure_started()
+        self.submitted += 1
+        if dedupe_key is not None and (queued := self._queued.get(dedupe_key)) is not None:
+            # not started yet: run the newer call instead, at the more urgent priority of the two
+            queued.factory = factory
+            self.deduplicated += 1
+            if priority < queued.priority:
+                self._depth[queued.priority] -= 1
+                self._depth[priority] += 1
+                queued.priority = priority
+                self._queue.put_nowait((priority, next(self._order), queued))
+            return await asyncio.shield(queued.future)
+
+        job = _Job(factory, priority, bucket, dedupe_key, asyncio.get_running_loop().create_future())
+        if dedupe_key is not None:
+            self._queued[dedupe_key] = job
+        self._depth[priority] += 1
+        self._queue.put_nowait((priority, next(self._order), job))
+        return await asyncio.shield(job.future)
+
+    async def _reply(self, factory):
+        # runs in the caller's task: no worker slot is held, even through a 429 wait
+        self.submitted += 1
+        self._waits[Priority.INTERACTION].append(0.0)
+        try:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                try:
+                    return await factory()
+                except discord.HTTPException as e:
+                    if e.status != 429 or attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    self.rate_limited += 1
+                    await asyncio.sleep(_retry_delay(e, attempt))
+        finally:
+            self.completed += 1
+
+    # ─── workers ──────────────────────────────────────────────
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = await self._queue.get()
+            priority, _, job = entry
+            if job.started or priority != job.priority:
+                continue  # already ran, or superseded by a re-queue at higher priority
+            if (wait := job.not_before - time.monotonic()) > 0:
+                # a rate-limited job re-queued early (by a newer dedupe submit): hold it back
+                loop.call_later(wait, self._queue.put_nowait, entry)
+                continue
+            if self._running.get(job.bucket, 0) >= self.per_bucket:
+                # bucket is saturated: park the job so this worker can serve other buckets
+                heapq.heappush(self._parked.setdefault(job.bucket, []), entry)
+                continue
+            job.started = True
+            self._running[job.bucket] = self._running.get(job.bucket, 0) + 1
+            self._depth[job.priority] -= 1
+            if job.dedupe_key is not None:
+                self._queued.pop(job.dedupe_key, None)
+            self._waits[job.priority].append(time.monotonic() - job.queued_at)
+            try:
+                await self._run(job)
+            finally:
+                self._running[job.bucket] -= 1
+                if not self._running[job.bucket]:
+                    del self._running[job.bucket]
+                self._unpark(job.bucket)
+
+    def _unpark(self, bucket: str):
+        parked = self._parked.get(bucket)
+        while parked:
+            entry = heapq.heappop(parked)
+            if not entry[2].started and entry[0] == entry[2].priority:
+                self._queue.put_nowait(entry)
+                break
+        if parked is not None and not parked:
+            del self._parked[bucket]   # buckets come and go (one per channel); idle ones are not kept
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.factory()
+        except discord.HTTPException as e:
+            if e.status == 429 and job.attempts < RATE_LIMIT_RETRIES:
+                self.rate_limited += 1
+                return self._retry_later(job, _retry_delay(e, job.attempts))
+            job.future.set_exception(e)
+        except Exception as e:
+            job.future.set_exception(e)
+        else:
+            job.future.set_result(result)
+        self.completed += 1
+
+    def _retry_later(self, job: _Job, delay: float):
+        """Puts a rate-limited job back in the queue once `delay` has passed; the worker moves on."""
+        job.attempts += 1
+        job.started = False
+        job.not_before = time.monotonic() + delay
+        self._depth[job.priority] += 1
+        if job.dedupe_key is not None:
+            # newer edits of the same message fold into the retry, as they would into any queued job
+            self._queued.setdefault(job.dedupe_key, job)
+        asyncio.get_running_loop().call_later(delay, self._queue.put_nowait, (job.priority, next(self._order), job))
+
+    # ─── stats ────────────────────────────────────────────────
+    def stats(self) -> dict:
+        depth = {p.name.lower(): n for p, n in self._depth.items()}
+        waits = {}
+        for p, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[p.name.lower()] = {
+                'avg_ms': 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+                'p95_ms': 1000 * ordered[int(len(ordered) * 0.95) - 1] if ordered else 0.0,
+                'max_ms': 1000 * ordered[-1] if ordered else 0.0,
+            }
+        return {'depth': depth, 'submitted': self.submitted, 'completed': self.completed,
+                'deduplicated': self.deduplicated, 'rate_limited': self.rate_limited, 'wait': waits}
+
+
+def interaction_bucket(interaction) -> str:
+    """Each interaction is answered on its own webhook route, so replies never queue behind each other."""
+    return f'interaction:{interaction.id}'
+
+
+async def send(bot, factory, priority: Priority = Priority.EDIT, bucket: str = 'global', dedupe_key=None):
+    """Runs `factory()` through the bot's outbound queue, or directly if the bot has none."""
+    queue = getattr(bot, 'outbound', None)
+    with span('discord'):   # queue wait included: it is part of what the caller waits for
+        if isinstance(queue, OutboundQueue):
+            return await queue.submit(factory, priority, bucket, dedupe_key)
+        return await factory()
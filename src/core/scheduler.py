@@ -0,0 +1,81 @@
+# ──────────────── src/core/scheduler.py ────────────────
+"""Event-driven mission timers.
+
+Mission events (reminders before the start, expiry after the grace period) sit in a min-heap
+keyed by due time.  The runner sleeps until the earliest one is due, or until a new mission
+is added; a cancelled or rescheduled mission's entries are dropped lazily when they surface.
+Re-adding a mission replaces its entries, even with the same start, so it is never pinged twice.
+"""
+import asyncio
+import datetime
+import heapq
+import itertools
+import time
+
+REMIND, EXPIRE = 'remind', 'expire'
+EXPIRY_GRACE_SECONDS = 4 * 3600   # posts stay up this long after the start time
+
+
+class MissionScheduler:
+    def __init__(self, handler, reminders=(15,), grace: float = EXPIRY_GRACE_SECONDS, clock=time.time):
+        """`handler(kind, mission_id)` is awaited for each due event; `reminders` are minutes before start."""
+        self.handler = handler
+        self.reminders = tuple(reminders)
+        self.grace = grace
+        self.clock = clock
+        self._heap: list[tuple] = []            # (due, order, kind, mission_id, generation)
+        self._order = itertools.count()
+        self._current: dict[int, int] = {}      # mission_id -> generation (add call) of its live entries
+        self._wake = asyncio.Event()
+
+    def __len__(self):
+        return len(self._current)
+
+    # ─── updates ──────────────────────────────────────────────
+    def add(self, mission_id: int, start: datetime.datetime | str):
+        """Schedules (or reschedules) a mission; reminders already in the past are skipped."""
+        if isinstance(start, str):
+            start = datetime.datetime.fromisoformat(start)
+        ts = start.timestamp()
+        generation = self._current[mission_id] = next(self._order)
+        now = self.clock()
+        for minutes in self.reminders:
+            if (due := ts - minutes * 60) > now:
+                heapq.heappush(self._heap, (due, next(self._order), REMIND, mission_id, generation))
+        heapq.heappush(self._heap, (ts + self.grace, next(self._order), EXPIRE, mission_id, generation))
+        self._wake.set()
+
+    def discard(self, mission_id: int):
+        self._current.pop(mission_id, None)
+
+    # ─── due events ───────────────────────────────────────────
+    def _live(self, entry) -> bool:
+        return self._current.get(entry[3]) == entry[4]
+
+    def next_due(self) -> float | None:
+        while self._heap and not self._live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[tuple[str, int]]:
+        due = []
+        while (at := self.next_due()) is not None and at <= now:
+            _, _, kind, mission_id, _ = heapq.heappop(self._heap)
+            if kind == EXPIRE:
+                del self._current[mission_id]
+            due.append((kind, mission_id))
+        return due
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            for kind, mission_id in self.pop_due(self.clock()):
+                try:
+                    await self.handler(kind, mission_id)
+                except Exception as e:
+                    print(f"--- MISSION {kind.upper()} ERROR ({mission_id}): {e}")
+            at = self.next_due()
+            try:
+                await asyncio.wait_for(self._wake.wait(), None if at is None else max(0.0, at - self.clock()))
+            except asyncio.TimeoutError:
+                pass
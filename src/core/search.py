@@ -0,0 +1,118 @@
+# ──────────────── src/core/search.py ────────────────
+"""Precomputed resource name index for `/demand set` autocomplete."""
+from bisect import bisect_left
+
+# ranking tiers; demand adds less than one tier so it only reorders within a tier
+EXACT, PREFIX, TOKEN, SUBSTRING, FUZZY = 4, 3, 2, 1, 0
+DEMAND_BOOST = {'high': 0.5, 'medium': 0.25}
+# stop scanning a sorted prefix range after this many candidates per result slot
+SCAN_FACTOR = 4
+# minimum trigram (Jaccard) similarity for a fuzzy match
+FUZZY_CUTOFF = 0.2
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ResourceIndex:
+    """Name lookups that cost the same whether the catalogue holds 50 or 5 000 items.
+
+    Built once from the resources table (i.e. once per sheet sync).  Candidates come from sorted
+    name and token lists (bisect) and a trigram index; only those candidates are ranked.
+    """
+
+    def __init__(self, resources):
+        self.names: dict[str, str] = {}          # id -> display name
+        self.lower: dict[str, str] = {}          # id -> lower-cased name
+        self.gram_counts: dict[str, int] = {}
+        self.by_lower: dict[str, str] = {}       # lower-cased name -> id
+        self.sorted_names: list[tuple[str, str]] = []
+        self.sorted_tokens: list[tuple[str, str]] = []
+        self.trigrams: dict[str, set[str]] = {}
+        for r in resources:
+            rid, name = r['id'], r['name']
+            lname = name.lower()
+            self.names[rid], self.lower[rid] = name, lname
+            self.by_lower.setdefault(lname, rid)
+            self.sorted_names.append((lname, rid))
+            for token in set(lname.replace('-', ' ').replace(':', ' ').split()):
+                self.sorted_tokens.append((token, rid))
+            grams = _trigrams(lname)
+            self.gram_counts[rid] = len(grams)
+            for gram in grams:
+                self.trigrams.setdefault(gram, set()).add(rid)
+        self.sorted_names.sort()
+        self.sorted_tokens.sort()
+
+    def __len__(self):
+        return len(self.names)
+
+    def resolve(self, name: str) -> str | None:
+        """Maps a (case-insensitive) display name straight to its resource id."""
+        return self.by_lower.get(name.strip().lower())
+
+    @staticmethod
+    def _prefixed(sorted_list, prefix: str, cap: int):
+        i = bisect_left(sorted_list, (prefix, ''))
+        while i < len(sorted_list) and cap > 0 and sorted_list[i][0].startswith(prefix):
+            yield sorted_list[i]
+            i += 1
+            cap -= 1
+
+    def search(self, query: str, demand_of=None, limit: int = 25, boosted=()) -> list[str]:
+        """Returns up to `limit` display names ranked exact > prefix > token > substring > fuzzy.
+
+        `demand_of(id)` returns the current demand level and boosts high/medium items; for an
+        empty query the ids in `boosted` are offered alongside the first names alphabetically.
+        """
+        q = query.strip().lower()
+        demand_of = demand_of or (lambda rid: None)
+        cap = limit * SCAN_FACTOR
+        scores: dict[str, float] = {}
+
+        def offer(rid: str, score: float):
+            if score > scores.get(rid, -1):
+                scores[rid] = score
+
+        if not q:
+            for rid in boosted:
+                if rid in self.names:
+                    offer(rid, PREFIX)
+            for _, rid in self.sorted_names[:cap]:
+                offer(rid, PREFIX)
+        else:
+            if rid := self.by_lower.get(q):
+                offer(rid, EXACT)
+            for _, rid in self._prefixed(self.sorted_names, q, cap):
+                offer(rid, PREFIX)
+            for _, rid in self._prefixed(self.sorted_tokens, q, cap):
+                offer(rid, TOKEN)
+            if len(scores) < limit:
+                self._grams(q, offer)
+
+        ranked = sorted(scores, key=lambda rid: (-(scores[rid] + DEMAND_BOOST.get(demand_of(rid), 0)),
+                                                 self.lower[rid]))
+        return [self.names[rid] for rid in ranked[:limit]]
+
+    def _grams(self, q: str, offer):
+        # substring and fuzzy candidates are the names sharing a trigram with the query
+        if len(q) < 3:
+            # too short to share a whole trigram: scan the names for it instead
+            for lname, rid in self.sorted_names:
+                if q in lname:
+                    offer(rid, SUBSTRING)
+            return
+        grams = _trigrams(q)
+        hits: dict[str, int] = {}
+        for gram in grams:
+            for rid in self.trigrams.get(gram, ()):
+                hits[rid] = hits.get(rid, 0) + 1
+        for rid, shared in hits.items():
+            if q in self.lower[rid]:
+                offer(rid, SUBSTRING)
+                continue
+            similarity = shared / (len(grams) + self.gram_counts[rid] - shared)
+            if similarity >= FUZZY_CUTOFF:
+                offer(rid, FUZZY + similarity * 0.4)
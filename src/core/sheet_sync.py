@@ -0,0 +1,98 @@
+# ──────────────── src/core/sheet_sync.py ────────────────
+"""Incremental Google Sheet sync: conditional GET, streamed CSV parsing and a keyed diff."""
+import csv
+import datetime
+import io
+import time
+from dataclasses import dataclass, field
+
+# fields that come from the sheet; demand is owned by the bot and kept per guild
+SHEET_FIELDS = ('name', 'type', 'tier', 'details', 'image_url', 'dgt_slug')
+
+
+@dataclass
+class SyncReport:
+    """Outcome of one sheet sync."""
+    status: str                      # updated | unchanged | not_modified | empty | skipped | failed
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    unchanged: int = 0
+    changed_ids: list[str] = field(default_factory=list)
+    fetch_ms: float = 0.0
+    parse_ms: float = 0.0
+    apply_ms: float = 0.0
+    error: str | None = None
+    finished_at: str = field(default_factory=lambda: datetime.datetime.now(datetime.timezone.utc).isoformat())
+
+    @property
+    def total_ms(self) -> float:
+        return self.fetch_ms + self.parse_ms + self.apply_ms
+
+    def summary(self) -> str:
+        if self.status == 'failed':
+            return f"failed: {self.error}"
+        if self.status in ('skipped', 'not_modified', 'empty'):
+            return self.status.replace('_', ' ')
+        return (f"{self.status}: +{self.added} ~{self.changed} -{self.removed} ={self.unchanged} "
+                f"in {self.total_ms:.0f} ms (fetch {self.fetch_ms:.0f}, parse {self.parse_ms:.0f}, "
+                f"apply {self.apply_ms:.0f})")
+
+
+def row_to_item(row: dict) -> dict | None:
+    """Maps one sheet row to a resource document."""
+    item_id = row.get('Name', '').lower().replace(' ', '_').replace(':', '')
+    if not item_id:
+        return None
+    return {
+        'id': item_id, 'name': row.get('Name', ''), 'type': row.get('Type', ''),
+        'tier': int(row['Tier']) if (row.get('Tier') or '').isdigit() else 0,
+        'details': row.get('Details', ''), 'image_url': row.get('ImageURL', ''),
+        'dgt_slug': row.get('dgtSlug', '')
+    }
+
+
+def stream_items(response):
+    """Yields resource documents while the CSV body is still downloading."""
+    response.raw.decode_content = True
+    # urllib3 closes the stream once the body is read, before TextIOWrapper has seen the end
+    response.raw.auto_close = False
+    text = io.TextIOWrapper(response.raw, encoding='utf-8-sig', newline='')
+    for row in csv.DictReader(text):
+        item = row_to_item(row)
+        if item:
+            yield item
+
+
+def diff_items(local, incoming) -> tuple[list[dict], list[dict], list[str], int]:
+    """Compares sheet items against the local resources, keyed by id.
+
+    `local` maps id -> document.  Returns (added, changed, removed_ids, unchanged_count).
+    """
+    added, changed, seen, unchanged = [], [], set(), 0
+    for item in incoming:
+        if item['id'] in seen:
+            continue
+        seen.add(item['id'])
+        old = local.get(item['id'])
+        if old is None:
+            added.append(item)
+            continue
+        if any(old.get(f) != item[f] for f in SHEET_FIELDS):
+            changed.append(item)
+        else:
+            unchanged += 1
+    removed = [rid for rid in local if rid not in seen]
+    return added, changed, removed, unchanged
+
+
+class Timer:
+    """Tiny stopwatch returning milliseconds."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+
+    def lap(self) -> float:
+        now = time.perf_counter()
+        ms, self.start = (now - self.start) * 1000, now
+        return ms
@@ -0,0 +1,59 @@
+# ──────────────── src/core/startup.py ────────────────
+"""Cold-start phase timings.
+
+Boot runs as named phases; `phase()` times one on the calling thread and `background()` wraps a
+function so that, run on a worker thread, it reports as a phase that overlapped the others.
+`report()` prints every phase once the bot is online and exports them as a gauge.
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from src.core.metrics import metrics
+
+
+class BootTimer:
+    def __init__(self, started: float | None = None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases: list[tuple[str, float, bool]] = []   # (name, seconds, ran in the background)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float, background: bool = False):
+        with self._lock:
+            self.phases.append((name, seconds, background))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def background(self, name: str, fn):
+        """`fn`, timed as phase `name` wherever it ends up running."""
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - started, background=True)
+        return run
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        with self._lock:
+            phases = list(self.phases)
+        parts = [f"{name} {s * 1000:.0f} ms" + (" (bg)" if bg else "") for name, s, bg in phases]
+        return f"{' | '.join(parts)} — online in {self.elapsed():.2f} s"
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        for name, seconds, _ in phases:
+            metrics.set('mentat_startup_phase_seconds', seconds, phase=name)
+        metrics.set('mentat_startup_seconds', self.elapsed())
+        print(f"Startup: {self.summary()}")
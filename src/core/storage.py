@@ -0,0 +1,501 @@
+# ──────────────── src/core/storage.py ────────────────
+"""Pluggable storage backends behind MentatDB.
+
+Every backend stores plain-dict documents in the tables described by SCHEMA and
+addresses them by the table's key fields.  MentatDB only talks to the small
+`Storage` interface below, so the JSON (TinyDB) and SQLite backends are
+interchangeable.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from functools import reduce
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'data')
+JSON_PATH = os.path.join(DATA_DIR, 'db.json')
+SQLITE_PATH = os.path.join(DATA_DIR, 'db.sqlite3')
+
+# table -> key fields, typed columns, JSON-encoded columns, secondary indexes (a tuple is a
+# composite index) and defaults for fields that rows written by older versions lack.
+# Fields a document carries that are not listed here survive in an `_extra` column.
+# Guild id 0 holds bot-wide settings and data written before the bot was guild-aware.
+SCHEMA = {
+    # the catalogue comes from the one Google Sheet and is shared by every guild
+    'resources': {
+        'key': ('id',),
+        'columns': {'id': 'TEXT', 'name': 'TEXT', 'type': 'TEXT', 'tier': 'INTEGER', 'details': 'TEXT',
+                    'image_url': 'TEXT', 'dgt_slug': 'TEXT'},
+        'json': (),
+        'indexes': ('name',),
+    },
+    # per-guild demand level of a resource; no row means low
+    'demand': {
+        'key': ('guild_id', 'resource_id'),
+        'columns': {'guild_id': 'INTEGER', 'resource_id': 'TEXT', 'demand': 'TEXT'},
+        'json': (),
+        'indexes': (('guild_id', 'demand'),),
+    },
+    # per-day totals folded out of the demand log (see demand_log.py) once it is compacted
+    'demand_daily': {
+        'key': ('guild_id', 'resource_id', 'day'),
+        'columns': {'guild_id': 'INTEGER', 'resource_id': 'TEXT', 'day': 'TEXT', 'high_s': 'INTEGER',
+                    'medium_s': 'INTEGER', 'flips': 'INTEGER'},
+        'json': (),
+        'indexes': (('guild_id', 'day'),),
+    },
+    # each member's latest demand vote per resource (vote mode, see votes.py)
+    'demand_votes': {
+        'key': ('guild_id', 'resource_id', 'user_id'),
+        'columns': {'guild_id': 'INTEGER', 'resource_id': 'TEXT', 'user_id': 'INTEGER', 'level': 'TEXT', 'ts': 'REAL'},
+        'json': (),
+        'indexes': (),
+    },
+    # running decayed score of a resource's votes: `score` as it stood at `as_of`
+    'vote_tallies': {
+        'key': ('guild_id', 'resource_id'),
+        'columns': {'guild_id': 'INTEGER', 'resource_id': 'TEXT', 'score': 'REAL', 'as_of': 'REAL'},
+        'json': (),
+        'indexes': ('guild_id',),
+    },
+    'settings': {
+        'key': ('guild_id', 'key'),
+        'columns': {'guild_id': 'INTEGER', 'key': 'TEXT', 'value': 'TEXT'},
+        'json': ('value',),
+        'indexes': ('key',),
+        'defaults': {'guild_id': 0},
+    },
+    'missions': {
+        'key': ('message_id',),
+        'columns': {'id': 'INTEGER', 'message_id': 'INTEGER', 'guild_id': 'INTEGER', 'channel_id': 'INTEGER',
+                    'creator_id': 'INTEGER', 'details': 'TEXT', 'time': 'TEXT', 'participants': 'TEXT'},
+        'json': ('participants',),
+        'indexes': ('guild_id', 'channel_id', 'time'),
+        'defaults': {'guild_id': 0},
+    },
+    # timezones belong to the user, whichever guild they create missions in
+    'user_settings': {
+        'key': ('user_id',),
+        'columns': {'user_id': 'INTEGER', 'timezone': 'TEXT'},
+        'json': (),
+        'indexes': (),
+    },
+    # one row per live report post; resource_id is "digest:<slot>" for digest messages
+    'report_messages': {
+        'key': ('guild_id', 'channel_id', 'resource_id'),
+        'columns': {'guild_id': 'INTEGER', 'channel_id': 'INTEGER', 'resource_id': 'TEXT', 'message_id': 'INTEGER',
+                    'kind': 'TEXT', 'fingerprint': 'TEXT'},
+        'json': (),
+        'indexes': ('channel_id', 'message_id'),
+    },
+}
+
+
+def key_of(table: str, doc: dict) -> tuple:
+    """Returns the key tuple of `doc` in `table`."""
+    return tuple(doc[f] for f in SCHEMA[table]['key'])
+
+
+def _as_key(key) -> tuple:
+    return key if isinstance(key, tuple) else (key,)
+
+
+def with_defaults(table: str, doc: dict) -> dict:
+    """Fills in fields that documents written by older versions do not have."""
+    return {**SCHEMA[table].get('defaults', {}), **doc}
+
+
+def legacy_demand(resources) -> list[dict]:
+    """Demand rows for resources that still carry a pre-guild `demand` field (kept as guild 0)."""
+    return [{'guild_id': 0, 'resource_id': r['id'], 'demand': r['demand']}
+            for r in resources if r.get('demand') not in (None, 'low')]
+
+
+# ─────────────────────── Interface ───────────────────────
+class Storage:
+    """Interface implemented by every MentatDB storage backend."""
+
+    path = None
+
+    def all(self, table: str) -> list[dict]:
+        raise NotImplementedError
+
+    def get(self, table: str, key) -> dict | None:
+        raise NotImplementedError
+
+    def search(self, table: str, field: str, values) -> list[dict]:
+        """Returns every document whose `field` is one of `values`."""
+        raise NotImplementedError
+
+    def upsert(self, table: str, doc: dict):
+        raise NotImplementedError
+
+    def upsert_many(self, table: str, docs: list[dict]):
+        for doc in docs:
+            self.upsert(table, doc)
+
+    def update(self, table: str, key, fields: dict) -> bool:
+        """Updates fields of an existing document; returns False if it does not exist."""
+        raise NotImplementedError
+
+    def delete(self, table: str, key) -> bool:
+        raise NotImplementedError
+
+    def replace(self, table: str, docs: list[dict]):
+        """Replaces the entire content of `table` with `docs`."""
+        raise NotImplementedError
+
+    @contextmanager
+    def transaction(self):
+        """Groups several writes so they are applied together."""
+        yield self
+
+    def version(self):
+        """Returns a token that changes when the data is modified outside this process, or None."""
+        return None
+
+    def close(self):
+        pass
+
+
+# ─────────────────────── TinyDB (JSON) ───────────────────────
+def _held_json_storage():
+    from tinydb.storages import JSONStorage
+
+    class HeldJSONStorage(JSONStorage):
+        """JSONStorage whose writes can be held in memory and then written out once, or dropped."""
+        held = None
+
+        def read(self):
+            return self.held if self.held is not None else super().read()
+
+        def write(self, data):
+            if self.held is not None:
+                self.held = data
+            else:
+                super().write(data)
+    return HeldJSONStorage
+
+
+class TinyDBStorage(Storage):
+    """The original pretty-printed JSON file. Every write rewrites the whole file,
+    except inside a transaction, whose writes reach the file together in one rewrite."""
+
+    def __init__(self, path: str = JSON_PATH):
+        from tinydb import TinyDB, Query
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = TinyDB(path, indent=4, storage=_held_json_storage())
+        self.Query = Query
+        self._upgrade()
+
+    def _upgrade(self):
+        # documents from older versions lack guild ids, and keep demand on the resource itself
+        for table, spec in SCHEMA.items():
+            for field, value in spec.get('defaults', {}).items():
+                self.db.table(table).update({field: value}, ~self.Query()[field].exists())
+        if not len(self.db.table('demand')) and (rows := legacy_demand(self.db.table('resources').all())):
+            self.db.table('demand').insert_multiple(rows)
+
+    def _match(self, table: str, key):
+        fields = SCHEMA[table]['key']
+        return reduce(lambda a, b: a & b, (self.Query()[f] == v for f, v in zip(fields, _as_key(key))))
+
+    def all(self, table):
+        return [dict(d) for d in self.db.table(table).all()]
+
+    def get(self, table, key):
+        doc = self.db.table(table).get(self._match(table, key))
+        return dict(doc) if doc else None
+
+    def search(self, table, field, values):
+        return [dict(d) for d in self.db.table(table).search(self.Query()[field].one_of(list(values)))]
+
+    def upsert(self, table, doc):
+        self.db.table(table).upsert(doc, self._match(table, key_of(table, doc)))
+
+    def update(self, table, key, fields):
+        return bool(self.db.table(table).update(fields, self._match(table, key)))
+
+    def delete(self, table, key):
+        return bool(self.db.table(table).remove(self._match(table, key)))
+
+    def replace(self, table, docs):
+        t = self.db.table(table)
+        t.truncate()
+        t.insert_multiple(docs)
+
+    @contextmanager
+    def transaction(self):
+        storage = self.db.storage
+        if storage.held is not None:
+            yield self   # nested: the outermost block writes
+            return
+        storage.held = storage.read() or {}
+        try:
+            yield self
+        except BaseException:
+            storage.held = None
+            for table in SCHEMA:
+                self.db.table(table).clear_cache()   # query results may include the dropped writes
+            raise
+        data, storage.held = storage.held, None
+        storage.write(data)
+
+    def version(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def close(self):
+        self.db.close()
+
+
+# ─────────────────────── SQLite (WAL) ───────────────────────
+class SQLiteStorage(Storage):
+    """SQLite in WAL mode: one row per document, indexed columns, and real transactions."""
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.RLock()
+        self._depth = 0
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+
+    def _create_schema(self):
+        with self.transaction():
+            for table, spec in SCHEMA.items():
+                info = self.conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+                if info:
+                    self._upgrade_table(table, spec, info)
+                else:
+                    self._create_table(table, spec)
+                    if table == 'demand':
+                        self._adopt_legacy_demand()
+                for col in spec['indexes']:
+                    cols = col if isinstance(col, tuple) else (col,)
+                    names = ', '.join(f'"{c}"' for c in cols)
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS "ix_{table}_{"_".join(cols)}" ON "{table}" ({names})')
+
+    def _create_table(self, table: str, spec: dict):
+        cols = ', '.join(f'"{c}" {t}' for c, t in spec['columns'].items())
+        pk = ', '.join(f'"{f}"' for f in spec['key'])
+        self.conn.execute(f'CREATE TABLE "{table}" ({cols}, "_extra" TEXT, PRIMARY KEY ({pk}))')
+
+    def _upgrade_table(self, table: str, spec: dict, info):
+        """Brings a table written by an older version up to SCHEMA: new columns, or a new key."""
+        existing = {r['name'] for r in info}
+        pk = tuple(r['name'] for r in sorted((r for r in info if r['pk']), key=lambda r: r['pk']))
+        if pk == spec['key']:
+            for col, sqltype in spec['columns'].items():
+                if col not in existing:
+                    default = spec.get('defaults', {}).get(col)
+                    clause = f' DEFAULT {default!r}' if default is not None else ''
+                    self.conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{col}" {sqltype}{clause}')
+            return
+        # the key changed: rebuild the table and copy every row across
+        rows = self.conn.execute(f'SELECT * FROM "{table}"').fetchall()
+        self.conn.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_old"')
+        self._create_table(table, spec)
+        docs = []
+        for row in rows:
+            doc = {k: row[k] for k in row.keys() if k != '_extra'}
+            for col in spec['json']:
+                if doc.get(col) is not None:
+                    doc[col] = json.loads(doc[col])
+            if row['_extra']:
+                doc.update(json.loads(row['_extra']))
+            docs.append(with_defaults(table, doc))
+        self.upsert_many(table, docs)
+        self.conn.execute(f'DROP TABLE "{table}_old"')
+
+    def _adopt_legacy_demand(self):
+        # before guild support, demand was a column of the resources table
+        cols = {r['name'] for r in self.conn.execute('PRAGMA table_info("resources")').fetchall()}
+        if 'demand' in cols:
+            rows = self.conn.execute('SELECT id, demand FROM "resources"').fetchall()
+            self.upsert_many('demand', legacy_demand(dict(r) for r in rows))
+
+    # ─── row <-> document ─────────────────────────────────────
+    @staticmethod
+    def _to_row(table: str, doc: dict) -> dict:
+        spec = SCHEMA[table]
+        row = {}
+        for col in spec['columns']:
+            val = doc.get(col)
+            row[col] = json.dumps(val) if col in spec['json'] and val is not None else val
+        extra = {k: v for k, v in doc.items() if k not in spec['columns']}
+        row['_extra'] = json.dumps(extra) if extra else None
+        return row
+
+    @staticmethod
+    def _to_doc(table: str, row: sqlite3.Row) -> dict:
+        spec = SCHEMA[table]
+        doc = {}
+        for col in spec['columns']:
+            val = row[col]
+            doc[col] = json.loads(val) if col in spec['json'] and val is not None else val
+        if row['_extra']:
+            doc.update(json.loads(row['_extra']))
+        return doc
+
+    @staticmethod
+    def _where(table: str) -> str:
+        return ' AND '.join(f'"{f}" = ?' for f in SCHEMA[table]['key'])
+
+    def _execute(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    # ─── Storage interface ────────────────────────────────────
+    def all(self, table):
+        return [self._to_doc(table, r) for r in self._execute(f'SELECT * FROM "{table}"').fetchall()]
+
+    def get(self, table, key):
+        row = self._execute(f'SELECT * FROM "{table}" WHERE {self._where(table)}', _as_key(key)).fetchone()
+        return self._to_doc(table, row) if row else None
+
+    def search(self, table, field, values):
+        values = list(values)
+        if not values:
+            return []
+        marks = ', '.join('?' * len(values))
+        rows = self._execute(f'SELECT * FROM "{table}" WHERE "{field}" IN ({marks})', values).fetchall()
+        return [self._to_doc(table, r) for r in rows]
+
+    def upsert(self, table, doc):
+        self.upsert_many(table, [doc])
+
+    def upsert_many(self, table, docs):
+        spec = SCHEMA[table]
+        cols = list(spec['columns']) + ['_extra']
+        names = ', '.join(f'"{c}"' for c in cols)
+        marks = ', '.join('?' * len(cols))
+        pk = ', '.join(f'"{f}"' for f in spec['key'])
+        sets = ', '.join(f'"{c}" = excluded."{c}"' for c in cols if c not in spec['key'])
+        sql = f'INSERT INTO "{table}" ({names}) VALUES ({marks}) ON CONFLICT ({pk}) DO UPDATE SET {sets}'
+        rows = [tuple(self._to_row(table, d)[c] for c in cols) for d in docs]
+        with self.transaction():
+            self.conn.executemany(sql, rows)
+
+    def update(self, table, key, fields):
+        with self.transaction():
+            doc = self.get(table, key)
+            if doc is None:
+                return False
+            doc.update(fields)
+            self.upsert(table, doc)
+            return True
+
+    def delete(self, table, key):
+        cur = self._execute(f'DELETE FROM "{table}" WHERE {self._where(table)}', _as_key(key))
+        return cur.rowcount > 0
+
+    def replace(self, table, docs):
+        with self.transaction():
+            self.conn.execute(f'DELETE FROM "{table}"')
+            self.upsert_many(table, docs)
+
+    @contextmanager
+    def transaction(self):
+        with self.lock:
+            outermost = self._depth == 0
+            if outermost:
+                self.conn.execute('BEGIN IMMEDIATE')
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self.conn.execute('ROLLBACK')
+                raise
+            self._depth -= 1
+            if outermost:
+                self.conn.execute('COMMIT')
+
+    def version(self):
+        # data_version only moves when another connection commits
+        return self._execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# ─────────────────────── Migration & selection ───────────────────────
+def migrate_json_to_sqlite(json_path: str, storage: Storage) -> dict[str, int]:
+    """Imports a TinyDB `db.json` into `storage` and returns the row count per table.
+
+    TinyDB files look like {"table": {"<doc_id>": {...}}}; documents sharing a key keep the last copy.
+    """
+    with open(json_path, encoding='utf-8') as fh:
+        raw = json.load(fh)
+
+    if not raw.get('demand'):
+        raw['demand'] = dict(enumerate(legacy_demand((raw.get('resources') or {}).values())))
+    counts = {}
+    with storage.transaction():
+        for table in SCHEMA:
+            docs = {}
+            for doc in (raw.get(table) or {}).values():
+                doc = with_defaults(table, doc)
+                if table == 'resources':
+                    doc.pop('demand', None)   # moved to the demand table above
+                try:
+                    docs[key_of(table, doc)] = doc
+                except KeyError:
+                    continue
+            storage.replace(table, list(docs.values()))
+            counts[table] = len(docs)
+    return counts
+
+
+def open_storage(backend: str | None = None) -> Storage:
+    """Opens the configured backend (`DB_BACKEND`, default "sqlite").
+
+    The first time the SQLite backend starts next to an existing `db.json`, that file is imported
+    once and renamed to `db.json.migrated`.
+    """
+    backend = (backend or os.getenv('DB_BACKEND') or 'sqlite').lower()
+    if backend in ('json', 'tinydb'):
+        return TinyDBStorage(JSON_PATH)
+    if backend != 'sqlite':
+        raise ValueError(f"Unknown DB_BACKEND '{backend}' (expected 'sqlite' or 'tinydb').")
+
+    if not os.path.exists(SQLITE_PATH) and os.path.exists(JSON_PATH):
+        _migrate_into_place(JSON_PATH, SQLITE_PATH)
+    return SQLiteStorage(SQLITE_PATH)
+
+
+def _migrate_into_place(json_path: str, sqlite_path: str):
+    """Builds the SQLite file beside its final name and moves it there only once complete, so an
+    interrupted migration leaves no half-empty database that later boots would take as migrated."""
+    tmp = sqlite_path + '.tmp'
+    for leftover in (tmp, tmp + '-wal', tmp + '-shm'):
+        if os.path.exists(leftover):
+            os.remove(leftover)   # from an earlier attempt that did not finish
+    storage = SQLiteStorage(tmp)
+    try:
+        counts = migrate_json_to_sqlite(json_path, storage)
+    finally:
+        storage.close()   # the last connection closing folds the WAL back into the file
+    os.replace(tmp, sqlite_path)
+    os.replace(json_path, json_path + '.migrated')
+    print(f"Migrated {json_path} into SQLite: {counts}")
+
+
+if __name__ == '__main__':
+    # python -m src.core.storage [db.json] [db.sqlite3]
+    src = sys.argv[1] if len(sys.argv) > 1 else JSON_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH
+    print(migrate_json_to_sqlite(src, SQLiteStorage(dst)))
@@ -0,0 +1,83 @@
+# ──────────────── src/core/timezones.py ────────────────
+"""Timezone service: cached zoneinfo objects, a prebuilt search index and per-user memo."""
+from functools import lru_cache
+from zoneinfo import ZoneInfo, available_timezones
+
+# common abbreviations -> a representative IANA zone
+ABBREVIATIONS = {
+    'utc': 'UTC', 'gmt': 'Europe/London', 'bst': 'Europe/London', 'wet': 'Europe/Lisbon',
+    'cet': 'Europe/Berlin', 'cest': 'Europe/Berlin', 'eet': 'Europe/Athens', 'eest': 'Europe/Athens',
+    'msk': 'Europe/Moscow', 'ist': 'Asia/Kolkata', 'pkt': 'Asia/Karachi', 'wib': 'Asia/Jakarta',
+    'sgt': 'Asia/Singapore', 'hkt': 'Asia/Hong_Kong', 'pht': 'Asia/Manila', 'jst': 'Asia/Tokyo',
+    'kst': 'Asia/Seoul', 'awst': 'Australia/Perth', 'acst': 'Australia/Adelaide', 'acdt': 'Australia/Adelaide',
+    'aest': 'Australia/Sydney', 'aedt': 'Australia/Sydney', 'nzst': 'Pacific/Auckland', 'nzdt': 'Pacific/Auckland',
+    'hst': 'Pacific/Honolulu', 'akst': 'America/Anchorage', 'akdt': 'America/Anchorage',
+    'pst': 'America/Los_Angeles', 'pdt': 'America/Los_Angeles', 'mst': 'America/Denver', 'mdt': 'America/Denver',
+    'cst': 'America/Chicago', 'cdt': 'America/Chicago', 'est': 'America/New_York', 'edt': 'America/New_York',
+    'ast': 'America/Halifax', 'brt': 'America/Sao_Paulo', 'art': 'America/Argentina/Buenos_Aires',
+}
+# legacy / platform-specific trees that only duplicate the canonical names
+_SKIP_PREFIXES = ('posix/', 'right/', 'SystemV/')
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Returns the (cached) ZoneInfo for an IANA name; raises ZoneInfoNotFoundError."""
+    return ZoneInfo(name)
+
+
+class TimezoneService:
+    """Everything `/user set_timezone` and `/mission create` need, computed once."""
+
+    def __init__(self, names=None):
+        names = sorted(n for n in (names or available_timezones()) if not n.startswith(_SKIP_PREFIXES))
+        self.names = names
+        self.known = set(names)
+        self.by_lower = {n.lower(): n for n in names}
+        # (name, lower-cased name, lower-cased city) e.g. ('America/New_York', ..., 'new york')
+        self.entries = [(n, n.lower(), n.rsplit('/', 1)[-1].replace('_', ' ').lower()) for n in names]
+        self.by_city = {}
+        for name, _, city in self.entries:
+            self.by_city.setdefault(city, name)
+        self._users: dict[int, ZoneInfo] = {}
+
+    def resolve(self, text: str) -> str | None:
+        """Maps an IANA name, abbreviation ("AEST") or city ("Sydney") to a canonical zone name."""
+        q = text.strip().lower()
+        name = self.by_lower.get(q) or ABBREVIATIONS.get(q) or self.by_city.get(q.replace('_', ' '))
+        return name if name in self.known else None
+
+    def search(self, query: str, limit: int = 25) -> list[str]:
+        """Autocomplete suggestions: abbreviation/city hits first, then prefix, then substring."""
+        q = query.strip().lower()
+        if not q:
+            return self.names[:limit]
+        results = []
+        if exact := self.resolve(q):
+            results.append(exact)
+        prefix, substring = [], []
+        for name, lname, city in self.entries:
+            if lname.startswith(q) or city.startswith(q):
+                prefix.append(name)
+            elif q in lname or q in city:
+                substring.append(name)
+        for name in prefix + substring:
+            if name not in results:
+                results.append(name)
+            if len(results) >= limit:
+                break
+        return results
+
+    # ─── per-user memo ────────────────────────────────────────
+    def for_user(self, user_id: int) -> ZoneInfo | None:
+        return self._users.get(user_id)
+
+    def remember(self, user_id: int, name: str) -> ZoneInfo:
+        zone = self._users[user_id] = get_zone(name)
+        return zone
+
+
+@lru_cache(maxsize=None)
+def timezones() -> TimezoneService:
+    """The shared service, built on first use."""
+    return TimezoneService()
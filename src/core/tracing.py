@@ -0,0 +1,111 @@
+# ──────────────── src/core/tracing.py ────────────────
+"""Per-interaction trace spans, for finding where a slow click or command spent its time.
+
+A trace covers one interaction handler (`tracer.trace()`, opened by `metrics.timed` and the
+command hooks); `span(phase)` blocks inside it add their time to the phase ("db", "render",
+"discord").  Spans nest: a phase only gets its own time, not that of spans opened inside it.
+Both live in context variables, so tasks spawned by the handler report into its trace.
+
+With TRACE_SLOW_MS unset or 0 nothing is traced and `span()` costs one context-variable read.
+Handlers slower than the threshold are logged with their phase breakdown.
+"""
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+_trace: ContextVar['Trace | None'] = ContextVar('mentat_trace', default=None)
+_span: ContextVar[list | None] = ContextVar('mentat_span', default=None)   # [child seconds] of the open span
+
+
+class Trace:
+    __slots__ = ('name', 'started', 'phases', 'done')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases: dict[str, list] = {}   # phase -> [seconds, spans]
+        self.done = False
+
+    def add(self, phase: str, seconds: float):
+        entry = self.phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def breakdown(self, total: float) -> str:
+        parts = [f"{phase} {s * 1000:.0f} ms ({n})"
+                 for phase, (s, n) in sorted(self.phases.items(), key=lambda kv: -kv[1][0])]
+        # spans of concurrent tasks overlap, so they can add up to more than the wall time
+        other = total - sum(s for s, _ in self.phases.values())
+        if other > 0:
+            parts.append(f"other {other * 1000:.0f} ms")
+        return ", ".join(parts)
+
+
+class Tracer:
+    def __init__(self, threshold_ms: float | None = None):
+        if threshold_ms is None:
+            threshold_ms = float(os.getenv('TRACE_SLOW_MS') or 0)
+        self.threshold = threshold_ms / 1000   # seconds; 0 = tracing off
+        self.slow: list[tuple[str, float, str]] = []   # the latest slow (name, seconds, breakdown)
+
+    def open(self, name: str):
+        """Starts a trace in the current context; returns the token for close(), or None when off."""
+        if not self.threshold or _trace.get() is not None:
+            return None   # off, or already inside a handler's trace
+        return _trace.set(Trace(name))
+
+    def close(self, token):
+        if token is None:
+            return
+        trace = _trace.get()
+        _trace.reset(token)
+        if trace is None:
+            return
+        trace.done = True
+        total = time.perf_counter() - trace.started
+        if total >= self.threshold:
+            breakdown = trace.breakdown(total)
+            self.slow = (self.slow + [(trace.name, total, breakdown)])[-20:]
+            print(f"--- SLOW INTERACTION: {trace.name} took {total * 1000:.0f} ms — {breakdown}")
+
+    @contextmanager
+    def trace(self, name: str):
+        token = self.open(name)
+        try:
+            yield
+        finally:
+            self.close(token)
+
+
+tracer = Tracer()
+
+
+class _Span:
+    __slots__ = ('trace', 'phase', 'parent', 'own', 'token', 'started')
+
+    def __init__(self, trace: Trace, phase: str):
+        self.trace, self.phase = trace, phase
+
+    def __enter__(self):
+        self.parent, self.own = _span.get(), [0.0]
+        self.token = _span.set(self.own)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        _span.reset(self.token)
+        self.trace.add(self.phase, max(0.0, elapsed - self.own[0]))
+        if self.parent is not None:
+            self.parent[0] += elapsed
+
+
+_OFF = nullcontext()
+
+
+def span(phase: str):
+    """Adds the block's own time to `phase` of the current trace, if there is one."""
+    trace = _trace.get()
+    if trace is None or trace.done:
+        return _OFF
+    return _Span(trace, phase)
@@ -0,0 +1,34 @@
+# ──────────────── src/core/votes.py ────────────────
+"""Member demand voting: each member's latest vote per resource counts, fading with age.
+
+A resource's tally is one decaying score kept as (score, as_of): reading it at `now` scales it
+by 2^-(now - as_of)/half_life.  A vote brings the tally to `now`, takes out the voter's previous
+vote (as decayed as the tally itself) and adds the new one, so casting a vote is O(1) whatever
+the number of voters.  The effective level is the highest threshold the score reaches.
+"""
+
+WEIGHTS = {'high': 2.0, 'medium': 1.0, 'low': -1.0}   # a low vote argues against demand
+THRESHOLDS = (('high', 3.0), ('medium', 1.0))           # score needed, highest level first
+HALF_LIFE_HOURS = 24.0
+
+
+def decay(score: float, as_of: float, now: float, half_life: float) -> float:
+    """`score` as of `as_of`, faded to `now`; `half_life` in seconds."""
+    return score * 2 ** (-max(0.0, now - as_of) / half_life)
+
+
+def level_for(score: float) -> str:
+    for level, needed in THRESHOLDS:
+        if score >= needed:
+            return level
+    return 'low'
+
+
+def apply_vote(tally: dict | None, old: dict | None, level: str, now: float, half_life: float) -> float:
+    """The tally's score at `now` once `old` (the voter's previous vote, if any) is replaced by `level`."""
+    score = decay(tally['score'], tally['as_of'], now, half_life) if tally else 0.0
+    if old:
+        score -= decay(WEIGHTS[old['level']], old['ts'], now, half_life)
+    score += WEIGHTS[level]
+    # floating-point leftovers of votes that were all taken back
+    return 0.0 if abs(score) < 1e-9 else score
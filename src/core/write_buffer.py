@@ -0,0 +1,69 @@
+# ──────────────── src/core/write_buffer.py ────────────────
+"""Write-behind buffer: folds bursts of MentatDB mutations into one storage flush."""
+import threading
+from collections import deque
+
+UPSERT, DELETE = 'upsert', 'delete'
+
+
+class WriteBuffer:
+    """Collects pending writes keyed by (table, key) so later writes replace earlier ones.
+
+    A flush happens `delay` seconds after the first pending write, or straight away once
+    `max_ops` logical writes have piled up.  `apply` receives the coalesced
+    [(op, table, key, doc)] list and must persist it in one go.  Pass the owner's lock as
+    `lock` so the timer thread and writers always take it in the same order.
+    """
+
+    def __init__(self, apply, delay: float, max_ops: int, lock=None):
+        self._apply = apply
+        self.delay = delay
+        self.max_ops = max_ops
+        self.pending: dict[tuple, tuple] = {}
+        self.lock = lock or threading.RLock()
+        self.timer: threading.Timer | None = None
+        self._since_flush = 0
+
+        # counters
+        self.logical_writes = 0
+        self.physical_flushes = 0
+        self.batch_sizes = deque(maxlen=100)
+
+    def add(self, op: str, table: str, key: tuple, doc: dict | None = None):
+        with self.lock:
+            self.pending[(table, key)] = (op, table, key, doc)
+            self.logical_writes += 1
+            self._since_flush += 1
+            if self._since_flush >= self.max_ops:
+                self.flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self) -> int:
+        """Persists everything pending and returns how many logical writes it covered."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.pending:
+                return 0
+            ops, folded = list(self.pending.values()), self._since_flush
+            self._apply(ops)
+            self.pending.clear()
+            self._since_flush = 0
+            self.physical_flushes += 1
+            self.batch_sizes.append(folded)
+            return folded
+
+    def stats(self) -> dict:
+        with self.lock:
+            batches = list(self.batch_sizes)
+            return {
+                'logical_writes': self.logical_writes,
+                'physical_flushes': self.physical_flushes,
+                'pending': self._since_flush,
+                'last_flush_folded': batches[-1] if batches else 0,
+                'avg_flush_folded': sum(batches) / len(batches) if batches else 0.0,
+            }
@@ -1,38 +1,132 @@
 # ─────────────────────── src/main.py ───────────────────────
-import os, discord
+# Staged boot: storage opens on the DB writer thread and the cog modules import on a worker
+# thread while the bot logs in; the tables on_ready needs load while the gateway connects.
+# Each phase is timed and the whole breakdown is printed once the bot is online.
+import time
+from src.core.startup import BootTimer
+boot = BootTimer(time.perf_counter())
+
+import asyncio, atexit, importlib, os, signal
 from dotenv import load_dotenv
-from src.core.database import MentatDB
 
 print("Mentat Advisor is starting up…")
-load_dotenv()
-TOKEN = os.getenv("DISCORD_TOKEN")
+with boot.phase("env"):
+    load_dotenv()
+    TOKEN = os.getenv("DISCORD_TOKEN")
+
+with boot.phase("core"):
+    from src.core.async_db import AsyncMentatDB
+    from src.core.database import MentatDB
+    # opens (and, the first time, migrates) the storage without holding up the rest of the boot
+    db_handler = AsyncMentatDB.opening(boot.background("storage", MentatDB))
 
-# initialise DB
-db_handler = MentatDB()
-db_handler.sync_from_google_sheet()
+with boot.phase("discord"):
+    import discord
+    from src.core.outbound import OutboundQueue
 
 # bot
 intents = discord.Intents.default()
-bot = discord.Bot(intents=intents)
+# one process serves every guild; Discord decides the shard count
+bot = discord.AutoShardedBot(intents=intents)
 bot.db_handler = db_handler
+bot.outbound = OutboundQueue()   # every cog's Discord sends/edits go through here
+
+COGS = ("sync_cog", "advisor_cog", "mission_cog", "metrics_cog")
+connect_started = 0.0
+
+def _opened_db() -> MentatDB | None:
+    try:
+        return db_handler.db
+    except Exception:
+        return None   # never opened; the error was reported at boot
+
+def _flush_on_exit():
+    if db := _opened_db():
+        db.flush()
+
+# write-behind mode keeps recent writes in memory; make sure they reach disk on any exit
+atexit.register(_flush_on_exit)
+
+def import_cogs() -> list:
+    return [importlib.import_module(f"src.cogs.{name}") for name in COGS]
+
+async def warm_tables():
+    started = time.perf_counter()
+    try:
+        rows = await bot.db_handler.warm()
+    except Exception as e:
+        print(f"--- STARTUP WARM ERROR: {e}")
+        return
+    boot.add(f"warm ({rows} rows)", time.perf_counter() - started, background=True)
+
+async def adopt_legacy_data():
+    """Data from before guild support sits under guild 0; hand it to the guild it came from."""
+    cid = await bot.db_handler.get_setting("report_channel_id")
+    chan = bot.get_channel(cid) if cid else None
+    guild = chan.guild if chan else (bot.guilds[0] if len(bot.guilds) == 1 else None)
+    if guild:
+        moved = await bot.db_handler.adopt_legacy_guild(guild.id)
+        if any(moved.values()):
+            print(f"Moved pre-guild data to {guild.name} ({guild.id}): {moved}")
+
+async def rehydrate_views():
+    """Warm restart: re-register the persistent views of every stored report and mission post."""
+    started = time.perf_counter()
+    count = 0
+    for cog in bot.cogs.values():
+        if hasattr(cog, "rehydrate_views"):
+            count += await cog.rehydrate_views()
+    bot.views_rehydrated = True
+    print(f"Rehydrated {count} persistent views in {(time.perf_counter() - started) * 1000:.1f} ms.")
 
 @bot.event
 async def on_ready():
-    # start the scheduled loop in AdvisorCog
+    # on_ready fires again after reconnects; the views only need registering once
+    first = not getattr(bot, "views_rehydrated", False)
+    if first:
+        boot.add("gateway", time.perf_counter() - connect_started)
+        with boot.phase("views"):
+            await adopt_legacy_data()
+            await rehydrate_views()
+    # start the per-shard report loops in AdvisorCog
     advisor = bot.get_cog("AdvisorCog")
-    if advisor and not advisor.report_loop.is_running():
-        interval = bot.db_handler.get_setting("report_interval_minutes") or 30
-        advisor.report_loop.change_interval(minutes=interval)
-        advisor.report_loop.start()
-        print(f"Report loop running every {interval} min.")
+    if advisor and not advisor._loops:
+        interval = await bot.db_handler.get_setting("report_interval_minutes") or 30
+        advisor.start_report_loops(interval)
+        print(f"Report loops running every {interval} min across {bot.shard_count or 1} shard(s).")
     print(f"Logged in as {bot.user} ({bot.user.id}) — Mentat online.")
+    if first:
+        boot.report()
 
-# load cogs
-COGS_DIR = os.path.join(os.path.dirname(__file__), "cogs")
-for fn in os.listdir(COGS_DIR):
-    if fn.endswith(".py") and not fn.startswith("__"):
-        bot.load_extension(f"src.cogs.{fn[:-3]}")
-        print(f"Loaded cog: {fn}")
+async def main():
+    global connect_started
+    loop, task = asyncio.get_running_loop(), asyncio.current_task()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+    async with bot:
+        # login is one HTTP round trip; the storage open and the cog imports overlap it
+        with boot.phase("login"):
+            *_, modules = await asyncio.gather(
+                bot.login(TOKEN), bot.db_handler.ready(),
+                asyncio.to_thread(boot.background("cog imports", import_cogs)))
+        with boot.phase("cogs"):
+            # set up from the modules imported above: load_extension would execute each one again
+            for module in modules:
+                module.setup(bot)
+        print(f"Loaded cogs: {', '.join(COGS)}. Connecting to Discord…")
+        connect_started = time.perf_counter()
+        warming = asyncio.create_task(warm_tables())
+        await bot.connect()
+        warming.cancel()
 
-print("Connecting to Discord…")
-bot.run(TOKEN)
\ No newline at end of file
+try:
+    asyncio.run(main())
+except (asyncio.CancelledError, KeyboardInterrupt):
+    pass
+finally:
+    if db := _opened_db():
+        print(f"Shutting down — flushing database ({db.write_stats()}).")
+        db.close()
@@ -0,0 +1,311 @@
+# ──────────────── tests/test_advisor_cog.py ────────────────
+import asyncio
+import unittest
+import unittest.mock
+import discord
+from unittest.mock import AsyncMock, MagicMock
+from src.cogs.advisor_cog import AdvisorCog, BulkDemandView, DemandView, DigestView, _quip
+from src.core.digest import DIGEST_SIZE, assign_slots
+from src.core.async_db import AsyncMentatDB
+from src.core.database import MentatDB
+from src.core.outbound import OutboundQueue
+from src.core.storage import SQLiteStorage
+
+GUILD = 1
+
+
+def resource(rid, demand='low'):
+    return {'id': rid, 'name': rid.title(), 'type': 'Raw', 'tier': 1, 'details': '',
+            'image_url': '', 'dgt_slug': '', 'demand': demand}
+
+
+class TestAdvisorReports(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        db = MentatDB(SQLiteStorage(':memory:'))
+        db.storage.replace('resources', [resource('spice'), resource('water'), resource('sand')])
+        db.set_demand('spice', 'high', GUILD)
+        db.set_demand('water', 'medium', GUILD)
+        self.bot = MagicMock()
+        self.bot.db_handler = AsyncMentatDB(db)
+        self.cog = AdvisorCog(self.bot)
+        self.channel = AsyncMock()
+        self.channel.id, self.channel.guild.id = 10, GUILD
+        self.channel.get_partial_message = MagicMock(return_value=AsyncMock())
+        self.channel.send.side_effect = lambda **kw: MagicMock(id=len(self.channel.send.call_args_list))
+
+    async def asyncTearDown(self):
+        await self.bot.db_handler.close()
+
+    async def test_unchanged_posts_are_not_edited(self):
+        """Test that a second full rebuild makes no Discord calls when nothing changed."""
+        await self.cog.post_demand_report(self.channel)
+        self.assertEqual(self.channel.send.call_count, 2)
+        self.channel.reset_mock()
+        await self.cog.post_demand_report(self.channel)
+        self.channel.send.assert_not_called()
+        self.channel.get_partial_message.assert_not_called()
+
+    async def test_refresh_touches_only_dirty_items(self):
+        """Test that the loop only re-renders resources whose demand changed."""
+        await self.cog.post_demand_report(self.channel)
+        await self.bot.db_handler.drain_dirty_resources()
+        await self.bot.db_handler.set_demand('spice', 'medium', GUILD)
+        row = await self.bot.db_handler.get_report_message(GUILD, self.channel.id, 'spice')
+        self.channel.reset_mock()
+        await self.cog.refresh_changed(self.channel)
+        # posts go out concurrently, so spice's message id depends on send order
+        self.channel.get_partial_message.assert_called_once_with(row['message_id'])
+        self.channel.get_partial_message.return_value.edit.assert_awaited_once()
+        self.channel.fetch_message.assert_not_called()
+        self.channel.send.assert_not_called()
+
+    async def test_new_item_without_post_is_posted(self):
+        """Test that a live item without a post gets one even if it is not in the change feed."""
+        await self.cog.refresh_changed(self.channel)
+        self.assertEqual(self.channel.send.call_count, 2)
+
+    async def test_digest_packs_items_per_message(self):
+        """Test that digest mode sends one multi-embed message per 10 items of a group."""
+        await self.bot.db_handler.set_setting('report_mode', 'digest', GUILD)
+        for i in range(11):
+            self.bot.db_handler.db.storage.upsert('resources', resource(f'item{i:02}'))
+        self.bot.db_handler.db.invalidate('resources')
+        for i in range(11):
+            await self.bot.db_handler.set_demand(f'item{i:02}', 'high', GUILD)
+        await self.cog.post_demand_report(self.channel)
+        sizes = sorted(len(c.kwargs['embeds']) for c in self.channel.send.call_args_list)
+        self.assertEqual(sizes, [1, 2, DIGEST_SIZE])
+        self.assertIsInstance(self.channel.send.call_args_list[0].kwargs['view'], DigestView)
+
+    async def test_digest_change_touches_one_message_per_slot(self):
+        """Test that one demand change re-renders only the slots it left and joined."""
+        await self.bot.db_handler.set_setting('report_mode', 'digest', GUILD)
+        await self.cog.post_demand_report(self.channel)
+        self.channel.reset_mock()
+        await self.bot.db_handler.set_demand('sand', 'high', GUILD)
+        await self.cog._post_single(self.channel, 'sand')
+        self.channel.get_partial_message.assert_called_once()
+
+    async def test_deleted_post_is_reposted(self):
+        """Test that an edit hitting a deleted message falls back to a fresh post."""
+        await self.cog.post_demand_report(self.channel)
+        await self.bot.db_handler.set_demand('spice', 'medium', GUILD)
+        self.channel.get_partial_message.return_value.edit.side_effect = discord.NotFound(MagicMock(status=404), 'gone')
+        await self.cog._post_single(self.channel, 'spice')
+        self.assertEqual(self.channel.send.call_count, 3)
+        row = await self.bot.db_handler.get_report_message(1, 10, 'spice')
+        self.assertEqual(row['message_id'], 3)
+
+    async def test_refused_edit_is_retried_not_reposted(self):
+        """Test that a forbidden edit keeps the old post registered and the item dirty."""
+        await self.cog.post_demand_report(self.channel)
+        await self.bot.db_handler.set_demand('spice', 'medium', GUILD)
+        forbidden = discord.Forbidden(MagicMock(status=403), 'Missing Permissions')
+        self.channel.get_partial_message.return_value.edit.side_effect = forbidden
+        with unittest.mock.patch('builtins.print') as log:
+            await self.cog.refresh_changed(self.channel)
+        self.assertEqual(self.channel.send.call_count, 2)
+        self.assertIn('REPORT EDIT ERROR', log.call_args.args[0])
+        row = await self.bot.db_handler.get_report_message(1, 10, 'spice')
+        self.assertEqual(row['message_id'], 1)
+        self.assertIn('spice', await self.bot.db_handler.drain_dirty_resources(GUILD))
+
+    async def test_purge_bulk_deletes_in_chunks(self):
+        """Test that switching modes removes stale posts with one bulk call per 100 ids."""
+        db = self.bot.db_handler
+        for i in range(150):
+            await db.set_report_message(1, 10, f'r{i}', 1000 + i, 'fp')
+        await db.set_setting('report_mode', 'digest', GUILD)
+        await self.cog.post_demand_report(self.channel)
+        sizes = [len(c.args[0]) for c in self.channel.delete_messages.call_args_list]
+        self.assertEqual(sizes, [100, 50])
+        self.assertEqual(await db.get_report_messages(10, 'single'), [])
+
+    async def test_purge_forgets_posts_it_cannot_delete(self):
+        """Test that a refused delete is logged and its registry row is still dropped."""
+        db = self.bot.db_handler
+        for i in range(3):
+            await db.set_report_message(1, 10, f'r{i}', 1000 + i, 'fp')
+        forbidden = discord.Forbidden(MagicMock(status=403), 'Missing Permissions')
+        self.channel.delete_messages.side_effect = forbidden
+        self.channel.get_partial_message.return_value.delete.side_effect = [None, forbidden, None]
+        with unittest.mock.patch('builtins.print') as log:
+            await self.cog._purge(self.channel, 'single')
+        self.assertEqual(self.channel.get_partial_message.return_value.delete.await_count, 3)
+        self.assertIn('REPORT PURGE ERROR', log.call_args.args[0])
+        self.assertEqual(await db.get_report_messages(10, 'single'), [])
+
+    async def test_legacy_settings_are_adopted(self):
+        """Test that message ids kept in settings by older versions move into the registry."""
+        db = self.bot.db_handler
+        await db.set_setting('msg_spice', 77, GUILD)
+        await db.set_setting('fp_spice', 'old', GUILD)
+        await self.cog.post_demand_report(self.channel)
+        self.channel.get_partial_message.assert_called_with(77)
+        self.assertEqual(await db.get_settings_with_prefix('msg_', GUILD), {})
+
+    async def test_rehydrate_views(self):
+        """Test that a restart re-registers one persistent view per registered post."""
+        await self.cog.post_demand_report(self.channel)
+        self.bot.add_view.reset_mock()
+        self.assertEqual(await self.cog.rehydrate_views(), 2)
+        ids = sorted(c.args[0].children[0].custom_id for c in self.bot.add_view.call_args_list)
+        self.assertEqual(ids, ['demand_spice', 'demand_water'])
+        self.assertTrue(all(c.args[0].is_persistent() for c in self.bot.add_view.call_args_list))
+
+    async def test_select_dispatches_from_custom_id(self):
+        """Test that a rehydrated select acts on the item named by its custom_id, not its stale copy."""
+        view = DemandView(resource('spice', 'low'), self.bot.db_handler)
+        select = view.children[0]
+        inter = AsyncMock()
+        inter.client = MagicMock(**{'get_cog.return_value': None})
+        inter.guild_id = GUILD
+        select._selected_values, select._interaction = ['medium'], inter
+        await select.callback(inter)
+        self.assertEqual((await self.bot.db_handler.get_resource('spice', GUILD))['demand'], 'medium')
+
+    async def test_votes_repost_only_on_threshold_crossings(self):
+        """Test that in vote mode a select casts a vote and the post is only refreshed when the level moves."""
+        await self.bot.db_handler.set_setting('demand_mode', 'vote', GUILD)
+        view = DemandView(resource('sand', 'low'), self.bot.db_handler)
+        select = view.children[0]
+        self.cog._post_single = AsyncMock()
+        for user_id, level in ((1, 'medium'), (2, 'low'), (3, 'high')):
+            inter = AsyncMock()
+            inter.client = MagicMock(**{'get_cog.return_value': self.cog})
+            inter.guild_id, inter.user.id = GUILD, user_id
+            select._selected_values, select._interaction = [level], inter
+            await select.callback(inter)
+        # 1 (medium) -> 0 (low) -> 2 (medium)
+        self.assertEqual(self.cog._post_single.await_count, 3)
+        self.assertIn('Demand is **medium** (score 2.0)', inter.response.send_message.call_args.args[0])
+        self.cog._post_single.reset_mock()
+        inter.user.id = 4
+        select._selected_values = ['high']
+        await select.callback(inter)   # 4: high
+        await select.callback(inter)   # a repeat vote changes nothing
+        self.cog._post_single.assert_awaited_once()
+        self.assertEqual((await self.bot.db_handler.get_resource('sand', GUILD))['demand'], 'high')
+
+    async def test_other_guilds_demand_is_not_reported(self):
+        """Test that a guild's report only shows its own demand levels."""
+        await self.bot.db_handler.set_demand('sand', 'high', GUILD + 1)
+        await self.cog.post_demand_report(self.channel)
+        titles = sorted(c.kwargs['embed'].title for c in self.channel.send.call_args_list)
+        self.assertEqual(titles, ['Spice', 'Water'])
+
+    async def test_shard_loop_survives_a_failed_channel_lookup(self):
+        """Test that a DB error while listing report channels skips one round instead of ending the loop."""
+        self.cog.interval = 0.01
+        self.cog._report_channels = AsyncMock(side_effect=[RuntimeError('database is locked'), [self.channel], []])
+        self.cog.report_cycle = AsyncMock()
+        with unittest.mock.patch('builtins.print') as log:
+            task = asyncio.create_task(self.cog._shard_loop(0, 1))
+            for _ in range(200):
+                if self.cog._report_channels.await_count >= 3 or task.done():
+                    break
+                await asyncio.sleep(0.005)
+            self.assertFalse(task.done())
+            task.cancel()
+        self.assertIn('REPORT LOOP ERROR (shard 0)', log.call_args_list[0].args[0])
+        self.cog.report_cycle.assert_awaited_once_with(self.channel)
+
+    async def test_queued_posts_of_two_guilds_are_not_merged(self):
+        """Test that the same item queued for two guilds' reports is posted in both."""
+        await self.bot.db_handler.set_demand('spice', 'high', GUILD + 1)
+        other = AsyncMock()
+        other.id, other.guild.id = 20, GUILD + 1
+        other.send.side_effect = lambda **kw: MagicMock(id=100)
+        self.bot.outbound = OutboundQueue(workers=1)
+        gate = asyncio.Event()
+        blocker = asyncio.create_task(self.bot.outbound.submit(gate.wait))   # holds the only worker
+        posts = asyncio.gather(self.cog._post_single(self.channel, 'spice'), self.cog._post_single(other, 'spice'))
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(blocker, posts)
+        await self.bot.outbound.stop()
+        self.channel.send.assert_awaited_once()
+        other.send.assert_awaited_once()
+
+    async def test_report_channels_are_split_by_shard(self):
+        """Test that each shard loop only serves the guilds Discord routes to that shard."""
+        db = self.bot.db_handler
+        for gid in (0 << 22 | 1, 1 << 22 | 2, 2 << 22 | 3):
+            await db.set_setting('report_channel_id', gid * 10, gid)
+        self.bot.get_channel = lambda cid: MagicMock(spec=discord.TextChannel, id=cid)
+        ids = [[c.id for c in await self.cog._report_channels(shard, 2)] for shard in range(2)]
+        self.assertEqual(sorted(ids[0]), [(0 << 22 | 1) * 10, (2 << 22 | 3) * 10])
+        self.assertEqual(ids[1], [(1 << 22 | 2) * 10])
+
+    async def test_trends_list_changed_items(self):
+        """Test that /report trends answers privately with the guild's changed items."""
+        ctx = AsyncMock()
+        ctx.guild_id = GUILD
+        await self.cog.rep_trends.callback(self.cog, ctx, 7)
+        embed = ctx.respond.call_args.kwargs['embed']
+        self.assertTrue(ctx.respond.call_args.kwargs['ephemeral'])
+        self.assertIn('**Spice** — 1 change', embed.fields[1].value)
+        self.assertIn('**Water** — 1 change', embed.fields[1].value)
+
+    async def test_report_mode_turns_on_quip_rotation(self):
+        """Test that /report mode's rotation option makes the loop re-render footers once per period."""
+        ctx = AsyncMock()
+        ctx.guild_id, ctx.channel = GUILD, self.channel
+        now = 1_000_000 * 3600
+        with unittest.mock.patch('src.cogs.advisor_cog.time.time', return_value=now):
+            await self.cog.rep_mode.callback(self.cog, ctx, 'single', 'demand', 60)
+            self.assertIn('quips rotate every 60 min', ctx.respond.call_args.args[0])
+            self.channel.reset_mock()
+            await self.cog.refresh_changed(self.channel)
+            self.channel.get_partial_message.assert_not_called()
+        with unittest.mock.patch('src.cogs.advisor_cog.time.time', return_value=now + 3600):
+            await self.cog.refresh_changed(self.channel)
+        self.assertEqual(self.channel.get_partial_message.return_value.edit.await_count, 2)
+        await self.cog.rep_mode.callback(self.cog, ctx, 'single', 'demand', 0)
+        self.assertIsNone(await self.bot.db_handler.get_setting('quip_rotate_minutes', GUILD))
+
+    async def test_bulk_previews_then_applies_once(self):
+        """Test that /demand bulk shows the diff first, then writes it in one call and refreshes the report once."""
+        ctx = AsyncMock()
+        ctx.guild_id = GUILD
+        await self.cog.demand_bulk.callback(self.cog, ctx, 'high', None, 1, None, None)
+        kwargs = ctx.respond.call_args.kwargs
+        self.assertEqual(kwargs['embed'].title, 'Bulk demand change — 2 items')
+        self.assertEqual(await self.bot.db_handler.get_all_by_demand(['high'], GUILD),
+                         [await self.bot.db_handler.get_resource('spice', GUILD)])
+
+        view = kwargs['view']
+        self.assertIsInstance(view, BulkDemandView)
+        inter = AsyncMock()
+        inter.client.get_cog = MagicMock(return_value=self.cog)
+        with unittest.mock.patch.object(self.cog, 'refresh_report', AsyncMock()) as refresh:
+            await view.apply_button.callback(inter)
+            await view.apply_button.callback(inter)
+        refresh.assert_awaited_once_with(GUILD)
+        self.assertEqual(inter.response.edit_message.call_args.kwargs['content'], 'Applied **2** demand changes.')
+        high = {it['id'] for it in await self.bot.db_handler.get_all_by_demand(['high'], GUILD)}
+        self.assertEqual(high, {'spice', 'water', 'sand'})
+
+    def test_quip_is_stable_per_seed(self):
+        self.assertEqual(_quip('spice:0'), _quip('spice:0'))
+
+
+
+class TestDigestSlots(unittest.TestCase):
+    def test_items_keep_their_slot(self):
+        live = {f'r{i}': resource(f'r{i}', 'high') for i in range(12)}
+        assigned = {}
+        assign_slots(assigned, live, 'demand')
+        self.assertEqual(sorted(set(assigned.values())), ['high:0', 'high:1'])
+        before = dict(assigned)
+        live['r0']['demand'] = 'medium'
+        changes, touched = assign_slots(assigned, live, 'demand', ['r0'])
+        self.assertEqual(changes, {'r0': 'medium:0'})
+        self.assertEqual(touched, {before['r0'], 'medium:0'})
+        self.assertEqual({k: v for k, v in assigned.items() if k != 'r0'},
+                         {k: v for k, v in before.items() if k != 'r0'})
+
+
+if __name__ == '__main__':
+    unittest.main()
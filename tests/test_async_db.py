@@ -0,0 +1,85 @@
+# ──────────────── tests/test_async_db.py ────────────────
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.core.async_db import AsyncMentatDB
+from src.core.database import MentatDB
+from src.core.storage import SQLiteStorage
+
+
+class TestAsyncMentatDB(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.adb = AsyncMentatDB(MentatDB(SQLiteStorage(':memory:')))
+
+    async def asyncTearDown(self):
+        await self.adb.close()
+
+    async def test_round_trip(self):
+        await self.adb.set_setting('report_channel_id', 42)
+        self.assertEqual(await self.adb.get_setting('report_channel_id'), 42)
+
+    async def test_calls_run_off_the_loop_thread(self):
+        with patch.object(self.adb.db, 'get_setting', side_effect=lambda key: threading.current_thread().name):
+            self.assertTrue((await self.adb.get_setting('x')).startswith('mentatdb-read'))
+
+    async def test_writes_keep_their_order(self):
+        await asyncio.gather(*(self.adb.set_setting('k', i) for i in range(50)))
+        self.assertEqual(await self.adb.get_setting('k'), 49)
+
+    async def test_slow_storage_does_not_stall_the_loop(self):
+        def slow_get_all_by_demand(levels):
+            time.sleep(0.2)
+            return []
+
+        lag = 0.0
+
+        async def ticker():
+            nonlocal lag
+            for _ in range(10):
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lag = max(lag, time.perf_counter() - start - 0.01)
+
+        with patch.object(self.adb.db, 'get_all_by_demand', side_effect=slow_get_all_by_demand):
+            await asyncio.gather(self.adb.get_all_by_demand(['high']), ticker())
+        self.assertLess(lag, 0.1)
+
+
+class TestOpening(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_wait_for_the_database_to_open(self):
+        opened = threading.Event()
+
+        def factory():
+            opened.wait(1)
+            return MentatDB(SQLiteStorage(':memory:'))
+
+        adb = AsyncMentatDB.opening(factory)
+        try:
+            write = asyncio.ensure_future(adb.set_setting('k', 1))
+            read = asyncio.ensure_future(adb.get_setting('k'))
+            await asyncio.sleep(0.05)
+            self.assertFalse(write.done() or read.done())
+            opened.set()
+            await write
+            self.assertEqual(await adb.get_setting('k'), 1)
+            self.assertEqual(await adb.warm(), 1)
+        finally:
+            await adb.close()
+
+    async def test_open_failure_surfaces_on_ready(self):
+        def factory():
+            raise OSError('disk on fire')
+
+        adb = AsyncMentatDB.opening(factory)
+        with self.assertRaises(OSError):
+            await adb.ready()
+        with self.assertRaises(OSError):
+            await adb.get_setting('k')
+        adb._readers.shutdown()
+        adb._writer.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+# ──────────────── tests/test_bench.py ────────────────
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from bench import run
+
+
+class TestBench(unittest.IsolatedAsyncioTestCase):
+
+    async def test_small_run_saves_a_baseline_covering_every_db_method(self):
+        """Test a tiny end-to-end run: every MentatDB operation has a case and the JSON is written."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'base.json')
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                code = await run.main(['--resources', '60', '--missions', '20', '--users', '20', '--reps', '3',
+                                       '--save', path])
+            self.assertEqual(code, 0)
+            self.assertNotIn('no benchmark for', out.getvalue())
+            with open(path) as f:
+                results = json.load(f)['results']
+        self.assertIn('sheet.changed_1pct[60]', results)
+        self.assertIn('cog.post_single[60]', results)
+        self.assertIn('db.add_mission_participant[60]', results)
+
+    def test_compare_needs_median_and_best_run_slower(self):
+        """Test that only a slowdown in both median and fastest run counts as a regression."""
+        base = {'a[1]': {'median_us': 100, 'min_us': 90}, 'b[1]': {'median_us': 100, 'min_us': 90},
+                'c[1]': {'median_us': 1, 'min_us': 1}}
+        now = {'a[1]': {'median_us': 200, 'min_us': 180}, 'b[1]': {'median_us': 200, 'min_us': 95},
+               'c[1]': {'median_us': 3, 'min_us': 3}}
+        regressions = run.compare(now, base, threshold=0.25, min_delta_us=5)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('a[1]'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+# ──────────────── tests/test_bulk_demand.py ────────────────
+import unittest
+from src.core.bulk_demand import parse_csv, plan, select
+
+
+def item(name, type_='Resource', tier=1, demand='low'):
+    return {'id': name.lower().replace(' ', '_'), 'name': name, 'type': type_, 'tier': tier, 'demand': demand}
+
+
+ITEMS = [item('Plastanium Ingot', tier=4), item('Plastanium Blade', 'Weapon', 4, 'high'),
+         item('Fuel Cell', tier=2), item('Spice Melange', tier=4, demand='medium')]
+
+
+class TestBulkDemand(unittest.TestCase):
+    def test_filters_combine(self):
+        self.assertEqual([it['id'] for it in select(ITEMS, tier=4, pattern='plast*')],
+                         ['plastanium_ingot', 'plastanium_blade'])
+        self.assertEqual([it['id'] for it in select(ITEMS, type_='weapon')], ['plastanium_blade'])
+        self.assertEqual([it['id'] for it in select(ITEMS, pattern='CELL')], ['fuel_cell'])
+
+    def test_csv_matches_names_and_ids(self):
+        text = 'item,level\nfuel cell, High\nspice_melange,low\n\nGhost,high\nFuel Cell,bogus\nlonely\n'
+        targets, problems = parse_csv(text, ITEMS)
+        self.assertEqual(targets, {'fuel_cell': 'high', 'spice_melange': 'low'})
+        self.assertEqual(problems, ['line 5: unknown item `Ghost`', 'line 6: unknown level `bogus`',
+                                    'line 7: expected `item,level`'])
+
+    def test_plan_lists_only_changes(self):
+        targets = {'plastanium_blade': 'high', 'fuel_cell': 'medium', 'spice_melange': 'low', 'gone': 'high'}
+        self.assertEqual([(it['id'], old, new) for it, old, new in plan(ITEMS, targets)],
+                         [('fuel_cell', 'low', 'medium'), ('spice_melange', 'medium', 'low')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,479 @@
+# ──────────────── tests/test_database.py ────────────────
+import datetime
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.core import database
+from src.core.database import MentatDB
+from src.core.demand_log import DAY, RETAIN_DAYS, DemandLog
+from src.core import storage as storage_module
+from src.core.storage import SQLiteStorage, TinyDBStorage, migrate_json_to_sqlite, open_storage
+
+RESOURCE = {'id': 'spice', 'name': 'Spice', 'type': 'Raw', 'tier': 1, 'details': '',
+            'image_url': '', 'dgt_slug': '', 'demand': 'low'}
+
+
+class StorageContract:
+    """Behaviour every storage backend must share."""
+
+    def make_storage(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = MentatDB(self.make_storage())
+
+    def tearDown(self):
+        self.db.storage.close()
+        self.tmp.cleanup()
+
+    def test_resources(self):
+        self.db.storage.replace('resources', [dict(RESOURCE)])
+        self.assertTrue(self.db.set_demand('spice', 'high'))
+        self.assertFalse(self.db.set_demand('missing', 'high'))
+        self.assertEqual(self.db.get_resource('spice')['demand'], 'high')
+        self.assertEqual(self.db.get_resource_by_name('Spice')['id'], 'spice')
+        self.assertEqual([r['id'] for r in self.db.get_all_by_demand(['high', 'medium'])], ['spice'])
+
+    def test_settings(self):
+        self.db.set_setting('report_channel_id', 42)
+        self.db.set_setting('msg_spice', 7)
+        self.db.set_setting('msg_spice', 8)
+        self.assertEqual(self.db.get_setting('report_channel_id'), 42)
+        self.assertEqual(self.db.get_settings_with_prefix('msg_'), {'msg_spice': 8})
+        self.db.delete_setting('msg_spice')
+        self.assertIsNone(self.db.get_setting('msg_spice'))
+
+    def test_missions(self):
+        self.db.create_mission(1, 1, 10, 100, 'Raid', '2025-01-01T12:00:00+00:00')
+        self.db.update_mission_participants(1, [100, 200])
+        self.assertEqual(self.db.get_mission(1)['participants'], [100, 200])
+        self.assertEqual(len(self.db.get_all_missions()), 1)
+        self.db.delete_mission(1)
+        self.assertIsNone(self.db.get_mission(1))
+
+    def test_mission_pages_follow_start_time(self):
+        # offsets differ, so the stored strings do not sort in start order
+        times = ['2025-01-01T12:00:00+10:00', '2025-01-01T01:30:00+00:00', '2025-01-01T09:00:00-05:00',
+                 '2024-12-31T12:00:00+00:00']
+        for i, t in enumerate(times, 1):
+            self.db.create_mission(i, i, 10 + i % 2, 100 + i % 2, 'Raid', t, guild_id=1)
+        since = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        page, total = self.db.get_missions_page(1, since, limit=2)
+        self.assertEqual(([m['id'] for m in page], total), ([2, 1], 3))
+        self.assertEqual([m['id'] for m in self.db.get_missions_page(1, since, offset=2)[0]], [3])
+        self.assertEqual([m['id'] for m in self.db.get_missions_page(1, channel_id=11)[0]], [1, 3])
+        self.assertEqual([m['id'] for m in self.db.get_missions_page(1, creator_id=100)[0]], [4, 2])
+
+        self.db.add_mission_participant(2, 7)
+        self.db.add_mission_participant(3, 7)
+        self.db.remove_mission_participant(2, 7)
+        self.db.delete_mission(3)
+        self.assertEqual(self.db.get_missions_page(1, participant_id=7), ([], 0))
+        self.db.invalidate()
+        self.assertEqual([m['id'] for m in self.db.get_missions_page(1, participant_id=101)[0]], [1])
+
+    def test_roster_changes_are_atomic(self):
+        self.db.create_mission(1, 1, 10, 100, 'Raid', '2025-01-01T12:00:00+00:00')
+        self.assertTrue(self.db.add_mission_participant(1, 200))
+        self.assertFalse(self.db.add_mission_participant(1, 200))
+        self.assertTrue(self.db.remove_mission_participant(1, 100))
+        self.assertFalse(self.db.remove_mission_participant(1, 100))
+        self.assertIsNone(self.db.add_mission_participant(2, 200))
+        self.assertEqual(self.db.get_mission(1)['participants'], [200])
+
+    def test_user_timezone(self):
+        self.db.set_user_timezone(5, 'UTC')
+        self.db.set_user_timezone(5, 'Australia/Sydney')
+        self.assertEqual(self.db.get_user_timezone(5), 'Australia/Sydney')
+        self.assertIsNone(self.db.get_user_timezone(6))
+
+    def test_guilds_are_partitioned(self):
+        self.db.storage.replace('resources', [dict(RESOURCE)])
+        self.db.set_demand('spice', 'high', guild_id=1)
+        self.db.set_setting('report_channel_id', 10, guild_id=1)
+        self.db.set_setting('report_channel_id', 20, guild_id=2)
+        self.assertEqual(self.db.get_resource('spice', 1)['demand'], 'high')
+        self.assertEqual(self.db.get_resource('spice', 2)['demand'], 'low')
+        self.assertEqual(self.db.get_all_by_demand(['high'], 2), [])
+        self.assertEqual(self.db.get_report_channels(), {1: 10, 2: 20})
+        self.assertEqual(self.db.drain_dirty_resources(1), {'spice'})
+        self.assertEqual(self.db.drain_dirty_resources(2), set())
+
+    def test_adopt_legacy_guild(self):
+        self.db.storage.replace('resources', [dict(RESOURCE)])
+        self.db.set_demand('spice', 'medium')
+        self.db.set_setting('report_channel_id', 10)
+        self.db.set_setting('sheet_etag', '"v1"')
+        self.db.create_mission(1, 1, 10, 100, 'Raid', '2025-01-01T12:00:00+00:00')
+        self.assertEqual(self.db.adopt_legacy_guild(7), {'settings': 1, 'demand': 1, 'missions': 1})
+        self.assertEqual(self.db.get_resource('spice', 7)['demand'], 'medium')
+        self.assertEqual(self.db.get_report_channels(), {7: 10})
+        self.assertEqual(self.db.get_setting('sheet_etag'), '"v1"')
+        self.assertEqual(len(self.db.get_all_missions(7)), 1)
+        self.assertEqual(self.db.adopt_legacy_guild(7), {'settings': 0, 'demand': 0, 'missions': 0})
+
+    def test_report_messages(self):
+        self.db.set_report_message(1, 10, 'spice', 7, 'a')
+        self.db.set_report_message(1, 10, 'digest:high:0', 8, 'b', kind='digest')
+        self.db.set_report_message(1, 11, 'spice', 9, 'c')
+        self.db.set_report_message(1, 10, 'spice', 7, 'd')
+        self.assertEqual(self.db.get_report_message(1, 10, 'spice')['fingerprint'], 'd')
+        self.assertEqual([r['message_id'] for r in self.db.get_report_messages(10, 'single')], [7])
+        self.assertEqual(len(self.db.get_report_messages(10)), 2)
+        self.db.delete_report_messages([(1, 10, 'spice'), (1, 10, 'digest:high:0')])
+        self.assertEqual(self.db.get_report_messages(10), [])
+        self.assertIsNotNone(self.db.get_report_message(1, 11, 'spice'))
+
+
+class TestSQLiteStorage(StorageContract, unittest.TestCase):
+    def make_storage(self):
+        return SQLiteStorage(os.path.join(self.tmp.name, 'db.sqlite3'))
+
+    def test_wal_mode(self):
+        mode = self.db.storage.conn.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_upgrades_pre_guild_schema(self):
+        path = os.path.join(self.tmp.name, 'old.sqlite3')
+        conn = sqlite3.connect(path)
+        conn.executescript('''
+            CREATE TABLE settings (key TEXT, value TEXT, _extra TEXT, PRIMARY KEY (key));
+            CREATE TABLE resources (id TEXT, name TEXT, type TEXT, tier INTEGER, details TEXT, image_url TEXT,
+                                    dgt_slug TEXT, demand TEXT, _extra TEXT, PRIMARY KEY (id));
+            CREATE TABLE missions (id INTEGER, message_id INTEGER, channel_id INTEGER, creator_id INTEGER,
+                                   details TEXT, time TEXT, participants TEXT, _extra TEXT, PRIMARY KEY (message_id));
+            INSERT INTO settings VALUES ('report_channel_id', '42', NULL);
+            INSERT INTO resources VALUES ('spice', 'Spice', 'Raw', 1, '', '', '', 'high', NULL);
+            INSERT INTO missions VALUES (3, 3, 4, 5, 'x', 't', '[5]', NULL);
+        ''')
+        conn.commit()
+        conn.close()
+        db = MentatDB(SQLiteStorage(path))
+        self.assertEqual(db.get_setting('report_channel_id'), 42)
+        self.assertEqual(db.get_resource('spice')['demand'], 'high')
+        self.assertEqual(db.get_mission(3)['guild_id'], 0)
+        db.storage.close()
+
+    def test_transaction_rolls_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.set_setting('a', 1)
+                raise RuntimeError
+        self.assertIsNone(self.db.get_setting('a'))
+
+
+class TestReadCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'db.sqlite3')
+        self.db = MentatDB(SQLiteStorage(self.path))
+        self.db.storage.replace('resources', [dict(RESOURCE)])
+
+    def tearDown(self):
+        self.db.storage.close()
+        self.tmp.cleanup()
+
+    def test_reads_do_not_touch_storage(self):
+        self.db.get_resource('spice')
+        with patch.object(self.db.storage, 'get', side_effect=AssertionError), \
+                patch.object(self.db.storage, 'all', side_effect=AssertionError):
+            self.assertEqual(self.db.get_resource('spice')['name'], 'Spice')
+            self.assertEqual(self.db.get_resource_by_name('Spice')['id'], 'spice')
+
+    def test_demand_index_follows_writes(self):
+        self.assertEqual(self.db.get_all_by_demand(['high']), [])
+        self.db.set_demand('spice', 'high')
+        self.assertEqual([r['id'] for r in self.db.get_all_by_demand(['high'])], ['spice'])
+        self.assertEqual(self.db.get_all_by_demand(['low']), [])
+
+    def test_returned_documents_are_copies(self):
+        self.db.create_mission(1, 1, 10, 100, 'Raid', 't')
+        self.db.get_mission(1)['participants'].append(200)
+        self.assertEqual(self.db.get_mission(1)['participants'], [100])
+
+    def test_outside_change_invalidates(self):
+        self.db.get_resource('spice')
+        other = MentatDB(SQLiteStorage(self.path))
+        other.set_demand('spice', 'medium')
+        other.storage.close()
+        with patch.object(database, 'CACHE_CHECK_INTERVAL', 0):
+            self.assertEqual(self.db.get_resource('spice')['demand'], 'medium')
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = MentatDB(SQLiteStorage(os.path.join(self.tmp.name, 'db.sqlite3')),
+                           write_behind_ms=60_000, write_behind_max_ops=5)
+        self.db.storage.replace('resources', [dict(RESOURCE)])
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_writes_are_visible_before_flush(self):
+        self.db.set_demand('spice', 'high')
+        self.assertEqual(self.db.get_resource('spice')['demand'], 'high')
+        self.assertIsNone(self.db.storage.get('demand', (0, 'spice')))
+        self.assertEqual(self.db.flush(), 1)
+        self.assertEqual(self.db.storage.get('demand', (0, 'spice'))['demand'], 'high')
+
+    def test_burst_is_coalesced(self):
+        for level in ('high', 'medium', 'low', 'high'):
+            self.db.set_demand('spice', level)
+        with patch.object(self.db.storage, 'upsert', wraps=self.db.storage.upsert) as upsert:
+            self.assertEqual(self.db.flush(), 4)
+        upsert.assert_called_once()
+        stats = self.db.write_stats()
+        self.assertEqual((stats['logical_writes'], stats['physical_flushes'], stats['last_flush_folded']), (4, 1, 4))
+
+    def test_max_ops_triggers_flush(self):
+        for i in range(5):
+            self.db.set_setting(f'k{i}', i)
+        self.assertEqual(self.db.write_stats()['physical_flushes'], 1)
+        self.assertEqual(self.db.storage.get('settings', (0, 'k4'))['value'], 4)
+
+    def test_delay_triggers_flush(self):
+        self.db.write_buffer.delay = 0.01
+        self.db.set_setting('a', 1)
+        self.db.write_buffer.timer.join(1)
+        self.assertEqual(self.db.storage.get('settings', (0, 'a'))['value'], 1)
+
+    def test_delete_after_upsert(self):
+        self.db.set_setting('msg_spice', 1)
+        self.db.delete_setting('msg_spice')
+        self.db.flush()
+        self.assertIsNone(self.db.storage.get('settings', (0, 'msg_spice')))
+        self.assertIsNone(self.db.get_setting('msg_spice'))
+
+
+SHEET = """Name,Type,Tier,Details,ImageURL,dgtSlug
+Spice,Raw,1,"Harvested
+in the deep desert",,
+Water,Raw,1,,,
+"""
+
+
+def sheet_response(body: str, status: int = 200, headers: dict | None = None):
+    response = MagicMock(status_code=status, headers=headers or {})
+    response.raw = io.BytesIO(body.encode())
+    response.__enter__.return_value = response
+    return response
+
+
+class TestSheetSync(unittest.TestCase):
+    def setUp(self):
+        self.db = MentatDB(SQLiteStorage(':memory:'))
+        self.db.google_sheet_url = 'https://example.invalid/sheet.csv'
+
+    def tearDown(self):
+        self.db.close()
+
+    def sync(self, body, status=200, headers=None):
+        with patch('requests.get', return_value=sheet_response(body, status, headers)) as get:
+            return self.db.sync_from_google_sheet(), get
+
+    def test_first_sync_adds_everything(self):
+        report, _ = self.sync(SHEET, headers={'ETag': '"v1"'})
+        self.assertEqual((report.status, report.added, report.changed), ('updated', 2, 0))
+        self.assertEqual(self.db.get_resource('spice')['details'], 'Harvested\nin the deep desert')
+        self.assertEqual(self.db.get_setting('sheet_etag'), '"v1"')
+
+    def test_resync_applies_only_the_delta(self):
+        self.sync(SHEET)
+        self.db.set_demand('spice', 'high')
+        body = SHEET.replace('Water,Raw,1', 'Water,Raw,2') + 'Melange,Refined,3,,,\n'
+        with patch.object(self.db.storage, 'replace', side_effect=AssertionError):
+            report, _ = self.sync(body)
+        self.assertEqual((report.added, report.changed, report.removed, report.unchanged), (1, 1, 0, 1))
+        self.assertEqual(sorted(report.changed_ids), ['melange', 'water'])
+        self.assertEqual(self.db.get_resource('spice')['demand'], 'high')
+        self.assertEqual(self.db.get_resource('water')['tier'], 2)
+
+    def test_removed_items(self):
+        self.sync(SHEET)
+        report, _ = self.sync('Name,Type,Tier,Details,ImageURL,dgtSlug\nWater,Raw,1,,,\n')
+        self.assertEqual(report.removed, 1)
+        self.assertIsNone(self.db.get_resource('spice'))
+
+    def test_not_modified(self):
+        self.sync(SHEET, headers={'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'})
+        report, get = self.sync('', status=304)
+        self.assertEqual(report.status, 'not_modified')
+        self.assertEqual(get.call_args.kwargs['headers'],
+                         {'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'})
+        self.assertEqual(len(self.db.get_all_resources()), 2)
+
+    def test_empty_sheet_keeps_data(self):
+        self.sync(SHEET)
+        report, _ = self.sync('Name,Type,Tier,Details,ImageURL,dgtSlug\n')
+        self.assertEqual(report.status, 'empty')
+        self.assertEqual(len(self.db.get_all_resources()), 2)
+
+
+class TestDemandHistory(unittest.TestCase):
+    NOW = 1_800_000_000 - 1_800_000_000 % DAY + 12 * 3600   # a UTC noon
+
+    def setUp(self):
+        self.log = DemandLog()
+        self.db = MentatDB(SQLiteStorage(':memory:'), demand_log=self.log)
+        self.db.storage.replace('resources', [dict(RESOURCE), dict(RESOURCE, id='water', name='Water')])
+
+    def tearDown(self):
+        self.db.storage.close()
+
+    def test_only_changes_are_logged(self):
+        self.db.set_demand('spice', 'high', 1, user_id=7)
+        self.db.set_demand('spice', 'high', 1, user_id=8)
+        self.db.set_demand('spice', 'low', 1, user_id=9)
+        self.assertEqual([(e.level, e.user_id) for e in self.log.events()], [('high', 7), ('low', 9)])
+
+    def test_set_demand_many(self):
+        self.db.set_demand('water', 'high', 1)
+        self.db.drain_dirty_resources(1)
+        changed = self.db.set_demand_many({'spice': 'high', 'water': 'high', 'ghost': 'low'}, 1, user_id=4)
+        self.assertEqual(changed, {'spice': ('low', 'high')})
+        self.assertEqual(self.db.drain_dirty_resources(1), {'spice'})
+        self.assertEqual(self.log.events()[-1][1:5], (1, 4, 'spice', 'high'))
+
+    def test_set_demand_many_is_all_or_nothing(self):
+        upsert = self.db.storage.upsert
+        writes = []
+
+        def failing(table, doc):
+            writes.append(doc)
+            if len(writes) == 2:
+                raise sqlite3.OperationalError('disk I/O error')
+            upsert(table, doc)
+        with patch.object(self.db.storage, 'upsert', failing), self.assertRaises(sqlite3.OperationalError):
+            self.db.set_demand_many({'spice': 'high', 'water': 'medium'}, 1)
+        self.assertEqual(self.db.get_all_by_demand(['high', 'medium'], 1), [])
+        self.assertEqual(self.log.events(), [])
+
+    def test_votes_move_the_level_only_across_thresholds(self):
+        hour = 3600
+        self.assertEqual(self.db.cast_vote('spice', 'high', 1, user_id=1, now=0)['level'], 'medium')
+        self.assertEqual(self.db.drain_dirty_resources(1), {'spice'})
+        vote = self.db.cast_vote('spice', 'medium', 1, user_id=2, now=0)
+        self.assertEqual((vote['score'], vote['level'], vote['changed']), (3.0, 'high', True))
+        self.db.drain_dirty_resources(1)
+        # re-voting the same level only refreshes the vote
+        self.assertFalse(self.db.cast_vote('spice', 'medium', 1, user_id=2, now=0)['changed'])
+        self.assertEqual(self.db.drain_dirty_resources(1), set())
+        self.assertIsNone(self.db.cast_vote('ghost', 'high', 1, user_id=2))
+
+        self.assertEqual(self.db.decay_votes(1, now=2 * hour), {'spice'})   # 3 * 2^(-2/24) < 3
+        self.assertEqual(self.db.get_resource('spice', 1)['demand'], 'medium')
+        self.assertEqual(self.db.decay_votes(1, now=3 * hour), set())
+        self.db.set_setting('vote_half_life_hours', 1, 1)
+        self.assertEqual(self.db.decay_votes(1, now=3 * hour), {'spice'})
+        self.assertEqual(self.db.get_resource('spice', 1)['demand'], 'low')
+        self.assertEqual([e.user_id for e in self.log.events()], [1, 2, 0, 0])
+
+    def test_direct_set_overrides_the_votes(self):
+        self.db.cast_vote('spice', 'low', 1, user_id=1, now=0)
+        self.db.cast_vote('water', 'high', 1, user_id=1, now=0)
+        self.db.set_demand('spice', 'high', 1)
+        self.db.set_demand_many({'water': 'medium'}, 1)
+        # the next report cycle's decay must not put the votes' level back
+        self.assertEqual(self.db.decay_votes(1, now=3600), set())
+        self.assertEqual([r['demand'] for r in map(self.db.get_resource, ('spice', 'water'), (1, 1))], ['high', 'medium'])
+        # voting starts afresh rather than taking the dropped vote out of a new tally
+        self.assertEqual(self.db.cast_vote('spice', 'medium', 1, user_id=1, now=3600)['score'], 1.0)
+
+    def test_trends_span_compacted_days(self):
+        old = self.NOW - (RETAIN_DAYS + 2) * DAY
+        self.log.append(1, 'spice', 'high', 5, ts=old)
+        self.log.append(1, 'spice', 'low', 5, ts=old + 3600)
+        self.log.append(1, 'water', 'high', 5, ts=old + 3600)
+        self.log.append(1, 'water', 'medium', 5, ts=self.NOW - 7200)
+        self.assertEqual(self.db.compact_demand_log(now=self.NOW), 3)
+        self.assertEqual(len(self.db.storage.all('demand_daily')), 3)   # water's high spans two days
+
+        recent = {r['id']: r for r in self.db.demand_trends(1, days=1, now=self.NOW)}
+        self.assertEqual((recent['water']['high_hours'], recent['water']['medium_hours']), (22, 2))
+        self.assertNotIn('spice', recent)
+        full = {r['id']: r for r in self.db.demand_trends(1, days=RETAIN_DAYS + 3, now=self.NOW)}
+        self.assertEqual((full['spice']['high_hours'], full['spice']['flips']), (1, 2))
+        self.assertEqual(full['water']['flips'], 2)
+        self.assertEqual(self.db.demand_trends(2, days=90, now=self.NOW), [])
+
+
+class TestTinyDBStorage(StorageContract, unittest.TestCase):
+    def make_storage(self):
+        return TinyDBStorage(os.path.join(self.tmp.name, 'db.json'))
+
+    def test_set_demand_many_is_all_or_nothing(self):
+        self.db.storage.replace('resources', [dict(RESOURCE), dict(RESOURCE, id='water', name='Water')])
+        upsert, writes = self.db.storage.upsert, []
+
+        def failing(table, doc):
+            writes.append(doc)
+            if len(writes) == 2:
+                raise OSError('disk full')
+            upsert(table, doc)
+        with patch.object(self.db.storage, 'upsert', failing), self.assertRaises(OSError):
+            self.db.set_demand_many({'spice': 'high', 'water': 'medium'}, 1)
+        self.assertEqual(self.db.get_all_by_demand(['high', 'medium'], 1), [])
+        self.assertEqual(self.db.storage.all('demand'), [])
+        # nothing of the batch reached the file either
+        self.assertEqual(self.on_disk('demand'), [])
+        self.db.set_demand_many({'spice': 'high', 'water': 'medium'}, 1)
+        self.assertEqual(len(self.on_disk('demand')), 2)
+
+    def on_disk(self, table):
+        reopened = TinyDBStorage(self.db.storage.path)
+        try:
+            return reopened.all(table)
+        finally:
+            reopened.close()
+
+
+class TestMigration(unittest.TestCase):
+    def test_migrate_json_to_sqlite(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'db.json')
+            with open(path, 'w') as fh:
+                json.dump({
+                    'resources': {'1': dict(RESOURCE, demand='high')},
+                    'settings': {'1': {'key': 'msg_spice', 'value': 99}},
+                    'missions': {'1': {'id': 3, 'message_id': 3, 'channel_id': 4, 'creator_id': 5,
+                                       'details': 'x', 'time': 't', 'participants': [5]}},
+                    'user_settings': {'1': {'user_id': 5, 'timezone': 'UTC'},
+                                      '2': {'user_id': 5, 'timezone': 'Europe/Paris'}},
+                }, fh)
+            storage = SQLiteStorage(os.path.join(tmp, 'db.sqlite3'))
+            counts = migrate_json_to_sqlite(path, storage)
+            db = MentatDB(storage)
+            self.assertEqual(counts['user_settings'], 1)
+            self.assertEqual(db.get_resource('spice')['demand'], 'high')
+            self.assertEqual(db.get_setting('msg_spice'), 99)
+            self.assertEqual(db.get_mission(3)['participants'], [5])
+            self.assertEqual(db.get_user_timezone(5), 'Europe/Paris')
+            storage.close()
+
+    def test_interrupted_migration_is_retried(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path, sqlite_path = os.path.join(tmp, 'db.json'), os.path.join(tmp, 'db.sqlite3')
+            with open(json_path, 'w') as fh:
+                json.dump({'settings': {'1': {'key': 'report_channel_id', 'value': 42}}}, fh)
+            with patch.object(storage_module, 'JSON_PATH', json_path), \
+                    patch.object(storage_module, 'SQLITE_PATH', sqlite_path):
+                with patch.object(storage_module, 'migrate_json_to_sqlite', side_effect=OSError('killed')), \
+                        self.assertRaises(OSError):
+                    open_storage('sqlite')
+                self.assertFalse(os.path.exists(sqlite_path))   # nothing a later boot could mistake for done
+                with patch('builtins.print'):
+                    storage = open_storage('sqlite')
+            self.assertEqual(MentatDB(storage).get_setting('report_channel_id'), 42)
+            storage.close()
+            self.assertEqual(sorted(os.listdir(tmp)), ['db.json.migrated', 'db.sqlite3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
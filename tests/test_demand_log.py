@@ -0,0 +1,99 @@
+# ──────────────── tests/test_demand_log.py ────────────────
+import os
+import tempfile
+import unittest
+from src.core.demand_log import DAY, RECORD, SNAPSHOT, DemandLog, daily_summaries, flips, level_seconds
+
+T0 = 1_700_006_400   # a UTC midnight
+
+
+class TestDemandLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'demand_log.bin')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reopen_drops_a_torn_record(self):
+        log = DemandLog(self.path)
+        log.append(1, 'spice', 'high', 7, ts=T0)
+        log.append(1, 'water', 'medium', 8, ts=T0 + 10)
+        with open(self.path, 'ab') as fh:
+            fh.write(b'\x00' * (RECORD.size // 2))
+        events = DemandLog(self.path).events()
+        self.assertEqual([(e.resource_id, e.level, e.user_id) for e in events],
+                         [('spice', 'high', 7), ('water', 'medium', 8)])
+
+    def test_time_ranges_and_monotonic_stamps(self):
+        log = DemandLog()
+        for i in range(10):
+            log.append(1, 'spice', ('low', 'high')[i % 2], ts=T0 + i * 60)
+        log.append(1, 'spice', 'low', ts=T0)   # a clock step back is clamped
+        self.assertEqual([e.ts for e in log.events(T0 + 120, T0 + 300)], [T0 + 120, T0 + 180, T0 + 240])
+        self.assertEqual(log.events()[-1].ts, T0 + 540)
+
+    def test_compact_carries_levels_over(self):
+        log = DemandLog(self.path)
+        log.append(1, 'spice', 'high', ts=T0)
+        log.append(1, 'water', 'high', ts=T0)
+        log.append(1, 'water', 'low', ts=T0 + 60)
+        log.append(1, 'sand', 'medium', ts=T0 + 2 * DAY)
+        self.assertEqual(log.compact(T0 + DAY), 3)
+        events = DemandLog(self.path).events()
+        self.assertEqual([(e.ts, e.resource_id, e.level, e.kind) for e in events],
+                         [(T0 + DAY, 'spice', 'high', SNAPSHOT), (T0 + 2 * DAY, 'sand', 'medium', 0)])
+
+    def test_compact_swaps_only_the_record_file(self):
+        log = DemandLog(self.path)
+        log.append(1, 'spice', 'high', ts=T0)
+        log.append(1, 'water', 'medium', ts=T0 + 2 * DAY)
+        with open(self.path + '.ids', 'rb') as fh:
+            ids = fh.read()
+        with open(self.path, 'rb') as fh:
+            old_records = fh.read()
+        log.compact(T0 + DAY)
+        with open(self.path + '.ids', 'rb') as fh:
+            self.assertEqual(fh.read(), ids)   # numbers are kept, so old and new records share one id file
+        # a crash before the swap leaves the old records, which still decode against it
+        with open(self.path, 'wb') as fh:
+            fh.write(old_records)
+        self.assertEqual([e.resource_id for e in DemandLog(self.path).events()], ['spice', 'water'])
+
+    def test_window_starts_from_the_levels_before_it(self):
+        log = DemandLog(self.path)
+        log.append(1, 'spice', 'high', ts=T0, prev='low')
+        log.append(1, 'water', 'medium', ts=T0, prev='low')
+        log.append(2, 'sand', 'high', ts=T0 + 10, prev='low')
+        log.append(1, 'spice', 'low', ts=T0 + DAY, prev='high')
+        log.append(1, 'water', 'high', ts=T0 + DAY, prev=None)   # a record from before prev levels
+        for reopened in (log, DemandLog(self.path)):
+            levels, events = reopened.window(1, T0 + 60, T0 + 2 * DAY)
+            self.assertEqual(levels, {'spice': 'high', 'water': 'medium'})
+            self.assertEqual([(e.resource_id, e.level, e.prev) for e in events],
+                             [('spice', 'low', 'high'), ('water', 'high', None)])
+        self.assertEqual(log.window(1, T0, T0 + 60)[0], {})   # nothing is known before the first record
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        log = DemandLog()
+        log.append(1, 'spice', 'high', ts=T0 + DAY - 3600)       # an hour before midnight
+        log.append(1, 'spice', 'medium', ts=T0 + DAY + 7200)     # two hours after
+        log.append(1, 'spice', 'low', ts=T0 + DAY + 10800)
+        self.events = log.events()
+
+    def test_level_seconds_clip_to_the_window(self):
+        spent = level_seconds(self.events, T0 + DAY, T0 + 2 * DAY)[(1, 'spice')]
+        self.assertEqual(spent, {'high': 7200, 'medium': 3600})
+
+    def test_flips(self):
+        self.assertEqual(flips(self.events, T0 + DAY, T0 + 2 * DAY), {(1, 'spice'): 2})
+
+    def test_daily_summaries_split_at_midnight(self):
+        rows = sorted(daily_summaries(self.events, T0 + 2 * DAY), key=lambda r: r['day'])
+        self.assertEqual([(r['high_s'], r['medium_s'], r['flips']) for r in rows], [(3600, 0, 1), (7200, 3600, 2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+# ──────────────── tests/test_metrics.py ────────────────
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+from src.cogs.metrics_cog import MetricsCog
+from src.core.metrics import Histogram, Metrics, instrument_http, metrics, serve, timed
+from src.core.profiler import SamplingProfiler, top_frames, write_folded
+from src.core.tracing import span, tracer
+
+
+class TestMetrics(unittest.IsolatedAsyncioTestCase):
+
+    def test_histogram_quantiles(self):
+        """Test that quantiles land on bucket bounds and never exceed the observed max."""
+        h = Histogram()
+        for s in [0.002] * 90 + [0.3] * 10:
+            h.observe(s)
+        self.assertEqual(h.quantile(0.5), 0.005)
+        self.assertEqual(h.quantile(0.95), 0.3)
+        self.assertEqual(h.count, 100)
+
+    def test_render_prometheus_text(self):
+        """Test the exposition format: cumulative buckets, sum/count, escaped labels."""
+        m = Metrics()
+        m.describe('req_seconds', 'Request time.')
+        m.observe('req_seconds', 0.02, route='GET "x"')
+        m.observe('req_seconds', 0.2, route='GET "x"')
+        m.inc('hits_total', route='a')
+        text = m.render()
+        self.assertIn('# HELP req_seconds Request time.', text)
+        self.assertIn('# TYPE req_seconds histogram', text)
+        self.assertIn('req_seconds_bucket{route="GET \\"x\\"",le="0.025"} 1', text)
+        self.assertIn('req_seconds_bucket{route="GET \\"x\\"",le="+Inf"} 2', text)
+        self.assertIn('req_seconds_count{route="GET \\"x\\""} 2', text)
+        self.assertIn('hits_total{route="a"} 1', text)
+
+    async def test_timed_decorator(self):
+        """Test that a decorated coroutine is observed once per call, errors included."""
+        @timed('test_timed_seconds', component='x')
+        async def work(fail=False):
+            if fail:
+                raise ValueError
+            return 5
+
+        self.assertEqual(await work(), 5)
+        with self.assertRaises(ValueError):
+            await work(fail=True)
+        self.assertEqual(metrics.histogram('test_timed_seconds')[(('component', 'x'),)].count, 2)
+
+    async def test_instrument_http_counts_routes_and_rate_limits(self):
+        """Test that REST calls are counted by route and 429 log lines by scope."""
+        class Http:
+            async def request(self, route, **kwargs):
+                if route.path == '/bad':
+                    raise type('NotFound', (Exception,), {'status': 404})()
+                return {}
+        http = Http()
+        instrument_http(http)
+        before = metrics.counter('mentat_discord_rate_limits_total').get((('scope', 'route'),), 0)
+
+        await http.request(SimpleNamespace(method='PATCH', path='/channels/{channel_id}/messages/{message_id}'))
+        with self.assertRaises(Exception):
+            await http.request(SimpleNamespace(method='GET', path='/bad'))
+        logging.getLogger('discord.http').warning('We are being rate limited. PATCH ... responded with 429.')
+
+        edits = metrics.histogram('mentat_discord_api_seconds')
+        self.assertGreaterEqual(edits[(('route', 'PATCH /channels/{channel_id}/messages/{message_id}'),)].count, 1)
+        errors = metrics.counter('mentat_discord_api_errors_total')
+        self.assertGreaterEqual(errors[(('route', 'GET /bad'), ('status', '404'))], 1)
+        self.assertEqual(metrics.counter('mentat_discord_rate_limits_total')[(('scope', 'route'),)], before + 1)
+
+    async def test_metrics_endpoint(self):
+        """Test that GET /metrics answers with the text format and other paths 404."""
+        metrics.inc('test_endpoint_total')
+        server = await serve(0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async def get(path):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f'GET {path} HTTP/1.1\r\nHost: x\r\n\r\n'.encode())
+                body = await reader.read()
+                writer.close()
+                return body.decode()
+            ok = await get('/metrics')
+            self.assertTrue(ok.startswith('HTTP/1.1 200'))
+            self.assertIn('test_endpoint_total 1', ok)
+            self.assertTrue((await get('/')).startswith('HTTP/1.1 404'))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    async def test_command_latency_and_stats(self):
+        """Test that slash commands are timed from dispatch to completion and show in /mentat stats."""
+        cog = MetricsCog(MagicMock())
+        ctx = SimpleNamespace(interaction=SimpleNamespace(id=99), command=SimpleNamespace(qualified_name='report demand'))
+        await cog.on_application_command(ctx)
+        await cog.on_application_command_completion(ctx)
+        hist = metrics.histogram('mentat_command_seconds')[(('command', 'report demand'), ('status', 'ok'))]
+        self.assertGreaterEqual(hist.count, 1)
+        self.assertIn('`report demand`', cog.stats_text())
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        threshold, slow = tracer.threshold, tracer.slow
+        self.addCleanup(setattr, tracer, 'threshold', threshold)
+        self.addCleanup(setattr, tracer, 'slow', slow)
+        tracer.slow = []
+
+    async def test_off_by_default(self):
+        tracer.threshold = 0
+        self.assertIsNone(tracer.open('x'))
+        with span('db'):
+            pass
+        self.assertEqual(tracer.slow, [])
+
+    async def test_slow_interaction_is_logged_with_phases(self):
+        """Test that a slow handler is logged with each phase's own time; inner spans are not counted twice."""
+        tracer.threshold = 0.001
+
+        @timed('test_traced_seconds', component='raid_join')
+        async def click():
+            with span('discord'):
+                await asyncio.sleep(0.02)
+                with span('db'):
+                    await asyncio.sleep(0.01)
+            # spans in tasks the handler spawns report into its trace too
+            await asyncio.gather(asyncio.create_task(render()))
+
+        async def render():
+            with span('render'):
+                await asyncio.sleep(0.005)
+
+        await click()
+        name, total, breakdown = tracer.slow[-1]
+        self.assertEqual(name, 'raid_join')
+        self.assertGreaterEqual(total, 0.035)
+        phases = dict(re.findall(r'(\w+) (\d+) ms', breakdown))
+        self.assertEqual(set(phases) - {'other'}, {'discord', 'db', 'render'})
+        self.assertGreaterEqual(int(phases['db']), 10)
+        self.assertLess(int(phases['discord']), 30)   # the nested db span's 10 ms is not in it
+
+
+class TestProfiler(unittest.TestCase):
+    def test_samples_are_saved_folded(self):
+        profiler = SamplingProfiler(0.001)
+        profiler.start()
+
+        def busy_wait(until):
+            while time.perf_counter() < until:
+                pass
+        busy_wait(time.perf_counter() + 0.1)
+        stacks = profiler.stop()
+        self.assertGreater(profiler.samples, 5)
+        self.assertTrue(any(s.startswith(threading.current_thread().name + ';') for s in stacks))
+        self.assertTrue(any(frame.startswith('test_metrics.py:busy_wait') for frame, _ in top_frames(stacks)))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = write_folded(os.path.join(tmp, 'p', 'x.folded'), stacks)
+            with open(path) as fh:
+                stack, count = fh.readline().rsplit(' ', 1)
+        self.assertGreater(int(count), 0)
+        self.assertIn(';', stack)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,16 @@
 # ──────────────── tests/test_mission_cog.py ────────────────
 import unittest
 from unittest.mock import MagicMock, AsyncMock, patch
+import asyncio
 import datetime
-import pytz
+import discord
 from src.cogs.mission_cog import MissionCog, MissionModal, ConfirmView, MissionView
 
 class TestMissionCog(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
         self.bot = AsyncMock()
-        self.bot.db_handler = MagicMock()
+        self.bot.db_handler = AsyncMock()
         self.cog = MissionCog(self.bot)
 
     async def test_create_mission_no_timezone(self):
@@ -43,11 +44,78 @@ class TestMissionCog(unittest.IsolatedAsyncioTestCase):
         self.bot.db_handler.set_user_timezone.assert_not_called()
         ctx.respond.assert_called_once_with("Invalid timezone. Please select a valid timezone from the list.", ephemeral=True)
 
+    async def test_list_pages_by_range_query(self):
+        """Test that /mission list asks the index for one page at a time, narrowed to the chosen scope."""
+        mission = {'id': 5, 'message_id': 5, 'guild_id': 1, 'channel_id': 9, 'participants': [1, 2],
+                   'details': 'By order of the Baron:\n\n_Raid the spice field_', 'time': '2026-03-01T10:00:00+00:00'}
+        db = self.bot.db_handler
+        db.get_missions_page.return_value = ([mission], 25)
+        ctx = AsyncMock()
+        ctx.guild_id, ctx.author.id, ctx.channel_id = 1, 2, 9
+        await self.cog.list_missions.callback(self.cog, ctx, "mine")
+        self.assertEqual(db.get_missions_page.call_args.kwargs,
+                         {'offset': 0, 'limit': 10, 'participant_id': 2})
+        embed, view = ctx.respond.call_args.kwargs['embed'], ctx.respond.call_args.kwargs['view']
+        self.assertIn('[Raid the spice field](https://discord.com/channels/1/9/5)', embed.description)
+        self.assertEqual(embed.footer.text, 'Page 1 of 3 • 25 missions')
+        self.assertTrue(view.prev_button.disabled)
+
+        interaction = AsyncMock()
+        await view.next_button.callback(interaction)
+        self.assertEqual(db.get_missions_page.call_args.kwargs['offset'], 10)
+        self.assertEqual(view.page, 1)
+        self.assertFalse(view.prev_button.disabled)
+        interaction.response.edit_message.assert_called_once()
+
+    async def test_rehydrate_views(self):
+        """Test that every stored mission gets its buttons re-registered without API calls."""
+        self.bot.add_view = MagicMock()
+        self.bot.db_handler.get_all_missions.return_value = [{'message_id': 5}, {'message_id': 6}]
+        self.assertEqual(await self.cog.rehydrate_views(), 2)
+        view = self.bot.add_view.call_args.args[0]
+        self.assertTrue(view.is_persistent())
+        self.assertEqual(sorted(c.custom_id for c in view.children),
+                         ['mission_cancel_6', 'mission_join_6', 'mission_leave_6'])
+        self.bot.fetch_channel.assert_not_called()
+
+    async def test_expiry_deletes_via_cached_channel(self):
+        """Test that an expired mission is removed using the gateway channel cache, not the API."""
+        channel = MagicMock()
+        channel.get_partial_message.return_value.delete = AsyncMock()
+        self.bot.get_channel = MagicMock(return_value=channel)
+        self.bot.db_handler.get_mission.return_value = {'message_id': 5, 'channel_id': 9, 'participants': []}
+        await self.cog._on_mission_event('expire', 5)
+        channel.get_partial_message.return_value.delete.assert_awaited_once()
+        self.bot.fetch_channel.assert_not_called()
+        self.bot.db_handler.delete_mission.assert_called_once_with(5)
+
+    async def test_expiry_forgets_the_mission_when_the_delete_fails(self):
+        """Test that a failed post delete still removes the mission row, since the expiry is not retried."""
+        channel = MagicMock()
+        channel.get_partial_message.return_value.delete = AsyncMock(
+            side_effect=discord.HTTPException(MagicMock(status=500, reason='Server Error'), 'oops'))
+        self.bot.get_channel = MagicMock(return_value=channel)
+        self.bot.db_handler.get_mission.return_value = {'message_id': 5, 'channel_id': 9, 'participants': []}
+        with patch('builtins.print') as log:
+            await self.cog._on_mission_event('expire', 5)
+        self.assertIn('MISSION EXPIRE ERROR', log.call_args.args[0])
+        self.bot.db_handler.delete_mission.assert_called_once_with(5)
+
+    async def test_reminder_pings_participants(self):
+        """Test that a reminder mentions every participant in the mission's channel."""
+        channel = MagicMock(send=AsyncMock())
+        self.bot.get_channel = MagicMock(return_value=channel)
+        self.bot.db_handler.get_mission.return_value = {
+            'message_id': 5, 'channel_id': 9, 'participants': [1, 2], 'time': '2025-01-01T12:00:00+00:00'}
+        await self.cog._on_mission_event('remind', 5)
+        self.assertIn('<@1> <@2>', channel.send.call_args.args[0])
+        self.bot.db_handler.delete_mission.assert_not_called()
+
 class TestMissionUI(unittest.IsolatedAsyncioTestCase):
 
     async def test_modal_callback(self):
         """Test that the mission modal callback sends a confirmation view."""
-        db = MagicMock()
+        db = AsyncMock()
         modal = MissionModal(db, "UTC")
         interaction = AsyncMock()
         modal.children[0].value = "Test Mission"
@@ -55,7 +123,7 @@ class TestMissionUI(unittest.IsolatedAsyncioTestCase):
         modal.children[2].value = "12:00"
 
         with patch('src.cogs.mission_cog.ConfirmView') as MockConfirmView:
-            MockConfirmView.return_value = ConfirmView(db, MagicMock(), datetime.datetime.now(pytz.utc)) # Return an actual instance
+            MockConfirmView.return_value = ConfirmView(db, MagicMock(), datetime.datetime.now(datetime.timezone.utc)) # Return an actual instance
             await modal.callback(interaction)
             interaction.response.send_message.assert_called_once()
             self.assertTrue(interaction.response.send_message.call_args.kwargs['ephemeral'])
@@ -63,9 +131,9 @@ class TestMissionUI(unittest.IsolatedAsyncioTestCase):
 
     async def test_confirm_view_confirm_button(self):
         """Test that the confirm button posts the mission."""
-        db = MagicMock()
+        db = AsyncMock()
         embed = MagicMock()
-        mission_time = datetime.datetime.now(pytz.utc)
+        mission_time = datetime.datetime.now(datetime.timezone.utc)
         view = ConfirmView(db, embed, mission_time)
         interaction = AsyncMock()
 
@@ -77,9 +145,9 @@ class TestMissionUI(unittest.IsolatedAsyncioTestCase):
 
     async def test_confirm_view_cancel_button(self):
         """Test that the cancel button cancels mission creation."""
-        db = MagicMock()
+        db = AsyncMock()
         embed = MagicMock()
-        mission_time = datetime.datetime.now(pytz.utc)
+        mission_time = datetime.datetime.now(datetime.timezone.utc)
         view = ConfirmView(db, embed, mission_time)
         interaction = AsyncMock()
 
@@ -89,35 +157,64 @@ class TestMissionUI(unittest.IsolatedAsyncioTestCase):
 
     async def test_mission_view_join_button(self):
         """Test that a user can join a mission."""
-        db = MagicMock()
+        db = AsyncMock()
         view = MissionView(123, db)
         interaction = AsyncMock()
         interaction.user.id = 1
-        db.get_mission.return_value = {'participants': [2], 'creator_id': 2}
+        db.add_mission_participant.return_value = True
 
         with patch.object(view, 'update_embed', new=AsyncMock()) as mock_update_embed:
             await view.join_button.callback(interaction)
-            db.update_mission_participants.assert_called_once_with(123, [2, 1])
+            db.add_mission_participant.assert_called_once_with(123, 1)
             mock_update_embed.assert_called_once_with(interaction)
             interaction.response.send_message.assert_called_once_with("You have joined the mission.", ephemeral=True)
 
     async def test_mission_view_leave_button(self):
         """Test that a user can leave a mission."""
-        db = MagicMock()
+        db = AsyncMock()
         view = MissionView(123, db)
         interaction = AsyncMock()
         interaction.user.id = 1
-        db.get_mission.return_value = {'participants': [1, 2], 'creator_id': 2}
+        db.remove_mission_participant.return_value = True
 
         with patch.object(view, 'update_embed', new=AsyncMock()) as mock_update_embed:
             await view.leave_button.callback(interaction)
-            db.update_mission_participants.assert_called_once_with(123, [2])
+            db.remove_mission_participant.assert_called_once_with(123, 1)
             mock_update_embed.assert_called_once_with(interaction)
             interaction.response.send_message.assert_called_once_with("You have left the mission.", ephemeral=True)
 
+    async def test_join_twice_is_refused(self):
+        """Test that a second join by the same user is acknowledged without a re-render."""
+        db = AsyncMock()
+        view = MissionView(123, db)
+        interaction = AsyncMock()
+        db.add_mission_participant.return_value = False
+
+        with patch.object(view, 'update_embed', new=AsyncMock()) as mock_update_embed:
+            await view.join_button.callback(interaction)
+            mock_update_embed.assert_not_called()
+            interaction.response.send_message.assert_called_once_with("You have already joined this mission.", ephemeral=True)
+
+    async def test_join_burst_is_debounced(self):
+        """Test that 30 joins within the debounce window produce a single roster edit."""
+        db = AsyncMock()
+        db.add_mission_participant.return_value = True
+        db.get_mission.return_value = {'participants': list(range(30))}
+        message = AsyncMock()
+        message.embeds = [MagicMock()]
+        views = [MissionView(123, db) for _ in range(2)]   # e.g. the posted view and a rehydrated one
+        with patch('src.cogs.mission_cog.RENDER_DEBOUNCE_SECONDS', 0.05):
+            for user in range(30):
+                interaction = AsyncMock(message=message)
+                interaction.user.id = user
+                await views[user % 2].join_button.callback(interaction)
+                interaction.response.send_message.assert_called_once_with("You have joined the mission.", ephemeral=True)
+            await asyncio.sleep(0.1)
+        message.edit.assert_called_once()
+
     async def test_mission_view_cancel_mission_button(self):
         """Test that the mission creator can cancel the mission.""" 
-        db = MagicMock()
+        db = AsyncMock()
         view = MissionView(123, db)
         interaction = AsyncMock()
         interaction.user.id = 1
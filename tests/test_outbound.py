@@ -0,0 +1,132 @@
+# ──────────────── tests/test_outbound.py ────────────────
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+import discord
+from src.core.outbound import OutboundQueue, Priority, send
+
+
+class TestOutboundQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.queue = OutboundQueue(workers=1, per_bucket=1)
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+
+    async def test_priority_order(self):
+        """Test that queued interaction replies run before background work."""
+        ran, gate = [], asyncio.Event()
+
+        async def blocker():
+            await gate.wait()
+
+        def job(name):
+            async def run():
+                ran.append(name)
+            return run
+
+        first = asyncio.create_task(self.queue.submit(blocker, Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(self.queue.submit(job(n), p)) for n, p in
+                 (('bg', Priority.BACKGROUND), ('edit', Priority.EDIT), ('reply', Priority.INTERACTION))]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        self.assertEqual(ran, ['reply', 'edit', 'bg'])
+
+    async def test_dedupe_runs_latest_edit_once(self):
+        """Test that repeated edits to the same message collapse into the newest one."""
+        gate, calls = asyncio.Event(), []
+
+        async def blocker():
+            await gate.wait()
+
+        def edit(n):
+            async def run():
+                calls.append(n)
+                return n
+            return run
+
+        first = asyncio.create_task(self.queue.submit(blocker))
+        await asyncio.sleep(0)
+        edits = [asyncio.create_task(self.queue.submit(edit(n), dedupe_key='msg:1')) for n in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(first, *edits)
+        self.assertEqual(calls, [4])
+        self.assertEqual(results[1:], [4] * 5)
+        self.assertEqual(self.queue.stats()['deduplicated'], 4)
+
+    async def test_bucket_parallelism_is_bounded(self):
+        """Test that one bucket never runs more than per_bucket jobs while others proceed."""
+        queue = OutboundQueue(workers=4, per_bucket=2)
+        running = peak = 0
+
+        async def job():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        other = AsyncMock(return_value='ok')
+        results = await asyncio.gather(*(queue.submit(job, bucket='channel:1') for _ in range(8)),
+                                       queue.submit(other, bucket='channel:2'))
+        self.assertEqual(peak, 2)
+        self.assertEqual(results[-1], 'ok')
+        await queue.stop()
+
+    async def test_idle_buckets_are_forgotten(self):
+        """Test that the per-bucket bookkeeping only holds buckets with work in them."""
+        queue = OutboundQueue(workers=2, per_bucket=1)
+        job = AsyncMock()
+        await asyncio.gather(*(queue.submit(job, bucket=f'channel:{i % 50}') for i in range(500)))
+        self.assertEqual((queue._running, queue._parked), ({}, {}))
+        await queue.stop()
+
+    async def test_rate_limit_is_retried(self):
+        response = MagicMock(status=429, reason='Too Many Requests')
+        error = discord.HTTPException(response, 'rate limited')
+        error.retry_after = 0
+        job = AsyncMock(side_effect=[error, 'sent'])
+        self.assertEqual(await self.queue.submit(job), 'sent')
+        self.assertEqual(self.queue.stats()['rate_limited'], 1)
+
+    async def test_interaction_replies_do_not_wait_for_workers(self):
+        """Test that a reply goes out while every worker is busy."""
+        gate = asyncio.Event()
+        busy = asyncio.create_task(self.queue.submit(gate.wait, Priority.EDIT))
+        await asyncio.sleep(0)
+        reply = AsyncMock(return_value='acked')
+        self.assertEqual(await asyncio.wait_for(self.queue.submit(reply, Priority.INTERACTION), 1), 'acked')
+        gate.set()
+        await busy
+
+    async def test_rate_limited_job_frees_its_worker(self):
+        """Test that a 429'd job waits out retry_after in the queue while the worker serves others."""
+        error = discord.HTTPException(MagicMock(status=429, reason='Too Many Requests'), 'rate limited')
+        error.retry_after = 0.2
+        ran = []
+
+        async def limited():
+            ran.append('limited')
+            if len(ran) == 1:
+                raise error
+            return 'sent'
+
+        async def other():
+            ran.append('other')
+        first = asyncio.create_task(self.queue.submit(limited, bucket='channel:1'))
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(self.queue.submit(other, bucket='channel:2'), 0.1)
+        self.assertEqual(await first, 'sent')
+        self.assertEqual(ran, ['limited', 'other', 'limited'])
+
+    async def test_send_without_queue_calls_directly(self):
+        job = AsyncMock(return_value=1)
+        self.assertEqual(await send(MagicMock(spec=[]), job), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
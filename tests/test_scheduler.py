@@ -0,0 +1,60 @@
+# ──────────────── tests/test_scheduler.py ────────────────
+import asyncio
+import datetime
+import time
+import unittest
+from src.core.scheduler import EXPIRE, REMIND, MissionScheduler
+
+
+def at(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc)
+
+
+class TestMissionScheduler(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.now = 1_000_000.0
+        self.events = []
+
+        async def handler(kind, mission_id):
+            self.events.append((kind, mission_id))
+        self.scheduler = MissionScheduler(handler, reminders=(15,), grace=3600, clock=lambda: self.now)
+
+    def test_events_come_out_in_due_order(self):
+        self.scheduler.add(1, at(self.now + 7200))
+        self.scheduler.add(2, at(self.now + 1800))
+        self.assertEqual(self.scheduler.next_due(), self.now + 1800 - 900)
+        self.assertEqual(self.scheduler.pop_due(self.now + 10_800),
+                         [(REMIND, 2), (EXPIRE, 2), (REMIND, 1), (EXPIRE, 1)])
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_past_reminders_are_skipped(self):
+        self.scheduler.add(1, at(self.now + 60).isoformat())
+        self.assertEqual(self.scheduler.pop_due(self.now + 3660), [(EXPIRE, 1)])
+
+    def test_discard_and_reschedule(self):
+        self.scheduler.add(1, at(self.now + 7200))
+        self.scheduler.add(2, at(self.now + 7200))
+        self.scheduler.discard(1)
+        self.scheduler.add(2, at(self.now + 20_000))
+        self.assertEqual(self.scheduler.pop_due(self.now + 10_800), [])
+        self.assertEqual(self.scheduler.next_due(), self.now + 20_000 - 900)
+
+    def test_re_adding_replaces_the_entries(self):
+        # on_ready after a reconnect schedules every live mission again
+        self.scheduler.add(1, at(self.now + 7200))
+        self.scheduler.add(1, at(self.now + 7200))
+        self.assertEqual(self.scheduler.pop_due(self.now + 10_800), [(REMIND, 1), (EXPIRE, 1)])
+
+    async def test_run_wakes_for_new_missions(self):
+        scheduler = MissionScheduler(self.scheduler.handler, reminders=(), grace=0)
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0)
+        scheduler.add(7, at(time.time() + 0.05))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        self.assertEqual(self.events, [(EXPIRE, 7)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# ──────────────── tests/test_search.py ────────────────
+import time
+import unittest
+from src.core.database import MentatDB
+from src.core.search import ResourceIndex
+from src.core.storage import SQLiteStorage
+
+NAMES = ['Spice Melange', 'Spice Residue', 'Plastanium Ingot', 'Solari', 'Water', 'Stillsuit Mask',
+         'Advanced Spice Refinery', 'Silicone Block']
+
+
+def resources(names):
+    return [{'id': n.lower().replace(' ', '_'), 'name': n} for n in names]
+
+
+class TestResourceIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ResourceIndex(resources(NAMES))
+
+    def test_ranking_tiers(self):
+        results = self.index.search('spice')
+        self.assertEqual(results[:3], ['Spice Melange', 'Spice Residue', 'Advanced Spice Refinery'])
+
+    def test_exact_beats_prefix(self):
+        index = ResourceIndex(resources(['Water Pack', 'Water']))
+        self.assertEqual(index.search('water')[0], 'Water')
+
+    def test_substring_and_fuzzy(self):
+        self.assertIn('Plastanium Ingot', self.index.search('stani'))
+        self.assertEqual(self.index.search('plastanum')[0], 'Plastanium Ingot')
+
+    def test_short_queries_match_substrings(self):
+        self.assertEqual(self.index.search('la'), ['Plastanium Ingot', 'Solari', 'Spice Melange'])
+        self.assertEqual(self.index.search('q'), [])
+
+    def test_demand_boost_reorders_within_tier(self):
+        demand = {'spice_residue': 'high'}
+        self.assertEqual(self.index.search('spice', demand.get)[0], 'Spice Residue')
+
+    def test_empty_query_offers_boosted_items(self):
+        index = ResourceIndex(resources([f'Item {i:04}' for i in range(500)]))
+        results = index.search('', {'item_0499': 'high'}.get, boosted=['item_0499'])
+        self.assertEqual(results[0], 'Item 0499')
+
+    def test_resolve(self):
+        self.assertEqual(self.index.resolve('solari'), 'solari')
+        self.assertIsNone(self.index.resolve('Solaris'))
+
+    def test_latency_stays_flat(self):
+        def per_query(n):
+            index = ResourceIndex(resources([f'Resource {i} Mk{i % 7}' for i in range(n)]))
+            start = time.perf_counter()
+            for q in ('res', 'resource 12', 'mk3'):
+                index.search(q)
+            return time.perf_counter() - start
+
+        small, large = per_query(100), per_query(10_000)
+        self.assertLess(large, max(small * 20, 0.05))
+
+
+class TestMentatDBSearch(unittest.TestCase):
+    def test_index_rebuilds_after_resources_change(self):
+        db = MentatDB(SQLiteStorage(':memory:'))
+        db.storage.replace('resources', [dict(r, demand='low') for r in resources(['Water'])])
+        self.assertEqual(db.search_resource_names('wat'), ['Water'])
+        db.storage.replace('resources', [dict(r, demand='low') for r in resources(['Water', 'Water Pack'])])
+        db.invalidate('resources')
+        self.assertEqual(db.search_resource_names('wat'), ['Water', 'Water Pack'])
+        self.assertEqual(db.resolve_resource('water pack')['id'], 'water_pack')
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
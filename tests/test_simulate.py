@@ -0,0 +1,32 @@
+# ──────────────── tests/test_simulate.py ────────────────
+import unittest
+from bench import simulate
+from src.cogs import mission_cog
+
+
+class TestSimulate(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        debounce = mission_cog.RENDER_DEBOUNCE_SECONDS
+        self.addCleanup(setattr, mission_cog, 'RENDER_DEBOUNCE_SECONDS', debounce)
+
+    async def test_bursts_lose_no_updates_under_rate_limits(self):
+        """Test every scenario at small scale, with 429s injected: nothing users see may be lost."""
+        results = await simulate.main(['--quiet', '--joins', '60', '--demand-changes', '60', '--autocompletes', '30',
+                                       '--resources', '100', '--spread', '0.05', '--latency-ms', '2', '--jitter-ms', '1',
+                                       '--rate-limit', '0.1', '--retry-after-ms', '1', '--debounce', '0.02'])
+        by_name = {r['scenario']: r for r in results}
+        self.assertEqual(set(by_name), set(simulate.SCENARIOS))
+        for r in results:
+            self.assertEqual(r['lost_updates'], 0, r)
+
+        joins = by_name['join_burst']
+        self.assertEqual(joins['roster_shown'], 61)
+        # every click is answered, but the roster edits collapse into a few
+        self.assertGreaterEqual(joins['api_by_route']['POST /interactions/{interaction_id}/{token}/callback'], 60)
+        self.assertLess(joins['message_edits'], 60)
+        self.assertEqual(by_name['rebuild_during_autocomplete']['posts'], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+# ──────────────── tests/test_startup.py ────────────────
+import threading
+import unittest
+from src.core.metrics import Metrics
+from src.core.startup import BootTimer
+from unittest.mock import patch
+
+
+class TestBootTimer(unittest.TestCase):
+    def test_phases_in_order_with_background_marked(self):
+        boot = BootTimer()
+        with boot.phase('env'):
+            pass
+        worker = threading.Thread(target=boot.background('storage', lambda: None))
+        worker.start()
+        worker.join()
+        with self.assertRaises(ValueError), boot.phase('cogs'):
+            raise ValueError   # a failed phase still reports its time
+        self.assertEqual([(name, bg) for name, _, bg in boot.phases],
+                         [('env', False), ('storage', True), ('cogs', False)])
+        self.assertIn('storage', boot.summary())
+        self.assertIn('(bg)', boot.summary())
+
+    def test_report_exports_gauges(self):
+        boot = BootTimer()
+        boot.add('login', 0.25)
+        fresh = Metrics()
+        with patch('src.core.startup.metrics', fresh), patch('builtins.print'):
+            boot.report()
+        self.assertEqual(fresh.gauges['mentat_startup_phase_seconds'][(('phase', 'login'),)], 0.25)
+        self.assertIn('mentat_startup_seconds', fresh.gauges)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# ──────────────── tests/test_sync_cog.py ────────────────
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.cogs.sync_cog import SyncCog
+from src.core.sheet_sync import SyncReport
+
+
+class TestSyncCog(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.bot = MagicMock()
+        self.bot.db_handler = AsyncMock()
+        self.cog = SyncCog(self.bot)
+
+    async def test_changed_items_refresh_each_report_once(self):
+        """Test that a sync which changed items runs one change-feed refresh per report guild."""
+        self.bot.db_handler.sync_from_google_sheet.return_value = SyncReport('updated', changed=2, changed_ids=['a', 'b'])
+        self.bot.db_handler.get_report_channels.return_value = {1: 42, 2: 43, 3: 44}
+        advisor = MagicMock(refresh_report=AsyncMock(side_effect=[None, RuntimeError('gone'), None]))
+        self.bot.get_cog.return_value = advisor
+
+        with patch('builtins.print'):
+            await self.cog.run_sync()
+
+        self.assertEqual([c.args for c in advisor.refresh_report.call_args_list], [(1,), (2,), (3,)])
+        advisor._post_single.assert_not_called()
+
+    async def test_unchanged_sync_touches_nothing(self):
+        """Test that a 304 / unchanged sync does not refresh any post."""
+        self.bot.db_handler.sync_from_google_sheet.return_value = SyncReport('not_modified')
+        await self.cog.run_sync()
+        self.bot.get_cog.assert_not_called()
+
+    async def test_failures_back_off(self):
+        """Test that consecutive failures grow the wait, capped at the normal interval."""
+        self.bot.db_handler.sync_from_google_sheet.return_value = SyncReport('failed', error='boom')
+        self.cog.jitter = 0
+        await self.cog.run_sync()
+        first = self.cog._next_delay()
+        await self.cog.run_sync()
+        self.assertEqual(self.cog._next_delay(), first * 2)
+        with patch.object(self.cog, 'failures', 50):
+            self.assertEqual(self.cog._next_delay(), self.cog.interval)
+
+    async def test_sheet_sync_command(self):
+        """Test that /sheet sync reports the result."""
+        self.bot.db_handler.sync_from_google_sheet.return_value = SyncReport('not_modified')
+        ctx = AsyncMock()
+        await self.cog.sheet_sync.callback(self.cog, ctx)
+        ctx.respond.assert_called_once_with("Sheet sync not modified.", ephemeral=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
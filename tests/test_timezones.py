@@ -0,0 +1,33 @@
+# ──────────────── tests/test_timezones.py ────────────────
+import unittest
+from src.core.timezones import TimezoneService, get_zone
+
+
+class TestTimezoneService(unittest.TestCase):
+
+    def setUp(self):
+        self.tz = TimezoneService()
+
+    def test_resolve_names_abbreviations_and_cities(self):
+        self.assertEqual(self.tz.resolve('europe/paris'), 'Europe/Paris')
+        self.assertEqual(self.tz.resolve('AEST'), 'Australia/Sydney')
+        self.assertEqual(self.tz.resolve('Sydney'), 'Australia/Sydney')
+        self.assertEqual(self.tz.resolve('new york'), 'America/New_York')
+        self.assertIsNone(self.tz.resolve('Invalid/Timezone'))
+
+    def test_search_ranks_alias_first(self):
+        self.assertEqual(self.tz.search('aest')[0], 'Australia/Sydney')
+        self.assertEqual(self.tz.search('syd')[0], 'Australia/Sydney')
+        self.assertLessEqual(len(self.tz.search('a')), 25)
+
+    def test_zone_objects_are_cached(self):
+        self.assertIs(get_zone('Europe/Paris'), get_zone('Europe/Paris'))
+
+    def test_user_memo(self):
+        self.assertIsNone(self.tz.for_user(1))
+        self.tz.remember(1, 'Asia/Tokyo')
+        self.assertEqual(self.tz.for_user(1).key, 'Asia/Tokyo')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+# ──────────────── tests/test_votes.py ────────────────
+import unittest
+from src.core.votes import apply_vote, decay, level_for
+
+HOUR = 3600.0
+
+
+class TestVotes(unittest.TestCase):
+    def test_decay_halves_per_half_life(self):
+        self.assertEqual(decay(4.0, 0, 2 * HOUR, HOUR), 1.0)
+        self.assertEqual(decay(4.0, 10, 0, HOUR), 4.0)   # never grows backwards in time
+
+    def test_levels(self):
+        self.assertEqual([level_for(s) for s in (-1, 0.5, 1, 2.9, 3)], ['low', 'low', 'medium', 'medium', 'high'])
+
+    def test_revote_replaces_the_faded_vote(self):
+        # two members: one voted high an hour ago, the other medium now; then the first changes to low
+        first = {'level': 'high', 'ts': 0.0}
+        score = apply_vote(None, None, 'high', 0.0, HOUR)
+        score = apply_vote({'score': score, 'as_of': 0.0}, None, 'medium', HOUR, HOUR)
+        self.assertAlmostEqual(score, 2.0)
+        score = apply_vote({'score': score, 'as_of': HOUR}, first, 'low', HOUR, HOUR)
+        self.assertAlmostEqual(score, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()